@@ -0,0 +1,29 @@
+"""Add persisted KPIs and quick diagnosis to trend analysis
+
+Revision ID: c41e7b9a2d13
+Revises: 8b4d203f5c2a
+Create Date: 2025-12-02 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c41e7b9a2d13"
+down_revision = "8b4d203f5c2a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("trend_analysis", sa.Column("kpis", sa.JSON(), nullable=True))
+    op.add_column(
+        "trend_analysis", sa.Column("quick_diagnosis_html", sa.Text(), nullable=True)
+    )
+
+
+def downgrade():
+    op.drop_column("trend_analysis", "quick_diagnosis_html")
+    op.drop_column("trend_analysis", "kpis")
@@ -54,7 +54,7 @@ logger = logging.getLogger(__name__)
 
 
 def _validar_e_separar_linhas_invalidas(
-    df: pd.DataFrame, output_dir: str
+    df: pd.DataFrame, output_dir: str | None
 ) -> Tuple[pd.DataFrame, int]:
     """
     Valida a integridade dos dados de um DataFrame e separa as linhas inválidas.
@@ -65,7 +65,8 @@ def _validar_e_separar_linhas_invalidas(
 
     Args:
         df (pd.DataFrame): O DataFrame de entrada a ser validado.
-        output_dir (str): O diretório onde o log de linhas inválidas será salvo.
+        output_dir (str | None): O diretório onde o log de linhas inválidas será
+            salvo. Se None, as linhas inválidas são apenas descartadas.
 
     Returns:
         Tuple[pd.DataFrame, int]: Uma tupla contendo:
@@ -114,20 +115,23 @@ def _validar_e_separar_linhas_invalidas(
 
     num_invalidos = len(invalid_indices)
     if all_invalid_dfs:
-        df_invalidos_total = pd.concat(all_invalid_dfs, ignore_index=True)
-        log_invalidos_path = os.path.join(output_dir, LOG_INVALIDOS_FILENAME)
-        logger.warning(
-            f"Detectadas {num_invalidos} linhas inválidas. Registrando em '{log_invalidos_path}'..."
-        )
-        df_invalidos_total.to_csv(
-            log_invalidos_path, index=False, encoding="utf-8-sig", sep=";"
-        )
+        if output_dir is None:
+            logger.warning(f"Detectadas {num_invalidos} linhas inválidas.")
+        else:
+            df_invalidos_total = pd.concat(all_invalid_dfs, ignore_index=True)
+            log_invalidos_path = os.path.join(output_dir, LOG_INVALIDOS_FILENAME)
+            logger.warning(
+                f"Detectadas {num_invalidos} linhas inválidas. Registrando em '{log_invalidos_path}'..."
+            )
+            df_invalidos_total.to_csv(
+                log_invalidos_path, index=False, encoding="utf-8-sig", sep=";"
+            )
         df = df.drop(index=list(invalid_indices)).reset_index(drop=True)
 
     return df, num_invalidos
 
 
-def carregar_dados(filepath: str, output_dir: str) -> Tuple[pd.DataFrame, int]:
+def carregar_dados(filepath: str, output_dir: str | None) -> Tuple[pd.DataFrame, int]:
     """
     Carrega, valida e pré-processa os dados de um arquivo CSV.
 
@@ -137,7 +141,8 @@ def carregar_dados(filepath: str, output_dir: str) -> Tuple[pd.DataFrame, int]:
 
     Args:
         filepath (str): O caminho para o arquivo CSV a ser carregado.
-        output_dir (str): O diretório de saída para logs de validação.
+        output_dir (str | None): O diretório de saída para logs de validação
+            (None para não gravar o log).
 
     Returns:
         Tuple[pd.DataFrame, int]: Uma tupla contendo:
@@ -568,12 +573,29 @@ def export_summary_to_json(summary: pd.DataFrame, output_path: str):
 
 
 def analisar_arquivo_csv(
-    input_file: str, output_dir: str, light_analysis: bool = False
+    input_file: str, output_dir: str | None, light_analysis: bool = False
 ) -> Dict[str, Any]:
     """
     Função principal que orquestra a análise de um arquivo CSV.
     Retorna um dicionário com os resultados da análise e metadados.
+
+    Na análise leve (`light_analysis=True`), usada pelas comparações diretas,
+    apenas o resumo em memória é produzido: nenhum CSV ou JSON é gravado
+    (`json_path` é None) e `output_dir` pode ser None. O resultado traz também
+    o `intervalo_datas` (primeiro e último alerta) lido na própria ingestão.
     """
+    if light_analysis:
+        df, num_logs_invalidos = carregar_dados(input_file, output_dir)
+        summary = analisar_grupos(df)
+        logger.info("Análise leve concluída. Resumo mantido apenas em memória.")
+        return {
+            "summary": summary,
+            "df_atuacao": summary[summary["acao_sugerida"].isin(ACAO_FLAGS_ATUACAO)],
+            "num_logs_invalidos": num_logs_invalidos,
+            "json_path": None,
+            "intervalo_datas": (df[COL_CREATED_ON].min(), df[COL_CREATED_ON].max()),
+        }
+
     os.makedirs(output_dir, exist_ok=True)
 
     # Define caminhos
@@ -587,17 +609,6 @@ def analisar_arquivo_csv(
     summary = analisar_grupos(df)
     export_summary_to_json(summary.copy(), output_json)
 
-    df_atuacao = summary[summary["acao_sugerida"].isin(ACAO_FLAGS_ATUACAO)].copy()
-
-    if light_analysis:
-        logger.info("Análise leve concluída. Apenas o resumo JSON foi gerado.")
-        return {
-            "summary": summary,
-            "df_atuacao": df_atuacao,
-            "num_logs_invalidos": num_logs_invalidos,
-            "json_path": output_json,
-        }
-
     # 2. Geração de Relatórios CSV
     df_atuacao = gerar_relatorios_csv(
         summary, output_actuation_csv, output_ok_csv, output_instability_csv
@@ -1,10 +1,11 @@
 import pandas as pd
+import numpy as np
 import os
 import json
 from html import escape
 import logging
 import re
-from string import Template
+from . import cache_resumos, formatacao_html, gerador_html
 from .constants import (
     ACAO_FLAGS_ATUACAO,
     COL_ASSIGNMENT_GROUP,
@@ -41,6 +42,9 @@ COL_ALERT_COUNT = "alert_count"
 COL_ALERT_COUNT_P1 = f"{COL_ALERT_COUNT}{MERGE_COL_P1_SUFFIX}"
 COL_ALERT_COUNT_P2 = f"{COL_ALERT_COUNT}{MERGE_COL_P2_SUFFIX}"
 
+# Chave de 64 bits de cada Caso (hash das colunas de CASE_ID_COLS).
+COL_CHAVE_CASO = "case_key"
+
 CSS_COLOR_DANGER = "var(--danger-color)"
 CSS_COLOR_SUCCESS = "var(--success-color)"
 CSS_COLOR_WARNING = "var(--warning-color)"
@@ -51,11 +55,32 @@ def sanitize_for_id(text):
     return re.sub(r"[^a-zA-Z0-9\-_]", "-", str(text)).lower()
 
 
+def calcular_chaves_casos(df: pd.DataFrame) -> np.ndarray:
+    """
+    Chave de 64 bits de cada Caso, calculada de forma vetorizada a partir das
+    colunas de `CASE_ID_COLS` (colunas ausentes contam como vazias). Se o resumo
+    já traz a coluna `COL_CHAVE_CASO`, ela é reaproveitada.
+    """
+    if COL_CHAVE_CASO in df.columns:
+        return df[COL_CHAVE_CASO].to_numpy(np.uint64)
+    colunas = pd.DataFrame(
+        {col: df[col].astype(str) if col in df.columns else "" for col in CASE_ID_COLS},
+        index=df.index,
+    )
+    return pd.util.hash_pandas_object(colunas, index=False).to_numpy(np.uint64)
+
+
 def load_summary_from_json(filepath: str):
     """
     Carrega o resumo de problemas de um arquivo JSON,
     suportando o novo formato com cabeçalho e o formato antigo (apenas records).
+
+    O resumo processado fica no cache do processo enquanto o arquivo não mudar.
     """
+    return cache_resumos.CACHE.obter_resumo(filepath, _ler_resumo_json)
+
+
+def _ler_resumo_json(filepath: str):
     try:
         with open(filepath, "r", encoding="utf-8") as f:
             data = json.load(f)
@@ -72,6 +97,7 @@ def load_summary_from_json(filepath: str):
             df["first_event"] = pd.to_datetime(df["first_event"], errors="coerce")
         if "last_event" in df.columns:
             df["last_event"] = pd.to_datetime(df["last_event"], errors="coerce")
+        df[COL_CHAVE_CASO] = calcular_chaves_casos(df)
 
         logger.info(f"Resumo de problemas carregado de: {filepath}")
         return df
@@ -220,66 +246,153 @@ def generate_executive_summary_html(
     return summary_html
 
 
-def calculate_kpis_and_merged_df(df_p1_atuacao, df_p2_atuacao):
+class CasamentoCasos:
     """
-    Calcula os KPIs e retorna o DataFrame mesclado com base nos dados de atuação.
+    Resultado do casamento dos Casos de dois períodos, em posições (`iloc`).
+
+    `persistentes_p1[i]` e `persistentes_p2[i]` são o mesmo Caso nos dois períodos.
     """
-    valid_case_id_cols = [
-        c
-        for c in CASE_ID_COLS
-        if c in df_p1_atuacao.columns and c in df_p2_atuacao.columns
-    ]
-    merged_df = pd.merge(
-        df_p1_atuacao,
-        df_p2_atuacao,
-        on=valid_case_id_cols,
-        how="outer",
-        suffixes=(MERGE_COL_P1_SUFFIX, MERGE_COL_P2_SUFFIX),
-        validate="one_to_one",
-        indicator=MERGE_COL_INDICATOR,
+
+    __slots__ = ("novos", "persistentes_p1", "persistentes_p2", "resolvidos")
+
+    def __init__(self, resolvidos, novos, persistentes_p1, persistentes_p2):
+        self.resolvidos = resolvidos
+        self.novos = novos
+        self.persistentes_p1 = persistentes_p1
+        self.persistentes_p2 = persistentes_p2
+
+
+def casar_casos(df_p1, df_p2) -> CasamentoCasos:
+    """
+    Casa os Casos de dois períodos pela chave de 64 bits, sem comparar as
+    colunas de texto: as chaves do período anterior são ordenadas e as do
+    recente localizadas nelas por busca binária.
+
+    Raises:
+        pd.errors.MergeError: se um período tiver Casos com a mesma chave (a
+            relação entre os períodos deve ser um para um).
+    """
+    chaves_p1 = calcular_chaves_casos(df_p1)
+    chaves_p2 = calcular_chaves_casos(df_p2)
+    ordem_p1 = np.argsort(chaves_p1, kind="stable")
+    ordenadas_p1 = chaves_p1[ordem_p1]
+    if (ordenadas_p1[1:] == ordenadas_p1[:-1]).any() or len(
+        np.unique(chaves_p2)
+    ) != len(chaves_p2):
+        raise pd.errors.MergeError(
+            "Casos duplicados em um dos períodos: o casamento deve ser um para um."
+        )
+
+    posicao = np.searchsorted(ordenadas_p1, chaves_p2)
+    posicao_valida = np.minimum(posicao, max(len(ordenadas_p1) - 1, 0))
+    encontrado = (
+        ordenadas_p1[posicao_valida] == chaves_p2
+        if len(ordenadas_p1)
+        else np.zeros(len(chaves_p2), dtype=bool)
+    )
+    persistentes_p2 = np.flatnonzero(encontrado)
+    persistentes_p1 = ordem_p1[posicao_valida[encontrado]]
+    casado_p1 = np.zeros(len(chaves_p1), dtype=bool)
+    casado_p1[persistentes_p1] = True
+    return CasamentoCasos(
+        resolvidos=np.flatnonzero(~casado_p1),
+        novos=np.flatnonzero(~encontrado),
+        persistentes_p1=persistentes_p1,
+        persistentes_p2=persistentes_p2,
     )
 
+
+def calcular_kpis_tendencia(df_p1_atuacao, df_p2_atuacao, casamento=None) -> dict:
+    """
+    Calcula os KPIs de tendência a partir do casamento dos Casos, sem montar o
+    DataFrame mesclado (basta quando só as contagens são necessárias).
+    """
+    if casamento is None:
+        casamento = casar_casos(df_p1_atuacao, df_p2_atuacao)
+    alertas_p1 = df_p1_atuacao[COL_ALERT_COUNT].to_numpy()
+    alertas_p2 = df_p2_atuacao[COL_ALERT_COUNT].to_numpy()
+
     total_p1 = len(df_p1_atuacao)
     total_p2 = len(df_p2_atuacao)
-    resolved = merged_df[MERGE_COL_INDICATOR].eq(MERGE_VAL_LEFT_ONLY).sum()
-    new = merged_df[MERGE_COL_INDICATOR].eq(MERGE_VAL_RIGHT_ONLY).sum()
-    persistent = merged_df[MERGE_COL_INDICATOR].eq(MERGE_VAL_BOTH).sum()
-
-    alerts_total_p1 = df_p1_atuacao[COL_ALERT_COUNT].sum()
-    alerts_total_p2 = df_p2_atuacao[COL_ALERT_COUNT].sum()
-    alerts_resolved = merged_df.loc[
-        merged_df[MERGE_COL_INDICATOR] == MERGE_VAL_LEFT_ONLY, COL_ALERT_COUNT_P1
-    ].sum()
-    alerts_new = merged_df.loc[
-        merged_df[MERGE_COL_INDICATOR] == MERGE_VAL_RIGHT_ONLY, COL_ALERT_COUNT_P2
-    ].sum()
-    alerts_persistent = merged_df.loc[
-        merged_df[MERGE_COL_INDICATOR] == MERGE_VAL_BOTH, COL_ALERT_COUNT_P2
-    ].sum()
-    alerts_persistent_p1 = merged_df.loc[
-        merged_df[MERGE_COL_INDICATOR] == MERGE_VAL_BOTH, COL_ALERT_COUNT_P1
-    ].sum()
+    resolved = len(casamento.resolvidos)
+    new = len(casamento.novos)
+    persistent = len(casamento.persistentes_p2)
 
     improvement_rate = (resolved / total_p1 * 100) if total_p1 > 0 else 0
     regression_rate = (new / total_p2 * 100) if total_p2 > 0 else 0
 
-    kpis = {
+    return {
         "total_p1": total_p1,
         "resolved": resolved,
         "new": new,
         "total_p2": total_p2,
         "persistent": persistent,
-        "alerts_total_p1": int(alerts_total_p1),
-        "alerts_total_p2": int(alerts_total_p2),
-        "alerts_resolved": int(alerts_resolved),
-        "alerts_new": int(alerts_new),
-        "alerts_persistent": int(alerts_persistent),
-        "alerts_persistent_p1": int(alerts_persistent_p1),
+        "alerts_total_p1": int(alertas_p1.sum()),
+        "alerts_total_p2": int(alertas_p2.sum()),
+        "alerts_resolved": int(alertas_p1[casamento.resolvidos].sum()),
+        "alerts_new": int(alertas_p2[casamento.novos].sum()),
+        "alerts_persistent": int(alertas_p2[casamento.persistentes_p2].sum()),
+        "alerts_persistent_p1": int(alertas_p1[casamento.persistentes_p1].sum()),
         "improvement_rate": improvement_rate,
         "regression_rate": regression_rate,
     }
 
-    return kpis, merged_df
+
+def _montar_casos_comparados(df_p1, df_p2, casamento):
+    """
+    Monta, a partir do casamento, o DataFrame no formato de um `pd.merge` externo
+    com indicador: colunas de identificação sem sufixo, demais colunas comuns com
+    os sufixos de cada período e a coluna `MERGE_COL_INDICATOR`.
+    """
+    colunas_id = [
+        c
+        for c in [*CASE_ID_COLS, COL_CHAVE_CASO]
+        if c in df_p1.columns and c in df_p2.columns
+    ]
+    comuns = [c for c in df_p1.columns if c in df_p2.columns and c not in colunas_id]
+
+    def selecionar(df, posicoes, sufixo):
+        parte = df.take(posicoes).reset_index(drop=True)
+        return parte.rename(columns={c: f"{c}{sufixo}" for c in comuns})
+
+    persistentes = pd.concat(
+        [
+            selecionar(df_p1, casamento.persistentes_p1, MERGE_COL_P1_SUFFIX),
+            selecionar(df_p2, casamento.persistentes_p2, MERGE_COL_P2_SUFFIX).drop(
+                columns=colunas_id
+            ),
+        ],
+        axis=1,
+    )
+    # Mesma ordem de um merge externo (chaves em ordem lexicográfica): é a ordem
+    # em que os Casos persistentes de cada squad aparecem no relatório.
+    persistentes = persistentes.sort_values(
+        [c for c in CASE_ID_COLS if c in colunas_id], kind="stable", ignore_index=True
+    )
+    partes = [
+        (
+            selecionar(df_p1, casamento.resolvidos, MERGE_COL_P1_SUFFIX),
+            MERGE_VAL_LEFT_ONLY,
+        ),
+        (persistentes, MERGE_VAL_BOTH),
+        (selecionar(df_p2, casamento.novos, MERGE_COL_P2_SUFFIX), MERGE_VAL_RIGHT_ONLY),
+    ]
+    return pd.concat(
+        [parte.assign(**{MERGE_COL_INDICATOR: valor}) for parte, valor in partes],
+        ignore_index=True,
+    )
+
+
+def calculate_kpis_and_merged_df(df_p1_atuacao, df_p2_atuacao):
+    """
+    Calcula os KPIs e retorna o DataFrame mesclado com base nos dados de atuação.
+
+    Os Casos são casados pela chave de 64 bits (`casar_casos`); o DataFrame
+    mesclado é montado a partir das posições casadas, sem junção por texto.
+    """
+    casamento = casar_casos(df_p1_atuacao, df_p2_atuacao)
+    kpis = calcular_kpis_tendencia(df_p1_atuacao, df_p2_atuacao, casamento)
+    return kpis, _montar_casos_comparados(df_p1_atuacao, df_p2_atuacao, casamento)
 
 
 def prepare_trend_dataframes(merged_df, df_p1_atuacao, df_p2_atuacao):
@@ -385,225 +498,63 @@ def analyze_persistent_cases(merged_df):
     return summary.sort_values(by=["num_cases", "abs_change"], ascending=[False, False])
 
 
-def generate_kpis_html(kpis):
-    """Gera o HTML para a seção de KPIs do panorama geral."""
-    saldo_icon = ""
-
-    if kpis["total_p2"] > kpis["total_p1"]:
-        saldo_icon = (
-            f"<span style='font-size: 0.7em; color: {CSS_COLOR_DANGER};'>▲</span>"
-        )
-    elif kpis["total_p2"] < kpis["total_p1"]:
-        saldo_icon = (
-            f"<span style='font-size: 0.7em; color: {CSS_COLOR_SUCCESS};'>▼</span>"
-        )
-
-    # Calcula a variação de alertas nos Casos persistentes para exibição no funil
-    persistent_alerts_variation = (
-        kpis["alerts_persistent"] - kpis["alerts_persistent_p1"]
-    )
-    variation_text = ""
-    if persistent_alerts_variation != 0:
-        sign = "+" if persistent_alerts_variation > 0 else ""
-        color = (
-            CSS_COLOR_DANGER if persistent_alerts_variation > 0 else CSS_COLOR_SUCCESS
-        )
-        variation_text = f' <span style="font-weight: 600; color: {color};">({sign}{persistent_alerts_variation})</span>'
-
-    kpi_html = "<h2>Balanço Operacional: O Fluxo de Casos</h2>"
-    kpi_html += "<div class='definition-box'><strong>Caso =></strong> Problema único que precisa de ação. O fluxo mostra a evolução do número total de Casos e alertas entre dois períodos.</div>"
-
-    kpi_html += f"""
-    <div class="kpi-flow-container">
-        <div class="kpi-flow-item"><div class="kpi-card-enhanced">
-            <p class="kpi-value" style="color: var(--info-color);">{kpis["total_p1"]}</p>
-            <p class="kpi-label">Casos em Aberto (Anterior)</p>
-            <p class="kpi-subtitle" title="Total de problemas únicos do período anterior que não possuíam remediação bem-sucedida e exigiam ação.">{kpis["alerts_total_p1"]} alertas</p>
-        </div></div>
-        <div class="kpi-flow-connector icon-minus"></div>
-        <div class="kpi-flow-group">
-            <div class="kpi-flow-item" style="flex:auto;"><div class="kpi-card-enhanced">
-                <p class="kpi-value" style="color: var(--success-color);">{kpis["resolved"]}</p>
-                <p class="kpi-label">Casos Resolvidos</p>
-                <p class="kpi-subtitle" title="Casos que passaram a ter remediação com sucesso (REM_OK) ou cujo volume de alertas foi zerado.">{kpis["alerts_resolved"]} alertas resolvidos</p>
-            </div></div>
-            <div class="kpi-flow-item" style="flex:auto;"><div class="kpi-card-enhanced">
-                <p class="kpi-value" style="color: var(--persistent-color);">{kpis["persistent"]}</p>
-                <p class="kpi-label">Casos Persistentes</p>
-                <p class="kpi-subtitle" title="Problemas que já existiam e continuam sem remediação. O número de alertas reflete o volume do período recente, e a variação em parênteses mostra se o impacto desses problemas aumentou ou reduziu.">{kpis["alerts_persistent"]} alertas{variation_text}</p>
-            </div></div>
-        </div>
-        <div class="kpi-flow-connector icon-plus"></div>
-        <div class="kpi-flow-item"><div class="kpi-card-enhanced">
-            <p class="kpi-value" style="color: var(--warning-color);">{kpis["new"]}</p>
-            <p class="kpi-label">Novos Casos</p>
-            <p class="kpi-subtitle" title="Problemas que não existiam no período anterior e que surgiram no período recente já necessitando de ação.">{kpis["alerts_new"]} alertas</p>
-        </div></div>
-        <div class="kpi-flow-connector">=</div>
-        <div class="kpi-flow-item"><div class="kpi-card-enhanced">
-            <p class="kpi-value" style="color: {CSS_COLOR_DANGER if kpis["total_p2"] > kpis["total_p1"] else CSS_COLOR_SUCCESS};">{saldo_icon} {kpis["total_p2"]}</p>
-            <p class="kpi-label">Saldo Recente de Casos</p>
-            <p class="kpi-subtitle" title="Resultado final: a soma dos Casos Persistentes com os Novos Casos. Representa o total de problemas que exigem ação neste período.">{kpis["alerts_total_p2"]} alertas</p>
-        </div></div>
-    </div>"""
-
-    # Gera um insight dinâmico com base nos KPIs
-    insight_text = ""
-    if kpis["total_p1"] == 0 and kpis["total_p2"] > 0:
-        insight_text = f"A operação estava estável e registrou <strong>{kpis['new']} novo(s) problema(s)</strong>. O foco deve ser em entender a causa dessa regressão."
-    elif kpis["total_p2"] == 0:
-        insight_text = "A operação atingiu um estado de <strong>zero Casos</strong> que necessitam de ação. Um marco de excelência em estabilidade."
-    elif kpis["resolved"] > kpis["new"]:
-        insight_text = f"A equipe conseguiu resolver mais problemas do que os que surgiram (<strong>{kpis['resolved']} resolvidos</strong> vs. <strong>{kpis['new']} novos</strong>), resultando em uma melhora líquida na saúde operacional."
-    else:
-        insight_text = f"O número de <strong>novos problemas ({kpis['new']})</strong> foi maior ou igual ao de <strong>problemas resolvidos ({kpis['resolved']})</strong>. Isso indica que a operação está em um ciclo reativo, sem ganhos de estabilidade."
-
-    kpi_html += f"""
-    <div class="insight-box">
-        💡 <strong>Análise e Insight:</strong> {insight_text}
-    </div>"""
-
-    # --- Card 1: Taxa de Resolução (Período Anterior) ---
-    improvement_percent = kpis.get("improvement_rate", 0)
-    resolved_count = kpis["resolved"]
-    total_previous = kpis["total_p1"]
-
-    imp_gauge_color = CSS_COLOR_SUCCESS
-    imp_card_bg = "background-color: rgba(28, 200, 138, 0.1);"
-    if improvement_percent < 75 and improvement_percent >= 50:
-        imp_gauge_color = CSS_COLOR_WARNING
-        imp_card_bg = "background-color: rgba(246, 194, 62, 0.1);"
-    elif improvement_percent < 50:
-        imp_gauge_color = CSS_COLOR_DANGER
-        imp_card_bg = "background-color: rgba(231, 74, 59, 0.1);"
-
-    # --- Card 2: Taxa de Novos Problemas (Período Recente) ---
-    regression_percent = kpis.get("regression_rate", 0)
-    new_count = kpis["new"]
-    total_current = kpis["total_p2"]
-
-    reg_gauge_color = CSS_COLOR_DANGER
-    reg_card_bg = "background-color: rgba(231, 74, 59, 0.1);"
-    if regression_percent <= 25 and regression_percent > 10:
-        reg_gauge_color = CSS_COLOR_WARNING
-        reg_card_bg = "background-color: rgba(246, 194, 62, 0.1);"
-    elif regression_percent <= 10:
-        reg_gauge_color = CSS_COLOR_SUCCESS
-        reg_card_bg = "background-color: rgba(28, 200, 138, 0.1);"
-
-    kpi_html += f"""
-    <div class="kpi-grid-container">
-        <div class="card kpi-split-layout" style="{imp_card_bg}">
-            <div class="kpi-split-layout__chart">
-                <div class="progress-donut" style="--p:{improvement_percent:.1f}; --c:{imp_gauge_color};">
-                    <div class="progress-donut-text-content"><div class="progress-donut__value">{improvement_percent:.0f}%</div></div>
-                </div>
-            </div>
-            <div class="kpi-split-layout__text">
-                <h2>Taxa de Resolução (Período Anterior)</h2>
-                <p>Dos <strong>{total_previous} Casos</strong> que precisavam de ação, <strong>{resolved_count} foram resolvidos</strong>.</p>
-                <small>Este KPI mede a eficácia na eliminação de problemas que já existiam.</small>
-            </div>
-        </div>
-        <div class="card kpi-split-layout" style="{reg_card_bg}">
-            <div class="kpi-split-layout__chart">
-                <div class="progress-donut" style="--p:{regression_percent:.1f}; --c:{reg_gauge_color};">
-                    <div class="progress-donut-text-content"><div class="progress-donut__value">{regression_percent:.0f}%</div></div>
-                </div>
-            </div>
-            <div class="kpi-split-layout__text">
-                <h2>Taxa de Novos Problemas (Período Recente)</h2>
-                <p>Dos <strong>{total_current} Casos</strong> atuais, <strong>{new_count} são novos</strong>, representando uma taxa de regressão.</p>
-                <small>Este KPI mede a capacidade da operação de prevenir novos problemas.</small>
-            </div>
-        </div>
-    </div>"""
-
-    return kpi_html
-
-
-def _generate_change_bar_html(change, max_abs_change):
-    """Gera o HTML para uma barra de variação (positiva/negativa)."""
-    change_sign = ""
-    change_color = "var(--text-secondary-color)"
-
-    if change > 0:
-        bar_class = "negative"
-        change_color = CSS_COLOR_DANGER
-        change_sign = "+"
-    elif change < 0:
-        bar_class = "positive"
-        change_color = CSS_COLOR_SUCCESS
-    else:
-        bar_class = "neutral"
-
-    bar_width = (abs(change) / max_abs_change * 100) if max_abs_change > 0 else 0
-
-    return f"""
-    <div class="change-bar-container">
-        <div class="bar-wrapper"><div class="bar {bar_class}" style="width: {bar_width}%;"></div></div>
-        <span class="change-value" style="color: {change_color}">{change_sign}{change:,.0f}</span>
-    </div>"""
-
+def _preparar_tabela_persistentes(summary_df, detailed_df):
+    """
+    Prepara os dados da tabela de Casos persistentes por squad.
 
-def generate_persistent_cases_table_html(summary_df, detailed_df, label_p1, label_p2):
-    """Gera a tabela HTML para os Casos persistentes por squad."""
+    Os Casos são agrupados por squad uma única vez (posições de cada grupo) e as
+    linhas são produzidas sob demanda, de modo que a renderização percorre os
+    Casos em tempo linear, sem refiltrar o DataFrame a cada squad.
+    """
     if summary_df.empty:
-        return "<p>Nenhum caso persistente foi identificado. Ótimo trabalho!</p>"
-
-    max_abs_change = summary_df["abs_change"].max() if not summary_df.empty else 1
-
-    total_num_cases = summary_df["num_cases"].sum()
-    total_alerts_p1 = summary_df["alerts_p1"].sum()
-    total_alerts_p2 = summary_df["alerts_p2"].sum()
-    total_change = summary_df["change"].sum()
-
-    table_body = "<tbody>"
-    chevron_svg = '<svg width="14" height="14" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="3" stroke-linecap="round" stroke-linejoin="round" class="chevron"><polyline points="9 18 15 12 9 6"></polyline></svg>'
-
-    for name, row in summary_df.iterrows():
-        squad_id = sanitize_for_id(name)
-        details_id = f"details-{squad_id}"
-        num_cases, p1_count, p2_count, change = (
-            row["num_cases"],
-            row["alerts_p1"],
-            row["alerts_p2"],
-            row["change"],
-        )
-        bar_html = _generate_change_bar_html(change, max_abs_change)
-
-        table_body += f"<tr class='expandable-row' data-target='{details_id}'>"
-        table_body += f"<td><span style='display: flex; align-items: center; gap: 8px;'>{chevron_svg} {escape(str(name))}</span></td>"
-        table_body += f"<td>{bar_html}</td><td class='center'>{p2_count}</td><td class='center'>{p1_count}</td><td class='center' style='font-weight: bold;'>{num_cases}</td></tr>"
-
-        squad_cases_df = detailed_df[detailed_df[COL_ASSIGNMENT_GROUP] == name]
-        details_content = "<h4>Detalhes dos Casos Persistentes</h4><table class='sub-table'><thead><tr><th>Problema</th><th>Recurso Afetado</th><th>Alertas (Recente)</th><th>Alertas (Anterior)</th></tr></thead><tbody>"
-        for _, case_row in squad_cases_df.iterrows():
-            details_content += f"<tr><td>{escape(case_row[COL_SHORT_DESCRIPTION])}</td><td>{escape(case_row[COL_CMDB_CI])}</td><td>{int(case_row[COL_ALERT_COUNT_P2])}</td><td>{int(case_row[COL_ALERT_COUNT_P1])}</td></tr>"
-        details_content += "</tbody></table>"
-
-        table_body += f"<tr id='{details_id}' class='details-row'><td colspan='5'><div class='details-row-content'>{details_content}</div></td></tr>"
-    table_body += "</tbody>"
-
-    total_change_sign = "+" if total_change > 0 else ""
-    total_change_color = (
-        CSS_COLOR_DANGER
-        if total_change > 0
-        else (CSS_COLOR_SUCCESS if total_change < 0 else "var(--text-secondary-color)")
-    )
+        return None
 
-    table_footer = "<tfoot><tr><td>Total</td>"
-    table_footer += f"<td><div class='change-bar-container'><span class='change-value' style='color: {total_change_color}; width: 100%; text-align: right;'>{total_change_sign}{total_change}</span></div></td>"
-    table_footer += f"<td class='center'>{total_alerts_p2}</td><td class='center'>{total_alerts_p1}</td><td class='center'>{total_num_cases}</td></tr></tfoot>"
+    posicoes = detailed_df.groupby(COL_ASSIGNMENT_GROUP, sort=False).indices
+    problemas = formatacao_html.escapar_serie(
+        detailed_df[COL_SHORT_DESCRIPTION]
+    ).to_numpy()
+    recursos = formatacao_html.escapar_serie(detailed_df[COL_CMDB_CI]).to_numpy()
+    nomes = formatacao_html.escapar_serie(summary_df.index.to_series()).to_numpy()
+    alertas_p2 = detailed_df[COL_ALERT_COUNT_P2].fillna(0).astype(int).to_numpy()
+    alertas_p1 = detailed_df[COL_ALERT_COUNT_P1].fillna(0).astype(int).to_numpy()
+    sem_casos = np.array([], dtype=int)
+
+    def linhas():
+        for nome, nome_html, num_casos, p1, p2, variacao in zip(
+            summary_df.index,
+            nomes,
+            summary_df["num_cases"],
+            summary_df["alerts_p1"],
+            summary_df["alerts_p2"],
+            summary_df["change"],
+        ):
+            pos = posicoes.get(nome, sem_casos)
+            yield {
+                "nome": nome_html,
+                "details_id": f"details-{sanitize_for_id(nome)}",
+                "num_casos": num_casos,
+                "alertas_p1": p1,
+                "alertas_p2": p2,
+                "variacao": variacao,
+                "casos": zip(
+                    problemas[pos], recursos[pos], alertas_p2[pos], alertas_p1[pos]
+                ),
+            }
 
-    table_header = f"<thead><tr><th style='width: 35%;'>Squad</th><th style='width: 25%;'>Variação de Alertas</th><th class='center'>Alertas ({escape(label_p2)})</th><th class='center'>Alertas ({escape(label_p1)})</th><th class='center'>Nº de Casos Persistentes</th></tr></thead>"
-    return f"<table>{table_header}{table_body}{table_footer}</table>"
+    return {
+        "linhas": linhas(),
+        "max_abs": summary_df["abs_change"].max(),
+        "total_casos": summary_df["num_cases"].sum(),
+        "total_p1": summary_df["alerts_p1"].sum(),
+        "total_p2": summary_df["alerts_p2"].sum(),
+        "total_variacao": summary_df["change"].sum(),
+    }
 
 
-def generate_trend_table_html(df_merged, label_p1, label_p2):
-    """Gera uma tabela de tendência genérica para diferentes categorias."""
+def _preparar_tabela_tendencia(df_merged):
+    """Prepara os dados de uma tabela de tendência genérica (por categoria)."""
     if df_merged.empty:
-        return "<p>Nenhuma mudança registrada nesta categoria.</p>"
+        return None
 
     df_merged["change"] = df_merged["count_p2"] - df_merged["count_p1"]
     df_merged["abs_change"] = df_merged["change"].abs()
@@ -614,16 +565,10 @@ def generate_trend_table_html(df_merged, label_p1, label_p2):
         sort_columns.append("num_cases")
 
     df_sorted = df_merged.sort_values(by=sort_columns, ascending=[False, False, False])
-    max_abs_change = df_sorted["abs_change"].max() if not df_sorted.empty else 1
 
-    total_p1, total_p2, total_change = (
-        df_sorted["count_p1"].sum(),
-        df_sorted["count_p2"].sum(),
-        df_sorted["change"].sum(),
-    )
-    total_cases = df_sorted["num_cases"].sum() if has_case_count else 0
-
-    table_header = f"<thead><tr><th>Item</th><th style='width: 35%;'>Variação de Alertas</th><th class='center'>Alertas ({escape(label_p2)})</th><th class='center'>Alertas ({escape(label_p1)})</th>"
+    total_p1 = int(df_sorted["count_p1"].sum())
+    total_p2 = int(df_sorted["count_p2"].sum())
+    case_col_name = None
     if has_case_count:
         case_col_name = (
             "Nº de Casos (Novos)"
@@ -634,33 +579,27 @@ def generate_trend_table_html(df_merged, label_p1, label_p2):
                 else "Nº de Casos"
             )
         )
-        table_header += f"<th class='center'>{case_col_name}</th>"
-    table_header += "</tr></thead>"
-
-    table_body = "<tbody>"
-    for name, row in df_sorted.iterrows():
-        p1_count, p2_count, change = row["count_p1"], row["count_p2"], row["change"]
-        table_body += f"<tr><td>{escape(str(name))}</td><td>{_generate_change_bar_html(change, max_abs_change)}</td><td class='center'>{int(p2_count)}</td><td class='center'>{int(p1_count)}</td>"
-        if has_case_count:
-            table_body += f'<td class="center" style="font-weight: bold;">{int(row["num_cases"])}</td>'
-        table_body += "</tr>"
-    table_body += "</tbody>"
-
-    total_change_sign = "+" if total_change > 0 else ""
-    total_change_color = (
-        CSS_COLOR_DANGER
-        if total_change > 0
-        else (CSS_COLOR_SUCCESS if total_change < 0 else "var(--text-secondary-color)")
-    )
-
-    table_footer = "<tfoot><tr><td>Total</td>"
-    table_footer += f"<td><div class='change-bar-container'><span class='change-value' style='color: {total_change_color}; width: 100%; text-align: right;'>{total_change_sign}{int(total_change)}</span></div></td>"
-    table_footer += f"<td class='center'>{int(total_p2)}</td><td class='center'>{int(total_p1)}</td>"
-    if has_case_count:
-        table_footer += f"<td class='center'>{int(total_cases)}</td>"
-    table_footer += "</tr></tfoot>"
+        num_casos = df_sorted["num_cases"].astype(int)
+    else:
+        num_casos = [None] * len(df_sorted)
 
-    return f"<table>{table_header}{table_body}{table_footer}</table>"
+    return {
+        "linhas": list(
+            zip(
+                formatacao_html.escapar_serie(df_sorted.index.to_series()),
+                df_sorted["count_p1"].astype(int),
+                df_sorted["count_p2"].astype(int),
+                df_sorted["change"],
+                num_casos,
+            )
+        ),
+        "max_abs": df_sorted["abs_change"].max(),
+        "total_p1": total_p1,
+        "total_p2": total_p2,
+        "total_variacao": int(df_sorted["change"].sum()),
+        "total_casos": int(df_sorted["num_cases"].sum()) if has_case_count else 0,
+        "coluna_casos": case_col_name,
+    }
 
 
 def gerar_analise_comparativa(
@@ -675,10 +614,26 @@ def gerar_analise_comparativa(
     frontend_url: str = "/",
     run_folder: str = None,
     base_url: str = "",
+    resumo_anterior: pd.DataFrame = None,
+    resumo_recente: pd.DataFrame = None,
 ):
-    """Função principal para gerar o relatório de tendência."""
-    df_p1 = load_summary_from_json(json_anterior)
-    df_p2 = load_summary_from_json(json_recente)
+    """
+    Função principal para gerar o relatório de tendência.
+
+    Os resumos são lidos de `json_anterior`/`json_recente`, a menos que já
+    venham em memória (`resumo_anterior`/`resumo_recente`), como nas
+    comparações diretas, que não gravam o resumo em disco.
+    """
+    df_p1 = (
+        resumo_anterior
+        if resumo_anterior is not None
+        else load_summary_from_json(json_anterior)
+    )
+    df_p2 = (
+        resumo_recente
+        if resumo_recente is not None
+        else load_summary_from_json(json_recente)
+    )
 
     if df_p1 is None or df_p2 is None:
         logger.error(
@@ -697,59 +652,6 @@ def gerar_analise_comparativa(
     trend_data = prepare_trend_dataframes(merged_df, df_p1_atuacao, df_p2_atuacao)
 
     # 3. Monta o relatório HTML
-    title = "📊 Análise Comparativa de Alertas"
-
-    if is_direct_comparison:
-        back_link = f'<a href="{frontend_url}" class="home-button">Página Inicial</a>'
-    else:
-        back_link = '<a href="resumo_geral.html" class="back-to-dashboard">&larr; Voltar para o Dashboard</a>'
-
-    periodo_anterior_text = (
-        f"<code>{escape(os.path.basename(csv_anterior_name))}</code>"
-        + (
-            f" <span style='color: var(--text-secondary-color);'>({escape(date_range_anterior)})</span>"
-            if date_range_anterior
-            else ""
-        )
-    )
-    periodo_recente_text = (
-        f"<code>{escape(os.path.basename(csv_recente_name))}</code>"
-        + (
-            f" <span style='color: var(--text-secondary-color);'>({escape(date_range_recente)})</span>"
-            if date_range_recente
-            else ""
-        )
-    )
-
-    body = f"""
-    <div class="report-header">
-        {back_link}
-    </div>
-    <style>
-        .highlight {{ padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 5px solid; }}
-        .highlight-success {{ background-color: rgba(28, 200, 138, 0.1); border-left-color: var(--success-color); }}
-        .highlight-danger {{ background-color: rgba(231, 74, 59, 0.1); border-left-color: var(--danger-color); }}
-        .highlight-warning {{ background-color: rgba(246, 194, 62, 0.1); border-left-color: var(--warning-color); }}
-        .highlight-info {{ background-color: rgba(23, 162, 184, 0.1); border-left-color: var(--info-color); }}
-        .highlight-neutral {{ background-color: rgba(108, 117, 125, 0.1); border-left-color: var(--text-secondary-color); }}
-        /* CORREÇÃO: Reintroduz o CSS para as linhas expansíveis da tabela. */
-        .expandable-row .chevron {{ transition: transform 0.2s ease-in-out; }}
-        .expandable-row.open .chevron {{ transform: rotate(90deg); }}
-        .details-row {{ display: none; }}
-        .details-row.open {{ display: table-row; }}
-        .details-row-content {{
-            background-color: rgba(0,0,0,0.15);
-            padding: 20px;
-        }}
-        .expandable-row:hover {{
-            background-color: #3c4062;
-        }}
-    </style>
-    <h1>Análise Comparativa de Períodos</h1>
-    <p class="lead" style="font-size: 1.2em; color: var(--text-secondary-color); margin-top: -15px;">Foco nos Casos onde a remediação falhou ou não existe. </p>
-    """
-    body += f"<div class='definition-box' style='margin-top: 30px;'><strong>Período Anterior:</strong> {periodo_anterior_text}<br><strong>Período Recente:</strong> {periodo_recente_text}</div>"
-
     executive_summary_html = generate_executive_summary_html(
         kpis,
         trend_data["persistent_squads_summary"],
@@ -758,154 +660,48 @@ def gerar_analise_comparativa(
         run_folder=run_folder,
         base_url=base_url,
     )
-    body += executive_summary_html
-
-    body += f"<div class='card'>{generate_kpis_html(kpis)}</div>"
-
-    chevron_svg_collapsible = '<svg width="18" height="18" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round" class="chevron"><polyline points="9 18 15 12 9 6"></polyline></svg>'
-
-    body += f'<button id="foco-atuacao" type="button" class="collapsible active"><span>🔥 Foco de Atuação e Novos Riscos</span>{chevron_svg_collapsible}</button><div class="collapsible-content"><div class="tab-container"><div class="tab-links">'
-    body += '<button class="tab-link active" data-target="tab-persistentes">🚨 Casos Persistentes por Squad</button><button class="tab-link" data-target="tab-novos-problemas">⚠️ Novos Problemas</button></div>'
-    body += '<div id="tab-persistentes" class="tab-content active"><div class="definition-box">Casos que já precisavam de ação no período anterior e continuam precisando. <strong>Clique em uma linha da tabela para ver os detalhes.</strong></div>'
-    body += (
-        generate_persistent_cases_table_html(
-            trend_data["persistent_squads_summary"],  # noqa: E501
-            trend_data["persistent_cases"],
-            "Anterior",
-            "Recente",
-        )
-        + "</div>"
-    )
-    body += '<div id="tab-novos-problemas" class="tab-content"><div class="definition-box">Problemas que não precisavam de ação no período anterior, mas que surgiram no período recente já necessitando de uma.</div>'
-    body += (
-        generate_trend_table_html(
-            trend_data["new_problems_summary"].set_index(COL_SHORT_DESCRIPTION),
-            "Anterior",
-            "Recente",
-        )
-        + "</div></div></div>"
-    )
-
-    body += f'<button type="button" class="collapsible"><span>📈 Tendências Gerais por Categoria</span>{chevron_svg_collapsible}</button><div class="collapsible-content"><div class="tab-container"><div class="tab-links">'
-    body += '<button class="tab-link active" data-target="tab-variacao-squad">📈 Variação de Alertas por Squad</button><button class="tab-link" data-target="tab-variacao-problema">📊 Variação por Tipo de Problema</button></div>'
-    body += '<div id="tab-variacao-squad" class="tab-content active"><div class="definition-box">Visão geral da variação no volume de alertas por squad, considerando todos os Casos que necessitam de ação.</div>'
-    body += (
-        generate_trend_table_html(
-            trend_data["squad_trends"].set_index(COL_ASSIGNMENT_GROUP),
-            "Anterior",
-            "Recente",
-        )
-        + "</div>"
-    )
-    body += '<div id="tab-variacao-problema" class="tab-content"><div class="definition-box">Variação no volume de alertas para os tipos de problema que persistiram entre os dois períodos.</div>'
-    body += (
-        generate_trend_table_html(
-            trend_data["varying_problems_summary"].set_index(COL_SHORT_DESCRIPTION),
-            "Anterior",
-            "Recente",
-        )
-        + "</div></div></div>"
-    )
-
-    body += f'<button type="button" class="collapsible"><span>✅ Vitórias</span>{chevron_svg_collapsible}</button><div class="collapsible-content"><div class="tab-container"><div class="tab-links">'
-    body += '<button class="tab-link active" data-target="tab-resolvidos">✅ Problemas Resolvidos</button></div>'
-    body += '<div id="tab-resolvidos" class="tab-content active"><div class="definition-box">Casos que necessitavam de ação no período anterior e que foram resolvidos, não precisando mais de atuação.</div>'
-    body += (
-        generate_trend_table_html(
-            trend_data["resolved_problems_summary"].set_index(COL_SHORT_DESCRIPTION),
-            "Anterior",
-            "Recente",
-        )
-        + "</div></div></div>"
-    )
-
-    # CORREÇÃO: Reintroduz o script JavaScript para a funcionalidade dos botões "collapsible".
-    # Este script foi removido acidentalmente e é essencial para expandir/recolher as seções.
-    body += """
-    <script>
-        document.addEventListener("DOMContentLoaded", function() {
-            function updateParentHeights(element, visited = new Set()) {
-                if (!element) return;
-                let parentContent = element.closest('.collapsible-content');
-                if (parentContent && !visited.has(parentContent) && parentContent.style.maxHeight && parentContent.style.maxHeight !== '0px') {
-                    visited.add(parentContent);
-                    parentContent.style.maxHeight = parentContent.scrollHeight + 50 + 'px';
-                    updateParentHeights(parentContent, visited);
-                }
-            }
-
-            document.querySelectorAll(".collapsible").forEach(button => {
-                button.addEventListener("click", function() {
-                    this.classList.toggle("active");
-                    const content = this.nextElementSibling;
-                    if (content.style.maxHeight && content.style.maxHeight !== '0px') {
-                        content.style.maxHeight = null;
-                    } else {
-                        content.style.maxHeight = content.scrollHeight + 50 + "px";
-                    }
-                    updateParentHeights(content);
-                });
-            });
-
-            setTimeout(() => {
-                document.querySelectorAll('.collapsible.active').forEach(button => {
-                    const content = button.nextElementSibling;
-                    if (content) {
-                        content.style.maxHeight = content.scrollHeight + 50 + "px";
-                        updateParentHeights(content);
-                    }
-                });
-            }, 150);
-
-            // CORREÇÃO: Reintroduz a lógica para a funcionalidade das abas.
-            document.querySelectorAll('.tab-container').forEach(container => {
-                const tabLinks = container.querySelectorAll('.tab-link');
-                const tabContents = container.querySelectorAll('.tab-content');
-                tabLinks.forEach(link => {
-                    link.addEventListener('click', (event) => {
-                        const targetId = link.dataset.target;
-                        if (link.classList.contains('active')) return;
-                        tabLinks.forEach(l => l.classList.remove('active'));
-                        tabContents.forEach(c => c.classList.remove('active'));
-                        link.classList.add('active');
-                        const targetContent = container.querySelector('#' + targetId);
-                        if(targetContent) { targetContent.classList.add('active'); }
-                        updateParentHeights(targetContent || link);
-                    });
-                });
-            });
-
-            // CORREÇÃO: Reintroduz a lógica para as linhas expansíveis da tabela de Casos Persistentes.
-            document.querySelectorAll('.expandable-row').forEach(row => {
-                row.addEventListener('click', () => {
-                    const targetId = row.dataset.target;
-                    const detailsRow = document.getElementById(targetId);
-                    if (detailsRow) {
-                        row.classList.toggle('open');
-                        detailsRow.classList.toggle('open');
-                        // Atualiza a altura do contêiner pai se estiver dentro de um 'collapsible'
-                        const parentContent = row.closest('.collapsible-content');
-                        if (parentContent && parentContent.style.maxHeight) {
-                            parentContent.style.maxHeight = parentContent.scrollHeight + "px";
-                        }
-                    }
-                });
-            });
-        });
-    </script>"""
 
     try:
-        script_dir = os.path.dirname(__file__)
-        template_path = os.path.abspath(
-            os.path.join(script_dir, "..", "templates", "tendencia_template.html")
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        gerador_html.renderizar_template_em_arquivo(
+            "tendencia_template.html",
+            output_path,
+            title="📊 Análise Comparativa de Alertas",
+            is_direct_comparison=is_direct_comparison,
+            frontend_url=frontend_url,
+            periodo_anterior={
+                "arquivo": os.path.basename(csv_anterior_name),
+                "intervalo": date_range_anterior,
+            },
+            periodo_recente={
+                "arquivo": os.path.basename(csv_recente_name),
+                "intervalo": date_range_recente,
+            },
+            resumo_executivo=executive_summary_html,
+            kpis=kpis,
+            persistentes=_preparar_tabela_persistentes(
+                trend_data["persistent_squads_summary"],
+                trend_data["persistent_cases"],
+            ),
+            tendencias={
+                "novos": _preparar_tabela_tendencia(
+                    trend_data["new_problems_summary"].set_index(COL_SHORT_DESCRIPTION)
+                ),
+                "squads": _preparar_tabela_tendencia(
+                    trend_data["squad_trends"].set_index(COL_ASSIGNMENT_GROUP)
+                ),
+                "problemas": _preparar_tabela_tendencia(
+                    trend_data["varying_problems_summary"].set_index(
+                        COL_SHORT_DESCRIPTION
+                    )
+                ),
+                "resolvidos": _preparar_tabela_tendencia(
+                    trend_data["resolved_problems_summary"].set_index(
+                        COL_SHORT_DESCRIPTION
+                    )
+                ),
+            },
         )
-        with open(template_path, "r", encoding="utf-8") as f:
-            template = Template(f.read())
-        final_report = template.substitute(title=title, body=body)
-
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(final_report)
         logger.info(f"Relatório de tendência gerado em: {output_path}")
         return kpis, executive_summary_html
 
@@ -3,6 +3,7 @@ import time
 from datetime import datetime, timedelta, timezone
 from functools import wraps
 
+import click
 import jwt
 import requests
 from flasgger import Swagger
@@ -11,7 +12,7 @@ from flask import (
     abort,
     jsonify,
     request,
-    send_from_directory,
+    send_file,
     url_for,
 )
 from flask_cors import CORS
@@ -29,7 +30,16 @@ def create_app(test_config=None):
     """
     Application Factory: Cria e configura a instância da aplicação Flask.
     """
-    from . import models, services
+    from . import (
+        cache_resumos,
+        compressao_artefatos,
+        gerador_html,
+        gerador_paginas,
+        models,
+        renderizacao_sob_demanda,
+        services,
+        tabelas_relatorio,
+    )
 
     # SIMPLIFICAÇÃO: O argumento 'template_folder' foi removido, pois os templates
     # são carregados diretamente pelos módulos, não pelo motor de renderização do Flask.
@@ -198,6 +208,7 @@ def create_app(test_config=None):
             "status": "alive",
             "version": app.config.get("APP_VERSION", "dev"),
             "timestamp": datetime.now(timezone.utc).isoformat(),
+            "summary_cache": cache_resumos.CACHE.estatisticas(),
         }
         return jsonify(payload), 200
 
@@ -397,7 +408,118 @@ def create_app(test_config=None):
         except Exception as e:
             return jsonify({"error": f"Erro inesperado: {str(e)}"}), 500
 
-    def secure_send_from_directory(base_directory, path):
+    @app.route("/api/v1/compare/multi", methods=["POST"])
+    @token_required
+    def compare_multi_files_api():
+        """
+        Compara de três a seis arquivos CSV em um único relatório.
+        Os Casos de todos os períodos são casados de uma só vez; a resposta traz
+        o balanço por período, a variação por squad e, por Caso, o mapa de
+        presença (bit i = i-ésimo período, em ordem cronológica) e as
+        sequências de persistência.
+        ---
+        tags:
+          - Analysis
+        security:
+          - Bearer: []
+        consumes:
+          - multipart/form-data
+        parameters:
+          - name: files
+            in: formData
+            type: array
+            items:
+              type: file
+            collectionFormat: multi
+            required: true
+            description: De 3 a 6 arquivos CSV, em qualquer ordem.
+        responses:
+          200:
+            description: Comparação concluída com sucesso.
+          400:
+            description: Número de arquivos inválido ou datas ausentes.
+        """
+        files = [f for f in request.files.getlist("files") if f.filename]
+        try:
+            result = services.process_multi_comparison(
+                files=files,
+                upload_folder=app.config["UPLOAD_FOLDER"],
+                reports_folder=app.config["REPORTS_FOLDER"],
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            return jsonify({"error": f"Erro inesperado: {str(e)}"}), 500
+        report_url = url_for(
+            "serve_report",
+            run_folder=result["run_folder"],
+            filename=result["report_filename"],
+        )
+        return jsonify(
+            {"success": True, "report_url": report_url, **result["comparison"]}
+        )
+
+    @app.route("/api/v1/compare/reports", methods=["POST"])
+    @token_required
+    def compare_reports_api():
+        """
+        Compara dois relatórios já processados, sem reenviar os CSVs.
+        A comparação é montada a partir dos resumos persistidos e fica em cache
+        por par de relatórios.
+        ---
+        tags:
+          - Analysis
+        security:
+          - Bearer: []
+        parameters:
+          - name: body
+            in: body
+            required: true
+            schema:
+              type: object
+              required: [report_id_a, report_id_b]
+              properties:
+                report_id_a:
+                  type: integer
+                report_id_b:
+                  type: integer
+        responses:
+          200:
+            description: Comparação gerada ou reaproveitada do cache.
+          400:
+            description: IDs ausentes, não inteiros ou iguais.
+          404:
+            description: Relatório ou resumo não encontrado.
+        """
+        payload = request.get_json(silent=True) or {}
+        report_ids = [payload.get("report_id_a"), payload.get("report_id_b")]
+        # `bool` é subclasse de `int`: `true` no JSON não é um ID.
+        if not all(type(report_id) is int for report_id in report_ids):
+            return (
+                jsonify({"error": "'report_id_a' e 'report_id_b' são obrigatórios."}),
+                400,
+            )
+        try:
+            result = services.process_report_comparison(
+                *report_ids,
+                db=db,
+                report_model=models.Report,
+                reports_folder=app.config["REPORTS_FOLDER"],
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if result is None:
+            return jsonify({"error": "Relatório ou resumo não encontrado."}), 404
+        report_url = url_for(
+            "serve_report",
+            run_folder=result["run_folder"],
+            filename=result["report_filename"],
+        )
+        return jsonify(
+            {"success": True, "report_url": report_url, "cached": result["cached"]}
+        )
+
+    def secure_send_from_directory(base_directory, path, render_on_demand=False):
         normalized_relative = os.path.normpath(path)
         if normalized_relative.startswith(".."):
             abort(404)
@@ -414,24 +536,69 @@ def create_app(test_config=None):
         )
         if not requested_path.startswith(os.path.abspath(base_directory)):
             abort(404)
-        if not os.path.exists(requested_path):
-            abort(404)
-        return send_from_directory(base_directory, normalized_relative)
+        if not os.path.isfile(requested_path):
+            if not (render_on_demand and run_folder and len(path_parts) > 1):
+                abort(404)
+            # Relatórios gerados no modo sob demanda: renderiza a página na
+            # primeira requisição e serve a versão armazenada em disco.
+            rendered_path = renderizacao_sob_demanda.obter_pagina(
+                os.path.join(base_directory, run_folder),
+                os.path.join(*path_parts[1:]),
+            )
+            if rendered_path is None:
+                abort(404)
+            return compressao_artefatos.enviar_arquivo(rendered_path)
+        # HTML/CSV/JSON seguem comprimidos (gzip/br) quando o cliente aceita.
+        return compressao_artefatos.enviar_arquivo(requested_path)
 
     @app.route("/reports/<run_folder>/planos_de_acao/<filename>")
     def serve_planos(run_folder, filename):
         safe_path = os.path.join(run_folder, "planos_de_acao", filename)
-        return secure_send_from_directory(app.config["REPORTS_FOLDER"], safe_path)
+        return secure_send_from_directory(
+            app.config["REPORTS_FOLDER"], safe_path, render_on_demand=True
+        )
 
     @app.route("/reports/<run_folder>/detalhes/<filename>")
     def serve_detalhes(run_folder, filename):
         safe_path = os.path.join(run_folder, "detalhes", filename)
-        return secure_send_from_directory(app.config["REPORTS_FOLDER"], safe_path)
+        return secure_send_from_directory(
+            app.config["REPORTS_FOLDER"], safe_path, render_on_demand=True
+        )
+
+    @app.route(f"/reports/{gerador_html.ASSETS_URL_DIR}/<filename>")
+    def serve_report_asset(filename):
+        # CSS/JS compartilhados pelas páginas geradas. O nome traz o hash do
+        # conteúdo, então a resposta pode ser cacheada indefinidamente.
+        asset = gerador_html.resolver_asset(filename)
+        if asset is None:
+            abort(404)
+        asset_path, hash_confere = asset
+        response = send_file(asset_path, conditional=True)
+        if hash_confere:
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            # Página gerada com uma versão anterior do asset: serve a atual sem cache.
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    @app.route(f"/reports/<run_folder>/{gerador_paginas.FILENAME_JSON_VIEWER}")
+    def serve_json_viewer(run_folder):
+        # O visualizador não embute o JSON: é o mesmo HTML para todas as
+        # execuções e carrega os Casos pela API de leitura por faixas.
+        if run_folder.startswith(".") or not services.ensure_run_folder_available(
+            run_folder, app.config["REPORTS_FOLDER"]
+        ):
+            abort(404)
+        return gerador_html.renderizar_visualizador_json(
+            tabelas_relatorio.REGISTROS_POR_PAGINA_PADRAO
+        )
 
     @app.route("/reports/<run_folder>/<path:filename>")
     def serve_report(run_folder, filename):
         safe_path = os.path.join(run_folder, filename)
-        return secure_send_from_directory(app.config["REPORTS_FOLDER"], safe_path)
+        return secure_send_from_directory(
+            app.config["REPORTS_FOLDER"], safe_path, render_on_demand=True
+        )
 
     @app.route("/docs/<path:filename>")
     def serve_docs(filename):
@@ -460,6 +627,264 @@ def create_app(test_config=None):
             )
         return jsonify(reports_data)
 
+    @app.route("/api/v1/trends/series")
+    def get_trend_series():
+        """
+        Retorna a série temporal de tendência sobre todos os relatórios retidos.
+        Para cada período: total de Casos que exigem atuação, novos, resolvidos e
+        persistentes em relação ao período anterior, alertas e idade média dos
+        Casos; além da trajetória de cada squad e da idade dos Casos atuais.
+        ---
+        tags:
+          - Dashboard
+        parameters:
+          - name: agrupamento
+            in: query
+            type: string
+            enum: [execucao, semana, mes]
+            default: execucao
+        responses:
+          200:
+            description: Série temporal retornada com sucesso.
+          400:
+            description: Agrupamento inválido.
+        """
+        try:
+            serie = services.get_trend_series(
+                models.Report,
+                app.config["REPORTS_FOLDER"],
+                request.args.get("agrupamento", "execucao"),
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(serie)
+
+    @app.route("/api/v1/cases/membership")
+    def get_case_membership():
+        """
+        Consulta de conjunto sobre os Casos de atuação de vários relatórios.
+        Responde pelos mapas de bits do índice de Casos, sem carregar resumos:
+        persistentes (em todos), novos (só no mais recente), resolvidos (no mais
+        antigo e não no mais recente) ou qualquer (em ao menos um), além de
+        quantos Casos estão presentes em cada um dos k relatórios mais recentes.
+        ---
+        tags:
+          - Dashboard
+        parameters:
+          - name: operacao
+            in: query
+            type: string
+            enum: [persistentes, novos, resolvidos, qualquer]
+            default: persistentes
+          - name: report_ids
+            in: query
+            type: string
+            description: IDs dos relatórios separados por vírgula (padrão, todos).
+          - name: ultimas
+            in: query
+            type: integer
+            description: Considera apenas os N relatórios mais recentes da seleção.
+          - name: limite
+            in: query
+            type: integer
+            default: 100
+            description: Número máximo de chaves de Casos devolvidas.
+        responses:
+          200:
+            description: Resultado da consulta.
+          400:
+            description: Operação ou seleção de relatórios inválida.
+          404:
+            description: Relatório ou Casos não encontrados.
+        """
+        report_ids = request.args.get("report_ids")
+        try:
+            result = services.query_case_membership(
+                models.Report,
+                app.config["REPORTS_FOLDER"],
+                request.args.get("operacao", "persistentes"),
+                report_ids=(
+                    [int(report_id) for report_id in report_ids.split(",")]
+                    if report_ids
+                    else None
+                ),
+                ultimas=request.args.get("ultimas", type=int),
+                limite=max(0, request.args.get("limite", 100, type=int)),
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if result is None:
+            return jsonify({"error": "Relatório ou Casos não encontrados."}), 404
+        return jsonify(result)
+
+    @app.route("/api/v1/reports/<run_folder>/tabelas/<path:tabela>")
+    def get_report_table_page(run_folder, tabela):
+        """
+        Retorna uma página das linhas de uma tabela (CSV) de um relatório.
+        ---
+        tags:
+          - Reports
+        parameters:
+          - name: run_folder
+            in: path
+            type: string
+            required: true
+          - name: tabela
+            in: path
+            type: string
+            required: true
+            description: CSV relativo à execução (ex. atuar.csv, planos_de_acao/plano-de-acao-X.csv).
+          - name: pagina
+            in: query
+            type: integer
+            default: 1
+          - name: tamanho_pagina
+            in: query
+            type: integer
+            default: 100
+          - name: ordenar_por
+            in: query
+            type: string
+          - name: ordem
+            in: query
+            type: string
+            enum: [asc, desc]
+          - name: busca
+            in: query
+            type: string
+            description: Texto procurado em qualquer coluna.
+          - name: filtro.<coluna>
+            in: query
+            type: string
+            description: Texto procurado em uma coluna específica.
+        responses:
+          200:
+            description: Página da tabela retornada com sucesso.
+          400:
+            description: Parâmetros inválidos.
+          404:
+            description: Relatório ou tabela não encontrados.
+        """
+        reports_folder = app.config["REPORTS_FOLDER"]
+        if run_folder.startswith(".") or not services.ensure_run_folder_available(
+            run_folder, reports_folder
+        ):
+            abort(404)
+        filtros = {
+            chave.removeprefix("filtro."): valor
+            for chave, valor in request.args.items()
+            if chave.startswith("filtro.") and valor
+        }
+        try:
+            tabela_colunar = tabelas_relatorio.carregar_tabela(
+                os.path.join(reports_folder, run_folder), tabela
+            )
+            resultado = tabelas_relatorio.consultar_tabela(
+                tabela_colunar,
+                pagina=request.args.get("pagina", 1, type=int),
+                tamanho_pagina=request.args.get(
+                    "tamanho_pagina", tabelas_relatorio.TAMANHO_PAGINA_PADRAO, type=int
+                ),
+                ordenar_por=request.args.get("ordenar_por") or None,
+                ordem=request.args.get("ordem", "asc"),
+                busca=request.args.get("busca") or None,
+                filtros=filtros,
+            )
+        except FileNotFoundError:
+            abort(404)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(resultado)
+
+    @app.route("/api/v1/reports/<run_folder>/resumo")
+    def get_report_summary_records(run_folder):
+        """
+        Retorna uma faixa dos Casos do resumo JSON de um relatório.
+        ---
+        tags:
+          - Reports
+        parameters:
+          - name: run_folder
+            in: path
+            type: string
+            required: true
+          - name: inicio
+            in: query
+            type: integer
+            default: 0
+          - name: quantidade
+            in: query
+            type: integer
+            default: 100
+        responses:
+          200:
+            description: Faixa de Casos retornada com sucesso.
+          404:
+            description: Relatório não encontrado.
+          422:
+            description: O resumo não está no formato de array de registros.
+        """
+        reports_folder = app.config["REPORTS_FOLDER"]
+        if run_folder.startswith(".") or not services.ensure_run_folder_available(
+            run_folder, reports_folder
+        ):
+            abort(404)
+        try:
+            conteudo = tabelas_relatorio.ler_registros_resumo(
+                os.path.join(reports_folder, run_folder),
+                inicio=request.args.get("inicio", 0, type=int),
+                quantidade=request.args.get(
+                    "quantidade",
+                    tabelas_relatorio.REGISTROS_POR_PAGINA_PADRAO,
+                    type=int,
+                ),
+            )
+        except FileNotFoundError:
+            abort(404)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 422
+        return app.response_class(conteudo, mimetype="application/json")
+
+    @app.route("/api/v1/reports/<run_folder>/modelo")
+    def get_report_view_model(run_folder):
+        """
+        Retorna o modelo de visualização (JSON) de um relatório.
+        Contém os KPIs, as listas de destaque e os Casos por trás do dashboard e
+        das páginas de squad e de detalhe, para a SPA montar essas visões.
+        ---
+        tags:
+          - Reports
+        parameters:
+          - name: run_folder
+            in: path
+            type: string
+            required: true
+        responses:
+          200:
+            description: Modelo de visualização retornado com sucesso.
+          304:
+            description: O modelo em cache no navegador continua válido.
+          404:
+            description: Relatório não encontrado ou gerado sem modelo de visualização.
+        """
+        reports_folder = app.config["REPORTS_FOLDER"]
+        if run_folder.startswith(".") or not services.ensure_run_folder_available(
+            run_folder, reports_folder
+        ):
+            abort(404)
+        caminho = os.path.join(
+            reports_folder, run_folder, gerador_paginas.FILENAME_VIEW_MODEL
+        )
+        if not os.path.isfile(caminho):
+            abort(404)
+        # O modelo de uma execução não muda: o navegador o mantém em cache e
+        # apenas revalida pelo ETag.
+        response = compressao_artefatos.enviar_arquivo(
+            caminho, mimetype="application/json"
+        )
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
     @app.route("/api/v1/reports/<int:report_id>", methods=["DELETE"])
     @token_required
     def delete_report_api(report_id):
@@ -813,4 +1238,53 @@ def create_app(test_config=None):
             app.logger.error(f"Feedback submission error: {str(e)}")
             return jsonify({"error": "Erro interno do servidor."}), 500
 
+    # --- COMANDOS DE LINHA DE COMANDO ---
+
+    @app.cli.command("backfill-tendencias")
+    @click.option(
+        "--dry-run", is_flag=True, help="Apenas lista os pares que seriam gerados."
+    )
+    @click.option("--resume", is_flag=True, help="Retoma um backfill interrompido.")
+    @click.option(
+        "--workers",
+        type=click.IntRange(min=1),
+        default=None,
+        help="Número de processos (padrão: BACKFILL_WORKERS).",
+    )
+    def backfill_tendencias_command(dry_run, resume, workers):
+        """Regenera as análises de tendência de todo o histórico retido."""
+        result = services.backfill_trend_history(
+            db,
+            models.Report,
+            models.TrendAnalysis,
+            app.config["REPORTS_FOLDER"],
+            workers=workers,
+            dry_run=dry_run,
+            resume=resume,
+        )
+        if result["fora_de_ordem"]:
+            click.echo(
+                "Pares pulados, o período recente não começa depois do anterior: "
+                + ", ".join(f"{a} -> {b}" for a, b in result["fora_de_ordem"])
+            )
+        if dry_run:
+            for previous_id, current_id in result["pares"]:
+                click.echo(f"Relatório {previous_id} -> {current_id}")
+            click.echo(
+                f"{len(result['pares'])} tendência(s) a gerar, "
+                f"{result['pulados']} pulada(s)."
+            )
+            return
+        click.echo(
+            f"{result['gerados']} tendência(s) gerada(s), "
+            f"{result['pulados']} pulada(s), "
+            f"{len(result['falhas'])} falha(s)."
+        )
+        if result["falhas"]:
+            raise click.ClickException(
+                "Pares não gerados: "
+                + ", ".join(f"{a} -> {b}" for a, b in result["falhas"])
+                + ". Use --resume para tentar novamente."
+            )
+
     return app
@@ -0,0 +1,170 @@
+"""
+Cache LRU, por processo, dos resumos de execução já processados.
+
+O dashboard, o upload e a análise de tendência leem e processam repetidamente os
+mesmos `resumo_problemas.json`. Este cache guarda, por arquivo, o DataFrame do
+resumo e os KPIs derivados dele, válidos enquanto o arquivo tiver o mesmo
+`(mtime, tamanho)`: um resumo regravado é lido de novo na consulta seguinte.
+
+O cache respeita um orçamento de memória (`SUMMARY_CACHE_MAX_MB`), descartando
+os resumos usados há mais tempo, e conta acertos, falhas, descartes e
+invalidações. A exclusão de um relatório (manual ou pela política de retenção)
+invalida explicitamente os resumos da sua pasta.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_CACHE_MAX_MB = int(os.getenv("SUMMARY_CACHE_MAX_MB", "256"))
+# Tamanho estimado de um dicionário de KPIs (poucos escalares).
+TAMANHO_KPIS = 2048
+
+
+class _Entrada:
+    """Resumo em cache de um arquivo, com a versão do arquivo que o originou."""
+
+    __slots__ = ("kpis", "resumo", "tamanho", "versao")
+
+    def __init__(self, versao: tuple[int, int]):
+        self.versao = versao
+        self.resumo = None
+        self.kpis = None
+        self.tamanho = 0
+
+
+class CacheResumos:
+    """Cache LRU de resumos (DataFrame e KPIs) com orçamento de memória em bytes."""
+
+    __slots__ = (
+        "_bytes",
+        "_entradas",
+        "_lock",
+        "acertos",
+        "descartes",
+        "falhas",
+        "invalidacoes",
+        "limite_bytes",
+    )
+
+    def __init__(self, limite_bytes: int):
+        self.limite_bytes = limite_bytes
+        self._entradas: OrderedDict[str, _Entrada] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+        self.invalidacoes = 0
+
+    @staticmethod
+    def _versao(caminho: str) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(caminho)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _obter(self, caminho: str, campo: str, carregar: Callable, tamanho: Callable):
+        chave = os.path.abspath(caminho)
+        versao = self._versao(chave)
+        if versao is None:
+            # Arquivo ausente: o carregador trata (e registra) o erro.
+            return carregar(caminho)
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada.versao == versao:
+                valor = getattr(entrada, campo)
+                if valor is not None:
+                    self._entradas.move_to_end(chave)
+                    self.acertos += 1
+                    return valor
+            self.falhas += 1
+
+        # O carregamento ocorre fora do lock: outros resumos seguem disponíveis.
+        valor = carregar(caminho)
+        if valor is None:
+            return None
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None or entrada.versao != versao:
+                if entrada is not None:
+                    self._bytes -= entrada.tamanho
+                entrada = _Entrada(versao)
+                self._entradas[chave] = entrada
+            self._entradas.move_to_end(chave)
+            if getattr(entrada, campo) is None:
+                setattr(entrada, campo, valor)
+                acrescimo = tamanho(valor)
+                entrada.tamanho += acrescimo
+                self._bytes += acrescimo
+            self._respeitar_limite()
+        return valor
+
+    def _respeitar_limite(self) -> None:
+        while self._bytes > self.limite_bytes and self._entradas:
+            caminho, entrada = self._entradas.popitem(last=False)
+            self._bytes -= entrada.tamanho
+            self.descartes += 1
+            logger.debug(f"Resumo descartado do cache: {caminho}")
+
+    def obter_resumo(self, caminho: str, carregar: Callable) -> pd.DataFrame | None:
+        """
+        Retorna o DataFrame do resumo em `caminho`, carregando-o com
+        `carregar(caminho)` se ausente ou desatualizado. Falhas (None) não são
+        guardadas.
+
+        Cada chamada recebe uma cópia rasa: com o Copy-on-Write do pandas,
+        alterações feitas pelo chamador não afetam o DataFrame em cache.
+        """
+        resumo = self._obter(
+            caminho,
+            "resumo",
+            carregar,
+            lambda df: int(df.memory_usage(deep=True).sum()),
+        )
+        return resumo.copy(deep=False) if resumo is not None else None
+
+    def obter_kpis(self, caminho: str, calcular: Callable) -> dict | None:
+        """Retorna os KPIs do resumo em `caminho`, calculando-os com `calcular(caminho)`."""
+        kpis = self._obter(caminho, "kpis", calcular, lambda _: TAMANHO_KPIS)
+        return dict(kpis) if kpis is not None else None
+
+    def invalidar_diretorio(self, diretorio: str) -> int:
+        """Remove do cache os resumos dentro de `diretorio`. Retorna quantos foram removidos."""
+        prefixo = os.path.join(os.path.abspath(diretorio), "")
+        with self._lock:
+            removidos = [c for c in self._entradas if c.startswith(prefixo)]
+            for caminho in removidos:
+                self._bytes -= self._entradas.pop(caminho).tamanho
+            self.invalidacoes += len(removidos)
+        return len(removidos)
+
+    def limpar(self) -> None:
+        """Esvazia o cache e zera os contadores."""
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+            self.acertos = self.falhas = self.descartes = self.invalidacoes = 0
+
+    def estatisticas(self) -> dict:
+        """Contadores e ocupação do cache, para monitoramento."""
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "limite_bytes": self.limite_bytes,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "descartes": self.descartes,
+                "invalidacoes": self.invalidacoes,
+            }
+
+
+CACHE = CacheResumos(SUMMARY_CACHE_MAX_MB * 1024 * 1024)
@@ -0,0 +1,212 @@
+"""
+Comparação de três a seis períodos em um único relatório.
+
+A análise comparativa (`analise_tendencia`) casa os Casos de dois períodos. Aqui,
+os Casos de atuação de todos os períodos são casados de uma só vez, por uma
+junção múltipla sobre a chave de 64 bits do Caso: as chaves de todos os
+períodos são unificadas e cada Caso recebe um mapa de presença (bit `i` ligado
+se o Caso aparece no período `i`). Desse mapa saem, sem novas junções, os novos,
+resolvidos e persistentes de cada período, as sequências de persistência de
+cada Caso e a variação de Casos e alertas de cada squad entre períodos.
+"""
+
+import itertools
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .analise_tendencia import calcular_chaves_casos
+from .constants import (
+    ACAO_FLAGS_ATUACAO,
+    COL_ASSIGNMENT_GROUP,
+    COL_CMDB_CI,
+    COL_SHORT_DESCRIPTION,
+    UNKNOWN,
+)
+
+logger = logging.getLogger(__name__)
+
+MIN_PERIODOS = 3
+# O mapa de presença de cada Caso cabe em um uint8.
+MAX_PERIODOS = 6
+ARQUIVO_RELATORIO = "comparativo_multiplo.html"
+
+
+def casar_periodos(resumos: list[pd.DataFrame]) -> dict:
+    """
+    Casa os Casos de N períodos em uma única junção sobre a chave do Caso.
+
+    Args:
+        resumos: os resumos de atuação de cada período, em ordem cronológica.
+
+    Returns:
+        Dicionário com, por Caso (na ordem das chaves), `chave`, `presenca`
+        (mapa de bits por período), `alertas` (matriz Caso x período) e
+        `representante` (a primeira linha do Caso em `pd.concat(resumos)`).
+        Inclui ainda, por linha dos resumos concatenados, `caso` e `periodo`.
+
+    Raises:
+        pd.errors.MergeError: se um período tiver Casos com a mesma chave.
+    """
+    n = len(resumos)
+    if n > MAX_PERIODOS:
+        raise ValueError(f"No máximo {MAX_PERIODOS} períodos podem ser comparados.")
+    chave = np.concatenate(
+        [calcular_chaves_casos(df) for df in resumos] or [np.empty(0, np.uint64)]
+    )
+    periodo = np.repeat(np.arange(n), [len(df) for df in resumos])
+    chaves, representante, caso = np.unique(
+        chave, return_index=True, return_inverse=True
+    )
+    presenca = np.zeros(len(chaves), dtype=np.uint8)
+    np.bitwise_or.at(presenca, caso, (1 << periodo).astype(np.uint8))
+    # Sem duplicatas, cada linha liga um bit distinto do mapa de presença.
+    if np.unpackbits(presenca).sum() != len(caso):
+        raise pd.errors.MergeError(
+            "Casos duplicados em um dos períodos: o casamento deve ser um para um."
+        )
+    alertas = np.zeros((len(chaves), n), dtype=np.int64)
+    alertas[caso, periodo] = np.concatenate(
+        [df["alert_count"].fillna(0).to_numpy(np.int64) for df in resumos]
+        or [np.empty(0, np.int64)]
+    )
+    return {
+        "chave": chaves,
+        "presenca": presenca,
+        "alertas": alertas,
+        "representante": representante,
+        "caso": caso,
+        "periodo": periodo,
+    }
+
+
+def calcular_sequencias(presenca: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sequências de persistência de cada Caso a partir do mapa de presença.
+
+    Returns:
+        `(atual, maior)`: o número de períodos consecutivos em que o Caso aparece
+        até o último período (0 se ausente nele) e a maior dessas sequências.
+    """
+    atual = np.zeros(len(presenca), dtype=np.int64)
+    maior = np.zeros(len(presenca), dtype=np.int64)
+    for i in range(n):
+        atual = (atual + 1) * ((presenca >> i) & 1)
+        np.maximum(maior, atual, out=maior)
+    return atual, maior
+
+
+def _coluna(df: pd.DataFrame, coluna: str) -> pd.Series:
+    if coluna in df.columns:
+        return df[coluna].astype(str)
+    return pd.Series(UNKNOWN, index=df.index)
+
+
+def comparar_periodos(resumos: list[pd.DataFrame], periodos: list[dict]) -> dict:
+    """
+    Compara N períodos e monta a resposta da API e o contexto do relatório.
+
+    Considera apenas os Casos que exigem atuação (`ACAO_FLAGS_ATUACAO`). Os
+    valores de novos, resolvidos e persistentes (e as variações das squads) do
+    primeiro período são nulos: não há período anterior com que compará-lo.
+
+    Args:
+        resumos: os resumos completos de cada período (ao menos um), em ordem
+            cronológica.
+        periodos: para cada período, `arquivo` e `intervalo` (texto ou None).
+
+    Returns:
+        Dicionário com `periodos`, `squads` (Casos, alertas e variações por
+        período) e `casos` (mapa de presença, sequências e alertas por período).
+    """
+    n = len(resumos)
+    atuacao = [df[df["acao_sugerida"].isin(ACAO_FLAGS_ATUACAO)] for df in resumos]
+    casamento = casar_periodos(atuacao)
+    presenca, alertas = casamento["presenca"], casamento["alertas"]
+    caso, periodo = casamento["caso"], casamento["periodo"]
+
+    presente = ((presenca[:, None] >> np.arange(n)) & 1).astype(bool)
+    persistentes = (presente[:, 1:] & presente[:, :-1]).sum(axis=0)
+    total = presente.sum(axis=0)
+    sequencia_atual, maior_sequencia = calcular_sequencias(presenca, n)
+
+    linhas = pd.concat(atuacao, ignore_index=True)
+    squad_linha, squads = pd.factorize(_coluna(linhas, COL_ASSIGNMENT_GROUP))
+    s = len(squads)
+    casos_por_squad = np.bincount(periodo * s + squad_linha, minlength=n * s).reshape(
+        n, s
+    )
+    alertas_por_squad = (
+        np.bincount(
+            periodo * s + squad_linha, weights=alertas[caso, periodo], minlength=n * s
+        )
+        .astype(np.int64)
+        .reshape(n, s)
+    )
+
+    resposta_periodos = [
+        {
+            "arquivo": periodos[i]["arquivo"],
+            "intervalo": periodos[i]["intervalo"],
+            "total_casos": int(total[i]),
+            "novos": int(total[i] - persistentes[i - 1]) if i else None,
+            "resolvidos": int(total[i - 1] - persistentes[i - 1]) if i else None,
+            "persistentes": int(persistentes[i - 1]) if i else None,
+            "alertas": int(alertas[:, i].sum()),
+        }
+        for i in range(n)
+    ]
+
+    # Squads com mais Casos no período mais recente primeiro.
+    ordem_squads = np.lexsort((np.asarray(squads), -casos_por_squad[-1]))
+    resposta_squads = []
+    for j in ordem_squads:
+        casos_squad = casos_por_squad[:, j].tolist()
+        alertas_squad = alertas_por_squad[:, j].tolist()
+        resposta_squads.append(
+            {
+                "nome": squads[j],
+                "casos": casos_squad,
+                "alertas": alertas_squad,
+                "variacao_casos": [None]
+                + [b - a for a, b in itertools.pairwise(casos_squad)],
+                "variacao_alertas": [None]
+                + [b - a for a, b in itertools.pairwise(alertas_squad)],
+            }
+        )
+
+    # Casos há mais tempo persistentes primeiro; depois, os de maior volume.
+    # As colunas são convertidas em listas de uma vez, já na ordem final.
+    ordem_casos = np.lexsort((-alertas.sum(axis=1), -maior_sequencia, -sequencia_atual))
+    representantes = linhas.iloc[casamento["representante"][ordem_casos]]
+    resposta_casos = [
+        {
+            "chave": f"{chave:016x}",
+            "squad": squad,
+            "problema": problema,
+            "recurso": recurso,
+            "presenca": bits,
+            "sequencia_atual": atual,
+            "maior_sequencia": maior,
+            "alertas": alertas_caso,
+        }
+        for chave, squad, problema, recurso, bits, atual, maior, alertas_caso in zip(
+            casamento["chave"][ordem_casos].tolist(),
+            _coluna(representantes, COL_ASSIGNMENT_GROUP).tolist(),
+            _coluna(representantes, COL_SHORT_DESCRIPTION).tolist(),
+            _coluna(representantes, COL_CMDB_CI).tolist(),
+            presenca[ordem_casos].tolist(),
+            sequencia_atual[ordem_casos].tolist(),
+            maior_sequencia[ordem_casos].tolist(),
+            alertas[ordem_casos].tolist(),
+        )
+    ]
+    logger.info(
+        f"Comparação de {n} períodos: {len(presenca)} Casos distintos em {s} squads."
+    )
+    return {
+        "periodos": resposta_periodos,
+        "squads": resposta_squads,
+        "casos": resposta_casos,
+    }
@@ -0,0 +1,145 @@
+"""
+Envio comprimido dos artefatos dos relatórios (HTML, CSV, JSON, CSS e JS).
+
+Na primeira requisição de um artefato comprimível, é gravada ao lado dele uma
+versão gzip (`<arquivo>.gz`) e, se o pacote opcional `brotli` estiver instalado,
+uma versão Brotli (`<arquivo>.br`). As requisições seguintes recebem diretamente
+a versão aceita pelo cliente (`Accept-Encoding`), com `Content-Encoding`,
+`Vary: Accept-Encoding`, um ETag por codificação e o `Last-Modified` do arquivo
+original. Requisições `Range` se aplicam aos bytes da representação enviada.
+
+A versão comprimida guarda o mtime do original; se a página for gerada de novo,
+ela é recriada na requisição seguinte.
+"""
+
+import gzip
+import logging
+import mimetypes
+import os
+import shutil
+import tempfile
+
+from flask import request, send_file
+
+try:
+    import brotli
+except ImportError:  # Dependência opcional: sem ela, apenas gzip.
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+PRECOMPRESS_REPORTS = os.getenv("PRECOMPRESS_REPORTS", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+EXTENSOES_COMPRIMIVEIS = frozenset({".html", ".csv", ".json", ".css", ".js"})
+# Abaixo deste tamanho (bytes) o ganho não compensa: o arquivo é enviado como está.
+TAMANHO_MINIMO_COMPRESSAO = 1024
+NIVEL_GZIP = 6
+QUALIDADE_BROTLI = 5
+TAMANHO_BLOCO = 1024 * 1024
+
+
+def _comprimir_gzip(origem, destino) -> None:
+    # mtime=0 torna o conteúdo determinístico (o mtime real fica no arquivo).
+    with gzip.GzipFile(
+        fileobj=destino, mode="wb", compresslevel=NIVEL_GZIP, mtime=0
+    ) as gz:
+        shutil.copyfileobj(origem, gz, TAMANHO_BLOCO)
+
+
+def _comprimir_brotli(origem, destino) -> None:
+    compressor = brotli.Compressor(quality=QUALIDADE_BROTLI)
+    while bloco := origem.read(TAMANHO_BLOCO):
+        destino.write(compressor.process(bloco))
+    destino.write(compressor.finish())
+
+
+# Codificações em ordem de preferência: (nome no Accept-Encoding, sufixo, função).
+CODIFICACOES = [("gzip", ".gz", _comprimir_gzip)]
+if brotli is not None:
+    CODIFICACOES.insert(0, ("br", ".br", _comprimir_brotli))
+
+
+def comprimivel(caminho: str) -> bool:
+    """Indica se o artefato deve ser enviado comprimido."""
+    return (
+        PRECOMPRESS_REPORTS
+        and os.path.splitext(caminho)[1].lower() in EXTENSOES_COMPRIMIVEIS
+        and os.path.getsize(caminho) >= TAMANHO_MINIMO_COMPRESSAO
+    )
+
+
+def obter_versao_comprimida(caminho: str, sufixo: str, compressor) -> str | None:
+    """
+    Retorna o caminho da versão comprimida de `caminho`, criando-a se ausente
+    ou desatualizada. Retorna None se não for possível gravá-la.
+    """
+    destino = caminho + sufixo
+    stat = os.stat(caminho)
+    try:
+        if os.stat(destino).st_mtime_ns == stat.st_mtime_ns:
+            return destino
+    except FileNotFoundError:
+        pass
+
+    diretorio, nome = os.path.split(caminho)
+    fd, temporario = tempfile.mkstemp(dir=diretorio, prefix=f".{nome}.", suffix=".tmp")
+    try:
+        with open(caminho, "rb") as origem, os.fdopen(fd, "wb") as saida:
+            compressor(origem, saida)
+        os.utime(temporario, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        # Substituição atômica: requisições simultâneas nunca leem um arquivo parcial.
+        os.replace(temporario, destino)
+    except OSError as e:
+        logger.warning(f"Não foi possível comprimir '{caminho}': {e}")
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        return None
+    logger.info(f"Versão comprimida criada: {destino}")
+    return destino
+
+
+def enviar_arquivo(caminho: str, **kwargs):
+    """
+    Equivalente a `send_file(caminho, conditional=True)`, enviando a versão
+    comprimida aceita pelo cliente quando o artefato é comprimível.
+    """
+    if not comprimivel(caminho):
+        return send_file(caminho, conditional=True, **kwargs)
+
+    stat = os.stat(caminho)
+    etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+    kwargs.setdefault(
+        "mimetype", mimetypes.guess_type(caminho)[0] or "application/octet-stream"
+    )
+    kwargs.setdefault("download_name", os.path.basename(caminho))
+
+    response = None
+    for codificacao, sufixo, compressor in CODIFICACOES:
+        if not request.accept_encodings[codificacao]:
+            continue
+        comprimido = obter_versao_comprimida(caminho, sufixo, compressor)
+        if comprimido is None:
+            continue
+        response = send_file(
+            comprimido,
+            conditional=True,
+            etag=f"{etag}-{codificacao}",
+            last_modified=stat.st_mtime,
+            **kwargs,
+        )
+        response.headers["Content-Encoding"] = codificacao
+        break
+
+    if response is None:
+        response = send_file(
+            caminho,
+            conditional=True,
+            etag=etag,
+            last_modified=stat.st_mtime,
+            **kwargs,
+        )
+    response.vary.add("Accept-Encoding")
+    return response
@@ -0,0 +1,114 @@
+"""
+Formatação vetorizada das células HTML dos relatórios.
+
+Em vez de aplicar `html.escape`, `strftime` e `format` a cada linha, as funções
+deste módulo escapam e formatam colunas inteiras de uma vez: textos muito
+repetidos (squads, problemas, ações, recursos) são processados uma única vez por
+valor distinto e datas e números são formatados como Series. A renderização das
+linhas passa a apenas concatenar strings já prontas.
+"""
+
+from collections.abc import Callable
+from html import escape
+
+import numpy as np
+import pandas as pd
+
+from .constants import COL_ASSIGNMENT_GROUP, COL_CMDB_CI, COL_NODE, UNKNOWN
+
+# Formato curto de data usado nas tabelas dos relatórios.
+FORMATO_DATA_CURTA = "%d/%m %H:%M"
+# Emoji exibido para ações sem entrada no mapa de emojis.
+EMOJI_ACAO_PADRAO = "⚙️"
+
+
+def mapear_valores_distintos(serie: pd.Series, funcao: Callable) -> pd.Series:
+    """
+    Aplica `funcao` a cada valor distinto de `serie` e expande o resultado.
+
+    A série é fatorada (em categóricas, os próprios códigos são reaproveitados),
+    de modo que o custo em Python é proporcional ao número de valores distintos,
+    não ao de linhas. Valores ausentes também são passados para `funcao`.
+    """
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    resultados = np.empty(len(unicos), dtype=object)
+    resultados[:] = [funcao(valor) for valor in unicos]
+    return pd.Series(resultados[codigos], index=serie.index, dtype=object)
+
+
+def escapar_serie(serie: pd.Series) -> pd.Series:
+    """Equivalente vetorizado de `html.escape(str(valor))` para cada valor."""
+    return mapear_valores_distintos(serie, lambda valor: escape(str(valor)))
+
+
+def formatar_datas(serie: pd.Series, formato: str = FORMATO_DATA_CURTA) -> pd.Series:
+    """
+    Formata uma coluna de datas; datas ausentes viram texto vazio.
+
+    Cada instante distinto é formatado uma única vez (Casos de um mesmo evento
+    costumam compartilhar o início e o fim).
+    """
+    codigos, unicos = pd.factorize(serie)
+    texto = np.append(pd.DatetimeIndex(unicos).strftime(formato).to_numpy(object), "")
+    return pd.Series(texto[codigos], index=serie.index, dtype=object)
+
+
+def formatar_decimais(serie: pd.Series, casas: int = 1) -> pd.Series:
+    """Equivalente vetorizado de `f"{valor:.{casas}f}"` para cada valor."""
+    texto = np.char.mod(f"%.{casas}f", serie.to_numpy(dtype=float))
+    return pd.Series(texto.astype(object), index=serie.index, dtype=object)
+
+
+def formatar_cores_de_fundo(
+    serie: pd.Series, valor_min: float, valor_max: float
+) -> pd.Series:
+    """
+    Cor de fundo de `gerador_html.gerar_cores_para_barra` calculada para uma
+    coluna inteira (matiz de 60, amarelo, em `valor_min` a 0, vermelho, em `valor_max`).
+    """
+    if valor_max == valor_min:
+        return pd.Series("hsl(0, 90%, 55%)", index=serie.index, dtype=object)
+    valores = serie.to_numpy(dtype=float)
+    if valor_max > valor_min:
+        fracao = (valores - valor_min) / (valor_max - valor_min)
+    else:
+        fracao = np.zeros(len(valores))
+    matiz = np.char.mod("%.0f", 60 - (fracao * 60)).astype(object)
+    return pd.Series("hsl(" + matiz + ", 90%, 55%)", index=serie.index, dtype=object)
+
+
+def formatar_celulas_caso(df: pd.DataFrame, emoji_map: dict) -> pd.DataFrame:
+    """
+    Formata as células HTML comuns às tabelas de Casos (páginas de squad e de detalhe).
+
+    Returns:
+        DataFrame (mesmo índice de `df`) com as colunas `recurso`, `acao`,
+        `periodo`, `alertas` e `squad_nome` já escapadas/formatadas.
+    """
+    node_info = (
+        "<br><small style='color:var(--text-secondary-color)'>"
+        + escapar_serie(df[COL_NODE])
+        + "</small>"
+    ).where(df[COL_NODE] != df[COL_CMDB_CI], "")
+    if "acao_sugerida" in df.columns:
+        acao = df["acao_sugerida"]
+    else:
+        acao = pd.Series(UNKNOWN, index=df.index)
+    emoji = mapear_valores_distintos(
+        acao, lambda valor: emoji_map.get(valor, EMOJI_ACAO_PADRAO)
+    )
+    return pd.DataFrame(
+        {
+            "recurso": "<strong>"
+            + escapar_serie(df[COL_CMDB_CI])
+            + "</strong>"
+            + node_info,
+            "acao": "<span class='emoji'>" + emoji + "</span> " + escapar_serie(acao),
+            "periodo": formatar_datas(df["first_event"])
+            + " a<br>"
+            + formatar_datas(df["last_event"]),
+            "alertas": df["alert_count"].astype(str).astype(object),
+            "squad_nome": escapar_serie(df[COL_ASSIGNMENT_GROUP]),
+        },
+        index=df.index,
+    )
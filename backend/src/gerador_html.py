@@ -1,9 +1,239 @@
+import hashlib
 import os
 import re
+from functools import lru_cache
 from html import escape
-from typing import Dict, Any
+from typing import Any, Dict
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+# =============================================================================
+# AMBIENTE JINJA2 (compartilhado pelo processo)
+# =============================================================================
+
+TEMPLATE_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "templates")
+)
+# Quantidade de templates compilados mantidos em memória (LRU do próprio Jinja2).
+JINJA_CACHE_SIZE = int(os.getenv("JINJA_CACHE_SIZE", "100"))
+# Diretório opcional para persistir o bytecode compilado entre processos/reinícios.
+JINJA_BYTECODE_CACHE_DIR = os.getenv("JINJA_BYTECODE_CACHE_DIR", "")
+
+# Quantidade de fragmentos agrupados a cada escrita no arquivo durante o streaming.
+STREAM_BUFFER_SIZE = 64
+
+# CSS/JS compartilhados pelas páginas geradas. São servidos uma única vez para
+# todas as execuções em /reports/_assets/<nome>.<hash>.<ext> (ver `url_asset`).
+ASSETS_DIR = os.path.join(TEMPLATE_DIR, "assets")
+ASSETS_URL_DIR = "_assets"
+# Minificação opcional do HTML gerado (remove indentação e linhas em branco).
+MINIFY_HTML = os.getenv("MINIFY_HTML", "false").lower() in ("1", "true", "yes")
+
+_jinja_env: Environment | None = None
+
+
+def _criar_ambiente_jinja(template_dir: str = TEMPLATE_DIR) -> Environment:
+    """
+    Cria o Environment do Jinja2 usado por todas as páginas do relatório.
+
+    O `auto_reload` faz o loader comparar o mtime do arquivo de template antes de
+    reutilizar a versão compilada, então uma edição no template é refletida sem
+    reiniciar o processo. O autoescape permanece desligado porque os chamadores
+    já escapam os valores dinâmicos antes da renderização.
+    """
+    bytecode_cache = None
+    if JINJA_BYTECODE_CACHE_DIR:
+        os.makedirs(JINJA_BYTECODE_CACHE_DIR, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(JINJA_BYTECODE_CACHE_DIR)
+    env = Environment(  # nosec B701
+        loader=FileSystemLoader(template_dir),
+        autoescape=False,
+        auto_reload=True,
+        cache_size=JINJA_CACHE_SIZE,
+        bytecode_cache=bytecode_cache,
+    )
+    # Mesmo escape usado pelas f-strings (html.escape), para manter a saída idêntica.
+    env.filters["escape_html"] = escape
+    env.globals["gerar_cores_para_barra"] = gerar_cores_para_barra
+    env.globals["asset_url"] = url_asset
+    return env
+
+
+def obter_ambiente_jinja() -> Environment:
+    """Retorna o Environment do Jinja2 do processo, criando-o na primeira chamada."""
+    global _jinja_env
+    if _jinja_env is None:
+        _jinja_env = _criar_ambiente_jinja()
+    return _jinja_env
+
+
+def obter_template(nome_template: str) -> Template:
+    """Retorna um template compilado da pasta de templates (com cache LRU)."""
+    return obter_ambiente_jinja().get_template(nome_template)
+
+
+def renderizar_template(nome_template: str, **kwargs: Any) -> str:
+    """Renderiza um template da pasta de templates pelo nome."""
+    html_content = obter_template(nome_template).render(**kwargs)
+    if MINIFY_HTML:
+        return "".join(minificar_linhas_html(html_content.splitlines(keepends=True)))
+    return html_content
+
+
+def renderizar_template_em_arquivo(
+    nome_template: str, output_path: str, **kwargs: Any
+) -> None:
+    """
+    Renderiza um template diretamente para um arquivo, em streaming.
+
+    Usa `Template.stream().dump()`, então a página é escrita em blocos à medida
+    que é gerada, sem montar o HTML completo em memória.
+    """
+    stream = obter_template(nome_template).stream(**kwargs)
+    stream.enable_buffering(size=STREAM_BUFFER_SIZE)
+    if not MINIFY_HTML:
+        stream.dump(output_path, encoding="utf-8")
+        return
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.writelines(minificar_linhas_html(_dividir_em_linhas(stream)))
+
+
+# =============================================================================
+# MINIFICAÇÃO DE HTML
+# =============================================================================
+
+# Blocos cujo conteúdo é copiado sem alterações.
+_ABERTURA_PRESERVADA = re.compile(r"<(pre|textarea|script)\b", re.IGNORECASE)
+
+
+def _dividir_em_linhas(fragmentos):
+    """Reagrupa os fragmentos de um stream em linhas completas."""
+    pendente = ""
+    for fragmento in fragmentos:
+        linhas = (pendente + fragmento).split("\n")
+        pendente = linhas.pop()
+        for linha in linhas:
+            yield linha + "\n"
+    if pendente:
+        yield pendente
+
+
+def minificar_linhas_html(linhas):
+    """
+    Minifica o HTML linha a linha: remove a indentação e as linhas em branco.
+
+    A quebra de linha entre elementos é mantida (equivale a um espaço no HTML),
+    e o conteúdo de `<pre>`, `<textarea>` e `<script>` é preservado como está.
+    Funciona sobre qualquer iterável de linhas, inclusive um stream.
+    """
+    preservando = None
+    for linha in linhas:
+        if preservando:
+            yield linha
+            if preservando in linha.lower():
+                preservando = None
+            continue
+        texto = linha.strip()
+        if not texto:
+            continue
+        yield texto + "\n"
+        for abertura in _ABERTURA_PRESERVADA.finditer(texto):
+            fechamento = f"</{abertura.group(1).lower()}"
+            if fechamento not in texto[abertura.end() :].lower():
+                preservando = fechamento
+                break
+
+
+# =============================================================================
+# VERSIONAMENTO DE TEMPLATES E ASSETS
+# =============================================================================
+
+
+def _assinatura_arquivos(diretorio: str) -> tuple:
+    """Nomes relativos, mtime e tamanho de todos os arquivos do diretório (recursivo)."""
+    assinatura = []
+    for raiz, subdirs, arquivos in os.walk(diretorio):
+        subdirs.sort()
+        for nome in sorted(arquivos):
+            stat = os.stat(os.path.join(raiz, nome))
+            relativo = os.path.relpath(os.path.join(raiz, nome), diretorio)
+            assinatura.append((relativo, stat.st_mtime_ns, stat.st_size))
+    return tuple(assinatura)
+
+
+def versao_templates(template_dir: str = TEMPLATE_DIR) -> str:
+    """
+    Retorna a versão atual dos templates: um hash do conteúdo da pasta de templates.
+
+    Páginas renderizadas sob demanda são armazenadas por versão, então qualquer
+    edição em um template (ou em um asset referenciado por ele) invalida as
+    páginas geradas com a versão anterior.
+    """
+    return _calcular_versao_templates(template_dir, _assinatura_arquivos(template_dir))
+
+
+@lru_cache(maxsize=8)
+def _calcular_versao_templates(template_dir: str, assinatura: tuple) -> str:
+    """Calcula o hash dos templates; só relê os arquivos quando a assinatura muda."""
+    sha = hashlib.sha256()
+    for nome, _mtime, _tamanho in assinatura:
+        sha.update(nome.encode("utf-8"))
+        with open(os.path.join(template_dir, nome), "rb") as f:
+            sha.update(f.read())
+    return sha.hexdigest()[:16]
+
+
+@lru_cache(maxsize=32)
+def _hash_asset(caminho: str, _mtime_ns: int, _tamanho: int) -> str:
+    with open(caminho, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def nome_asset_versionado(nome: str) -> str:
+    """Retorna o nome do asset com o hash do conteúdo (ex.: `relatorio.<hash>.css`)."""
+    caminho = os.path.join(ASSETS_DIR, nome)
+    stat = os.stat(caminho)
+    base, extensao = os.path.splitext(nome)
+    return f"{base}.{_hash_asset(caminho, stat.st_mtime_ns, stat.st_size)}{extensao}"
+
+
+def url_asset(nome: str, nivel: int = 0) -> str:
+    """
+    URL relativa de um asset compartilhado, a partir de uma página do relatório.
+
+    Args:
+        nome: Nome do arquivo em `templates/assets` (ex.: `relatorio.css`).
+        nivel: Profundidade da página dentro da execução (0 na raiz, 1 em
+            `squads/`, `detalhes/` e `planos_de_acao/`).
+    """
+    return f"{'../' * (nivel + 1)}{ASSETS_URL_DIR}/{nome_asset_versionado(nome)}"
+
+
+def resolver_asset(nome_versionado: str) -> tuple[str, bool] | None:
+    """
+    Localiza o arquivo de um asset pedido pelo nome versionado.
+
+    Returns:
+        `(caminho, hash_confere)`, ou None se o asset não existir. Quando o hash
+        não confere (página gerada com uma versão anterior do asset), a versão
+        atual é servida, mas não deve ser cacheada como imutável.
+    """
+    partes = nome_versionado.split(".")
+    if len(partes) != 3 or "/" in nome_versionado or "\\" in nome_versionado:
+        return None
+    nome = f"{partes[0]}.{partes[2]}"
+    caminho = os.path.join(ASSETS_DIR, nome)
+    if not os.path.isfile(caminho):
+        return None
+    return caminho, nome_asset_versionado(nome) == nome_versionado
+
+
+@lru_cache(maxsize=128)
+def _compilar_template_string(template_string: str) -> Template:
+    """Compila uma string de template uma única vez por processo."""
+    return obter_ambiente_jinja().from_string(template_string)
+
 
-from jinja2 import Template
 # =============================================================================
 # CONSTANTES VISUAIS
 # =============================================================================
@@ -37,7 +267,7 @@ def gerar_cores_para_barra(
 
 def renderizar_template_string(template_string: str, **kwargs: Any) -> str:
     """Renderiza uma string de template usando Jinja2, de forma segura."""
-    template = Template(template_string)
+    template = _compilar_template_string(template_string)
     return template.render(**kwargs)
 
 
@@ -68,89 +298,14 @@ def renderizar_pagina_csv_viewer(
     return final_html
 
 
-def renderizar_visualizador_json(json_data_str: str) -> str:
-    """Cria um arquivo HTML estático para visualizar o JSON de forma formatada."""
-    return f"""
-<!DOCTYPE html>
-<html lang="pt-BR">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Visualizador de Problemas (JSON)</title>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/highlight.min.js"></script>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/languages/json.min.js"></script>
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/styles/atom-one-dark.min.css">
-    <style>
-        :root {{
-            --bg-color: #1a1c2f;
-            --card-color: #2c2f48;
-            --text-color: #f0f0f0;
-            --border-color: #404466;
-            --accent-color: #4e73df;
-        }}
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif;
-            background-color: var(--bg-color);
-            color: var(--text-color);
-            margin: 0;
-            padding: 20px;
-        }}
-        .container {{
-            max-width: 1200px;
-            margin: auto;
-        }}
-        h1 {{
-            border-bottom: 1px solid var(--border-color);
-            padding-bottom: 10px;
-            font-weight: 500;
-        }}
-        a {{
-            color: var(--accent-color);
-            text-decoration: none;
-            font-weight: 500;
-        }}
-        a:hover {{
-            text-decoration: underline;
-        }}
-        #json-container {{
-            background-color: var(--card-color);
-            border-radius: 8px;
-            padding: 20px;
-            border: 1px solid var(--border-color);
-            white-space: pre-wrap; 
-            word-break: break-all;
-        }}
-        .hljs {{
-            background: transparent !important;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>Resumo de Casos (JSON)</h1>
-        <p><a href="resumo_geral.html">&larr; Voltar para o Dashboard</a></p>
-        <div id="json-container">
-            <pre><code id="json-content" class="language-json"></code></pre>
-        </div>
-    </div>
+def renderizar_visualizador_json(registros_por_pagina: int = 100) -> str:
+    """
+    Renderiza o visualizador do resumo JSON de uma execução.
 
-    <script>
-        // Os dados do JSON sÃ£o injetados aqui pelo script Python
-        const jsonData = {json_data_str};
-        
-        try {{
-            const formattedJson = JSON.stringify(jsonData, null, 2);
-            const codeElement = document.getElementById('json-content');
-            codeElement.textContent = formattedJson;
-            hljs.highlightElement(codeElement);
-        }} catch (error) {{
-            console.error("Erro ao formatar o JSON embutido:", error);
-            document.getElementById('json-content').textContent = "Erro ao renderizar o JSON. Verifique o console para mais detalhes.";
-        }}
-    </script>
-</body>
-</html>
-"""
+    A página não embute os dados: os Casos são carregados por faixas na API do
+    relatório, então o mesmo HTML atende a qualquer execução.
+    """
+    return renderizar_template("visualizador_json.html", page_size=registros_por_pagina)
 
 
 def _render_conceitos_section() -> str:
@@ -1,31 +1,37 @@
+import json
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from html import escape
 import logging
 import pandas as pd
-from . import gerador_html
+from . import (
+    formatacao_html,
+    gerador_html,
+    modelo_renderizacao,
+    modelo_visualizacao,
+)
+from .renderizacao_incremental import ReaproveitamentoPaginas
 from .constants import (
     ACAO_ESTABILIZADA,
     ACAO_FALHA_PERSISTENTE,
     ACAO_FLAGS_ATUACAO,
     ACAO_FLAGS_INSTABILIDADE,
-    LOG_INVALIDOS_FILENAME,  # noqa: F401
+    LOG_INVALIDOS_FILENAME,
     ACAO_FLAGS_OK,
     ACAO_INCONSISTENTE,
     ACAO_INTERMITENTE,
     ACAO_SEMPRE_OK,
     ACAO_STATUS_AUSENTE,
     COL_ASSIGNMENT_GROUP,
-    COL_CMDB_CI,
     COL_METRIC_NAME,
-    COL_NODE,
     COL_SHORT_DESCRIPTION,
-    UNKNOWN,
 )
 from .analisar_alertas import (
     FULL_EMOJI_MAP,
     _save_csv,
+    colunas_essenciais_relatorio,
 )
 
 logger = logging.getLogger(__name__)
@@ -34,6 +40,8 @@ logger = logging.getLogger(__name__)
 # CONSTANTES DE NOMENCLATURA (python:S1192)
 # =============================================================================
 MAIN_TEMPLATE = "template.html"
+SQUAD_TEMPLATE = "squad_report.html"
+CSV_VIEWER_TEMPLATE = "csv_viewer_template.html"
 
 REPORTS_DIR_SQUADS = "squads"
 REPORTS_DIR_DETAILS = "detalhes"
@@ -47,12 +55,70 @@ FILENAME_ACTION_PLAN = "atuar.html"
 FILENAME_INVALID_LOGS_HTML = "qualidade_dados_remediacao.html"
 FILENAME_JSON_VIEWER = "visualizador_json.html"
 FILENAME_JSON_SUMMARY = "resumo_problemas.json"
+FILENAME_RENDER_MANIFEST = "manifesto_renderizacao.json"
+FILENAME_RUN_METADATA = "metadados_renderizacao.json"
+FILENAME_VIEW_MODEL = "modelo_visualizacao.json"
+# Fragmento com os detalhes dos Casos de uma squad, ao lado de `squad-<nome>.html`.
+SUFIXO_DETALHES_SQUAD = ".detalhes.json"
+
+# Modos de geração registrados nos metadados da execução.
+MODO_COMPLETO = "completo"
+MODO_SOB_DEMANDA = "sob_demanda"
+
+# Número padrão de processos usados para renderizar as páginas por squad
+# (1 = em série). Pode ser sobrescrito por chamada.
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "1"))
+# Quando ativo, o upload gera apenas o dashboard e o resumo JSON; as demais
+# páginas são renderizadas na primeira requisição (ver `renderizacao_sob_demanda`).
+LAZY_RENDERING = os.getenv("LAZY_REPORT_RENDERING", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Linhas por página nos visualizadores de CSV (carregadas sob demanda pela API).
+CSV_VIEWER_PAGE_SIZE = 100
+
+# Páginas de visualização de CSV: (csv de origem, página gerada, título).
+RELATORIOS_CSV_VIEWER = [
+    ("remediados.csv", FILENAME_SUCCESS, "Sucesso da Automação"),
+    (
+        "remediados_frequentes.csv",
+        FILENAME_INSTABILITY,
+        "Casos de Instabilidade Crônica",
+    ),
+    (
+        "pontos_de_atencao.csv",
+        "pontos_de_atencao.html",
+        "Pontos de Atenção na Automação",
+    ),
+]
+RELATORIO_CSV_LOGS_INVALIDOS = (
+    LOG_INVALIDOS_FILENAME,
+    FILENAME_INVALID_LOGS_HTML,
+    "Alertas com Dados Inválidos",
+)
+
+# Emojis exibidos nas páginas de squad para as ações que exigem atuação.
+EMOJI_MAP_ATUACAO = {
+    ACAO_INTERMITENTE: "⚠️",
+    ACAO_FALHA_PERSISTENTE: "❌",
+    ACAO_STATUS_AUSENTE: "❓",
+    ACAO_INCONSISTENTE: "🔍",
+}
+# Emojis para os status das tasks de remediação na cronologia dos Casos.
+TASK_STATUS_EMOJI_MAP = {
+    "Closed": "✅",
+    "Closed Incomplete": "❌",
+    "Closed Skipped": "⏭️",
+    "Canceled": "🚫",
+    "Open": "⏳",
+    "No Task Found": "❓",
+}
 
 # SOLUÇÃO DEFINITIVA: Calcula o caminho para a pasta de templates de forma dinâmica.
 # Isso funciona tanto no ambiente de desenvolvimento (volume mount) quanto no de produção (cópia de arquivos).
-BASE_TEMPLATE_DIR = os.path.abspath(
-    os.path.join(os.path.dirname(__file__), "..", "templates")
-)
+BASE_TEMPLATE_DIR = gerador_html.TEMPLATE_DIR
 
 # =============================================================================
 # FUNÇÕES DE GERAÇÃO DE PÁGINAS HTML
@@ -64,6 +130,9 @@ def gerar_ecossistema_de_relatorios(
     analysis_results: dict,
     output_dir: str,  # noqa: E501
     frontend_url: str = "/",
+    render_workers: int | None = None,
+    lazy: bool | None = None,
+    execucao_anterior: str | None = None,
 ) -> str:
     """
     Orquestra a geração de todas as páginas HTML do relatório.
@@ -73,6 +142,14 @@ def gerar_ecossistema_de_relatorios(
         analysis_results: Dicionário com os resultados da análise.
         output_dir: Diretório onde os relatórios serão salvos. # noqa: E501
         frontend_url: URL base do frontend para links de retorno.
+        render_workers: Número de processos para renderizar as páginas por squad.
+            Se omitido, usa `RENDER_WORKERS`; 1 renderiza em série.
+        lazy: Se verdadeiro, gera apenas o dashboard; as demais páginas são
+            renderizadas sob demanda. Se omitido, usa
+            `LAZY_RENDERING`.
+        execucao_anterior: Diretório da execução anterior. Páginas cuja fatia de
+            dados não mudou são reaproveitadas de lá em vez de renderizadas
+            (ver `renderizacao_incremental`).
 
     Returns:
         O caminho para o arquivo de resumo principal (resumo_geral.html).
@@ -86,6 +163,25 @@ def gerar_ecossistema_de_relatorios(
         dashboard_context, summary_html_path, timestamp_str, frontend_url
     )
 
+    # Dados do dashboard, squads e detalhes para a SPA montar as visões no navegador.
+    _gravar_modelo_visualizacao(
+        output_dir, dashboard_context, analysis_results, timestamp_str
+    )
+
+    lazy = LAZY_RENDERING if lazy is None else lazy
+    _gravar_metadados_execucao(
+        output_dir,
+        timestamp_str,
+        frontend_url,
+        analysis_results["num_logs_invalidos"],
+        MODO_SOB_DEMANDA if lazy else MODO_COMPLETO,
+    )
+    if lazy:
+        logger.info(
+            "Renderização sob demanda ativa: apenas o dashboard foi gerado no upload."
+        )
+        return summary_html_path
+
     # Prepara dados e caminhos para as páginas de detalhe
     df_atuacao = analysis_results["df_atuacao"]
     summary = analysis_results["summary"]
@@ -93,6 +189,11 @@ def gerar_ecossistema_de_relatorios(
     squad_reports_dir = os.path.join(output_dir, REPORTS_DIR_SQUADS)
     summary_filename = os.path.basename(summary_html_path)
     squad_reports_base_name = os.path.basename(squad_reports_dir)
+    reaproveitamento = ReaproveitamentoPaginas(
+        output_dir,
+        execucao_anterior,
+        carregar_hashes_paginas(execucao_anterior) if execucao_anterior else None,
+    )
 
     # Gera páginas de detalhe para os principais problemas
     gerar_paginas_detalhe_problema(
@@ -103,6 +204,7 @@ def gerar_ecossistema_de_relatorios(
         "aberto_",
         squad_reports_base_name,
         timestamp_str,
+        reaproveitamento,
     )
     gerar_paginas_detalhe_problema(
         summary[summary["acao_sugerida"].isin(ACAO_FLAGS_OK)],
@@ -112,6 +214,7 @@ def gerar_ecossistema_de_relatorios(
         "remediado_",
         squad_reports_base_name,
         timestamp_str,
+        reaproveitamento,
     )
     gerar_paginas_detalhe_problema(
         summary,
@@ -121,6 +224,7 @@ def gerar_ecossistema_de_relatorios(
         "geral_",
         squad_reports_base_name,
         timestamp_str,
+        reaproveitamento,
     )
     gerar_paginas_detalhe_problema(
         summary[summary["acao_sugerida"].isin(ACAO_FLAGS_INSTABILIDADE)],
@@ -130,6 +234,7 @@ def gerar_ecossistema_de_relatorios(
         "instabilidade_",
         squad_reports_base_name,
         timestamp_str,
+        reaproveitamento,
     )
     gerar_paginas_detalhe_metrica(
         df_atuacao,
@@ -138,10 +243,21 @@ def gerar_ecossistema_de_relatorios(
         summary_filename,
         squad_reports_base_name,
         timestamp_str,
+        reaproveitamento,
     )
 
-    # Gera páginas de planos de ação e visualizadores de CSV
-    gerar_relatorios_por_squad(df_atuacao, squad_reports_dir, timestamp_str)
+    # Gera, por squad, a página de relatório e o plano de ação (CSV + HTML),
+    # em série ou em paralelo conforme `render_workers`.
+    manifesto = gerar_paginas_por_squad(
+        df_atuacao,
+        output_dir,
+        timestamp_str,
+        workers=render_workers,
+        reaproveitamento=reaproveitamento,
+    )
+    # Todas as páginas geradas por fatia já têm hash: grava-os para a próxima
+    # execução, mesmo sem squads a atuar.
+    gravar_manifesto_renderizacao(output_dir, manifesto, reaproveitamento)
     gerar_pagina_squads(
         dashboard_context["all_squads"],
         squad_reports_dir,
@@ -151,50 +267,52 @@ def gerar_ecossistema_de_relatorios(
     )
 
     # REFATORAÇÃO: Centraliza a geração de relatórios de visualização de CSV.
-    reports_to_generate = [
-        ("remediados.csv", FILENAME_SUCCESS, "Sucesso da Automação"),
-        (
-            "remediados_frequentes.csv",
-            FILENAME_INSTABILITY,
-            "Casos de Instabilidade Crônica",
-        ),
-        (
-            "pontos_de_atencao.csv",
-            "pontos_de_atencao.html",
-            "Pontos de Atenção na Automação",
-        ),
-    ]
+    reports_to_generate = list(RELATORIOS_CSV_VIEWER)
     if analysis_results["num_logs_invalidos"] > 0:
-        reports_to_generate.append(
-            (
-                LOG_INVALIDOS_FILENAME,
-                FILENAME_INVALID_LOGS_HTML,
-                "Alertas com Dados Inválidos",
-            )
-        )
+        reports_to_generate.append(RELATORIO_CSV_LOGS_INVALIDOS)
     _gerar_relatorios_csv_viewer(reports_to_generate, output_dir, frontend_url)
 
-    # Gera os planos de ação por squad e o plano de ação geral (atuar.html).
-    gerar_paginas_atuar_por_squad(df_atuacao, output_dir, frontend_url)
+    # Gera o plano de ação geral (atuar.html).
+    _gerar_pagina_atuar_geral(output_dir, frontend_url)
 
     logger.info("Geração do ecossistema de relatórios HTML concluída.")
     return summary_html_path
 
 
-def carregar_template_html(filepath: str) -> str:
-    """Carrega o conteúdo de um arquivo de template HTML de forma segura."""
-    logger.info(f"Carregando template de '{filepath}'...")
-    try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            return f.read()
-    except FileNotFoundError:
-        raise FileNotFoundError(
-            f"O arquivo de template HTML '{filepath}' não foi encontrado."
-        )
-    except Exception as e:
-        raise IOError(
-            f"Erro inesperado ao ler o arquivo de template '{filepath}': {e}"
-        ) from e
+def _gravar_metadados_execucao(
+    output_dir: str,
+    timestamp_str: str,
+    frontend_url: str,
+    num_logs_invalidos: int,
+    modo: str,
+):
+    """Grava os dados necessários para renderizar as demais páginas depois do upload."""
+    metadados = {
+        "modo": modo,
+        "timestamp_str": timestamp_str,
+        "frontend_url": frontend_url,
+        "num_logs_invalidos": int(num_logs_invalidos),
+    }
+    with open(
+        os.path.join(output_dir, FILENAME_RUN_METADATA), "w", encoding="utf-8"
+    ) as f:
+        json.dump(metadados, f, ensure_ascii=False, indent=2)
+
+
+def _gravar_modelo_visualizacao(
+    output_dir: str, dashboard_context: dict, analysis_results: dict, timestamp_str: str
+):
+    """Grava o modelo de visualização (JSON compacto) da execução."""
+    modelo = modelo_visualizacao.construir_modelo_visualizacao(
+        dashboard_context,
+        analysis_results["summary"],
+        analysis_results["df_atuacao"],
+        timestamp_str,
+    )
+    with open(
+        os.path.join(output_dir, FILENAME_VIEW_MODEL), "w", encoding="utf-8"
+    ) as f:
+        json.dump(modelo, f, ensure_ascii=False, separators=(",", ":"))
 
 
 def gerar_resumo_executivo(
@@ -208,15 +326,10 @@ def gerar_resumo_executivo(
     # Renderiza o corpo do HTML usando o contexto fornecido
     body_content = gerador_html.renderizar_resumo_executivo(context, frontend_url)
 
-    # Carrega o template principal
-    HTML_TEMPLATE = carregar_template_html(
-        os.path.join(BASE_TEMPLATE_DIR, MAIN_TEMPLATE)
-    )
-
     # Renderiza a página final e a salva
     footer_text = f"Relatório gerado em {timestamp_str}"
-    html_content = gerador_html.renderizar_template_string(
-        template_string=HTML_TEMPLATE,
+    html_content = gerador_html.renderizar_template(
+        MAIN_TEMPLATE,
         title=title,
         body_content=body_content,
         footer_text=footer_text,
@@ -225,175 +338,83 @@ def gerar_resumo_executivo(
         f.write(html_content)
     logger.info(f"Resumo executivo gerado: {output_path}")
 
-    output_dir = os.path.dirname(output_path)
-    try:
-        with open(
-            os.path.join(output_dir, FILENAME_JSON_SUMMARY), "r", encoding="utf-8"
-        ) as f:
-            json_content = f.read()
-        html_visualizador = gerador_html.renderizar_visualizador_json(json_content)
-        with open(
-            os.path.join(output_dir, FILENAME_JSON_VIEWER), "w", encoding="utf-8"
-        ) as f:
-            f.write(html_visualizador)
-        logger.info("Visualizador de JSON gerado: visualizador_json.html")
-    except Exception as e:
-        logger.warning(
-            f"Não foi possível ler o arquivo JSON para o visualizador. Erro: {e}"
-        )
-
 
-def gerar_relatorios_por_squad(  # type: ignore
-    df_atuacao: pd.DataFrame, output_dir: str, timestamp_str: str
-):
-    """Gera arquivos de relatório detalhado para cada squad com Casos que precisam de atuação."""
-    logger.info("Gerando relatórios detalhados por squad...")
-    if df_atuacao.empty:
-        logger.info("Nenhum caso precisa de atuação. Nenhum relatório de squad gerado.")
-        return
-
-    os.makedirs(output_dir, exist_ok=True)
-    emoji_map = {
-        ACAO_INTERMITENTE: "⚠️",
-        ACAO_FALHA_PERSISTENTE: "❌",
-        ACAO_STATUS_AUSENTE: "❓",
-        ACAO_INCONSISTENTE: "🔍",
-    }
-    footer_text = f"Relatório gerado em {timestamp_str}"
-
-    HTML_TEMPLATE = carregar_template_html(
-        os.path.join(BASE_TEMPLATE_DIR, MAIN_TEMPLATE)
+def _renderizar_pagina_squad(squad, output_dir: str, footer_text: str) -> list:
+    """
+    Renderiza e grava a página `squad-*.html` de uma squad e o fragmento JSON
+    com os detalhes dos seus Casos; retorna os caminhos (página, fragmento).
+    """
+    # CORREÇÃO: Restaurado o nome e caminho originais para os relatórios de squad.
+    # Esta função gera os relatórios detalhados (squad-*.html), não os planos de ação.
+    output_path = os.path.join(output_dir, f"squad-{squad.nome_sanitizado}.html")
+    detalhes_filename = f"squad-{squad.nome_sanitizado}{SUFIXO_DETALHES_SQUAD}"
+    detalhes_path = os.path.join(output_dir, detalhes_filename)
+
+    # A página é renderizada por macros Jinja e escrita em streaming a partir
+    # dos registros já agrupados e ordenados do modelo de renderização.
+    gerador_html.renderizar_template_em_arquivo(
+        SQUAD_TEMPLATE,
+        output_path,
+        title=f"Relatório da Squad: {escape(squad.nome)}",
+        footer_text=footer_text,
+        squad=squad,
+        top_problemas=_preparar_top_problemas_squad(squad.top_problemas),
+        emojis_acao=EMOJI_MAP_ATUACAO,
+        detalhes_url=detalhes_filename,
+        nivel=1,
     )
+    _gravar_detalhes_casos_squad(squad, detalhes_path)
+    logger.info(f"Relatório para a squad '{squad.nome}' gerado: {output_path}")
+    return [output_path, detalhes_path]
 
-    for squad_name, squad_df in df_atuacao.groupby(COL_ASSIGNMENT_GROUP, observed=True):
-        if squad_df.empty:
-            continue
 
-        # CORREÇÃO: Restaurado o nome e caminho originais para os relatórios de squad.
-        # Esta função gera os relatórios detalhados (squad-*.html), não os planos de ação.
-        sanitized_name = re.sub(r"[^a-zA-Z0-9_-]", "", squad_name.replace(" ", "_"))
-        # Garante que o diretório de squads exista.
-        os.makedirs(output_dir, exist_ok=True)
-        output_path = os.path.join(output_dir, f"squad-{sanitized_name}.html")
-        title = f"Relatório da Squad: {escape(squad_name)}"
-        total_alertas = squad_df["alert_count"].sum()
-
-        body_content = '<p><a href="../todas_as_squads.html">&larr; Voltar para Lista de Squads</a></p>'
-        body_content += f'<h2>Visão Geral da Squad - {escape(squad_name)}</h2><div class="grid-container">'
-        body_content += f'<div class="card kpi-card"><p class="kpi-value" style="color: var(--warning-color);">{len(squad_df)}</p><p class="kpi-label">Total de Casos</p></div>'
-        body_content += f'<div class="card kpi-card"><p class="kpi-value">{total_alertas}</p><p class="kpi-label">Total de Alertas Envolvidos</p></div></div>'
-        top_problemas_da_squad = (
-            squad_df.groupby(COL_SHORT_DESCRIPTION, observed=True)["alert_count"]
-            .sum()
-            .nlargest(10)
-        )
-        body_content += '<div class="card" style="margin-top: 20px;"><h3>Top Problemas da Squad</h3>'
-        if not top_problemas_da_squad.empty:
-            body_content += '<div class="bar-chart-container">'
-            min_prob_val, max_prob_val = (
-                top_problemas_da_squad.min(),
-                top_problemas_da_squad.max(),
-            )
-            for problem, count in top_problemas_da_squad.items():
-                bar_width = (count / max_prob_val) * 100 if max_prob_val > 0 else 0
-                background_color, text_color = gerador_html.gerar_cores_para_barra(
-                    count, min_prob_val, max_prob_val
-                )
-                body_content += f'<div class="bar-item"><div class="bar-label" title="{escape(problem)}">{escape(problem)}</div><div class="bar-wrapper"><div class="bar" style="width: {bar_width}%; background-color: {background_color}; color: {text_color};">{count}</div></div></div>'
-            body_content += "</div>"
-        else:
-            body_content += "<p>Nenhum problema recorrente para esta squad. ✅</p>"
-        body_content += "</div>"
-        body_content += "<h2>Detalhes por Categoria de Métrica</h2>"
+def _gravar_detalhes_casos_squad(squad, detalhes_path: str):
+    """
+    Grava o fragmento JSON com os alertas e a cronologia dos Casos de uma squad.
 
-        row_index = 0
-        metric_priority = (
-            squad_df.groupby(COL_METRIC_NAME, observed=True)["score_ponderado_final"]
-            .max()
-            .sort_values(ascending=False)
+    A página da squad não embute esses detalhes: as linhas expansíveis os
+    carregam deste arquivo, que só é baixado na primeira expansão. Cada Caso é
+    `[total de alertas, números dos alertas, cronologia formatada]`, na ordem
+    de `row_index` (o índice 1 é a primeira posição).
+    """
+    casos = [
+        [
+            int(caso.alert_count),
+            str(caso.alert_numbers),
+            " → ".join(
+                f"{TASK_STATUS_EMOJI_MAP.get(status, '⚪')} {status}"
+                for status in caso.status_chronology
+            ),
+        ]
+        for metrica in squad.metricas
+        for problema in metrica.problemas
+        for caso in problema.casos
+    ]
+    with open(detalhes_path, "w", encoding="utf-8") as f:
+        json.dump({"casos": casos}, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def _preparar_top_problemas_squad(top_problemas: list) -> list:
+    """Calcula as barras do gráfico 'Top Problemas da Squad'."""
+    if not top_problemas:
+        return []
+    totais = [total for _, total in top_problemas]
+    min_prob_val, max_prob_val = min(totais), max(totais)
+    barras = []
+    for problem, count in top_problemas:
+        background_color, text_color = gerador_html.gerar_cores_para_barra(
+            count, min_prob_val, max_prob_val
         )
-        for metric_name in metric_priority.index:
-            metric_group_df = squad_df[squad_df[COL_METRIC_NAME] == metric_name]
-            num_problems_in_metric = metric_group_df[COL_SHORT_DESCRIPTION].nunique()
-            body_content += f'<button type="button" class="collapsible collapsible-metric"><span class="emoji">📁</span>{escape(metric_name)}<span class="instance-count">{num_problems_in_metric} {"tipos de problema" if num_problems_in_metric > 1 else "tipo de problema"}</span></button><div class="metric-content">'
-            problem_priority = (
-                metric_group_df.groupby(COL_SHORT_DESCRIPTION, observed=True)[
-                    "score_ponderado_final"
-                ]
-                .max()
-                .sort_values(ascending=False)
-            )
-            for problem_desc in problem_priority.index:
-                problem_group_df = metric_group_df[
-                    metric_group_df[COL_SHORT_DESCRIPTION] == problem_desc
-                ]
-                if problem_group_df.empty:
-                    continue
-                acao_principal = problem_group_df["acao_sugerida"].iloc[0]
-                emoji = emoji_map.get(acao_principal, "⚙️")
-                num_instances = len(problem_group_df)
-                total_alertas_problema = problem_group_df["alert_count"].sum()
-                body_content += f"""
-                <button type="button" class="collapsible collapsible-problem">
-                    <span class="emoji">{emoji}</span>
-                    {escape(problem_desc)}
-                    <span class="instance-count">{num_instances} {"Casos" if num_instances > 1 else "caso"} / {total_alertas_problema} alertas</span>
-                </button>
-                <div class="content">
-                    <table>
-                        <thead>
-                            <tr>
-                                <th class="priority-col">Prioridade</th>
-                                <th>Recurso (CI) / Nó</th>
-                                <th>Ação Sugerida</th>
-                                <th>Período</th>
-                                <th>Alertas</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                """
-                problem_group_df = problem_group_df.sort_values(
-                    by="alert_count", ascending=False
-                )
-                for _, row in problem_group_df.iterrows():
-                    row_index += 1
-                    target_id = f"details-row-{row_index}"
-                    recurso_info = f"<strong>{escape(row[COL_CMDB_CI])}</strong>"
-                    if row[COL_NODE] != row[COL_CMDB_CI]:
-                        recurso_info += f"<br><small style='color:var(--text-secondary-color)'>{escape(row[COL_NODE])}</small>"
-                    acao_info = f"<span class='emoji'>{emoji_map.get(row['acao_sugerida'], '⚙️')}</span> {escape(str(row['acao_sugerida']))}"
-                    periodo_info = f"{row['first_event'].strftime('%d/%m %H:%M')} a<br>{row['last_event'].strftime('%d/%m %H:%M')}"
-                    priority_score_html = f"<td class='priority-col' style='color: {gerador_html.gerar_cores_para_barra(row['score_ponderado_final'], 0, 20)[0]};'>{row['score_ponderado_final']:.1f}</td>"
-                    body_content += f'<tr class="expandable-row" data-target="#{target_id}">{priority_score_html}<td>{recurso_info}</td><td>{acao_info}</td><td>{periodo_info}</td><td>{row["alert_count"]}</td></tr>'
-                    # NOVO: Mapa de emojis para os status de tasks
-                    task_status_emoji_map = {
-                        "Closed": "✅",
-                        "Closed Incomplete": "❌",
-                        "Closed Skipped": "⏭️",
-                        "Canceled": "🚫",
-                        "Open": "⏳",
-                        "No Task Found": "❓",
-                    }
-                    formatted_chronology = []
-                    for status in row["status_chronology"]:
-                        # A validação de dados agora ocorre na carga, então aqui apenas formatamos.
-                        emoji = task_status_emoji_map.get(status, "⚪")
-                        formatted_chronology.append(f"{emoji} {escape(str(status))}")
-
-                    cronologia_info = f"<code>{' → '.join(formatted_chronology)}</code>"
-                    alertas_info = f"<code>{escape(row['alert_numbers'])}</code>"
-                    body_content += f'<tr id="{target_id}" class="details-row"><td colspan="5"><div class="details-row-content"><p><strong>Alertas Envolvidos ({row["alert_count"]}):</strong> {alertas_info}</p><p><strong>Cronologia:</strong> {cronologia_info}</p></div></td></tr>'
-                body_content += "</tbody></table></div>"  # Fim da tabela de um problema
-            body_content += "</div>"  # Fim do metric-content
-        html_content = gerador_html.renderizar_template_string(
-            template_string=HTML_TEMPLATE,
-            title=title,
-            body_content=body_content,
-            footer_text=footer_text,
+        barras.append(
+            {
+                "nome": problem,
+                "total": count,
+                "largura": (count / max_prob_val) * 100 if max_prob_val > 0 else 0,
+                "cor_fundo": background_color,
+                "cor_texto": text_color,
+            }
         )
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(html_content)
-        logger.info(f"Relatório para a squad '{squad_name}' gerado: {output_path}")
+    return barras
 
 
 def gerar_pagina_squads(  # type: ignore
@@ -436,12 +457,8 @@ def gerar_pagina_squads(  # type: ignore
     body_content += "</div>"
     footer_text = f"Relatório gerado em {timestamp_str}"
 
-    HTML_TEMPLATE = carregar_template_html(
-        os.path.join(BASE_TEMPLATE_DIR, MAIN_TEMPLATE)
-    )
-
-    html_content = gerador_html.renderizar_template_string(
-        template_string=HTML_TEMPLATE,
+    html_content = gerador_html.renderizar_template(
+        MAIN_TEMPLATE,
         title=title,
         body_content=body_content,
         footer_text=footer_text,
@@ -451,6 +468,84 @@ def gerar_pagina_squads(  # type: ignore
     logger.info(f"Página de squads gerada: {output_path}")
 
 
+def _formatar_link_squad(
+    df: pd.DataFrame, celulas: pd.DataFrame, squad_reports_dir_name: str
+) -> pd.Series:
+    """Gera, de forma vetorizada, o link para o relatório da squad de cada Caso."""
+    caminhos = formatacao_html.mapear_valores_distintos(
+        df[COL_ASSIGNMENT_GROUP],
+        lambda squad: (
+            f"../{squad_reports_dir_name}/squad-{modelo_renderizacao.sanitizar_nome(str(squad))}.html"
+        ),
+    )
+    return '<a href="' + caminhos + '">' + celulas["squad_nome"] + "</a>"
+
+
+def _agrupar_linhas_html(
+    df: pd.DataFrame, linhas: pd.Series, coluna_grupo: str, nomes: pd.Index
+) -> pd.DataFrame:
+    """
+    Agrupa, com um único groupby, as linhas HTML já formatadas por `coluna_grupo`.
+
+    Returns:
+        DataFrame indexado pelo valor do grupo, com as colunas `casos` (quantidade),
+        `alertas` (soma de `alert_count`) e `html` (linhas concatenadas, na ordem de `df`).
+    """
+    agrupado = (
+        df[[coluna_grupo, "alert_count"]]
+        .assign(_linha=linhas)
+        .groupby(coluna_grupo, sort=False, observed=True)
+        .agg(
+            casos=("_linha", "size"),
+            alertas=("alert_count", "sum"),
+            html=("_linha", "".join),
+        )
+    )
+    return agrupado[agrupado.index.isin(nomes)]
+
+
+def _arquivo_detalhe_problema(file_prefix: str, problem_desc: str) -> str:
+    """Nome do arquivo da página de detalhe de um problema."""
+    sanitized_name = re.sub(r"[^a-zA-Z0-9_-]", "", problem_desc[:50].replace(" ", "_"))
+    return f"detalhe_{file_prefix}{sanitized_name}.html"
+
+
+def _arquivo_detalhe_metrica(metric_name: str) -> str:
+    """Nome do arquivo da página de detalhe de uma métrica."""
+    sanitized_name = re.sub(r"[^a-zA-Z0-9_-]", "", metric_name.replace(" ", "_"))
+    return f"detalhe_metrica_{sanitized_name}.html"
+
+
+def _filtrar_paginas_reaproveitadas(
+    reaproveitamento: ReaproveitamentoPaginas,
+    df: pd.DataFrame,
+    coluna_grupo: str,
+    nomes: pd.Index,
+    caminho_pagina,
+    tipo: str,
+    footer_text: str,
+) -> pd.Index:
+    """
+    Reaproveita as páginas de detalhe cujas fatias de `df` não mudaram, com o
+    rodapé `footer_text`.
+
+    Returns:
+        Os nomes de `nomes` cujas páginas ainda precisam ser renderizadas.
+    """
+    fatias = dict(tuple(df.groupby(coluna_grupo, sort=False, observed=True)))
+    pendentes = []
+    for nome in nomes:
+        if nome not in fatias:
+            continue
+        arquivo = os.path.relpath(
+            caminho_pagina(nome), reaproveitamento.output_dir
+        ).replace(os.sep, "/")
+        hash_pagina = reaproveitamento.hash_fatia(tipo, arquivo, fatias[nome])
+        if not reaproveitamento.reaproveitar([arquivo], hash_pagina, footer_text):
+            pendentes.append(nome)
+    return pd.Index(pendentes, dtype=object)
+
+
 def gerar_paginas_detalhe_problema(  # type: ignore
     df_source: pd.DataFrame,
     problem_list: pd.Index,
@@ -459,8 +554,14 @@ def gerar_paginas_detalhe_problema(  # type: ignore
     file_prefix: str,
     squad_reports_dir_name: str,
     timestamp_str: str,
+    reaproveitamento: ReaproveitamentoPaginas | None = None,
 ):
-    """Gera páginas de detalhe para uma lista de problemas específicos."""
+    """Gera páginas de detalhe para uma lista de problemas específicos.
+
+    Com `reaproveitamento`, as páginas cujos Casos não mudaram desde a execução
+    anterior são vinculadas de lá (com o rodapé desta execução) e apenas as
+    demais são renderizadas.
+    """
     if problem_list.empty:
         return
     os.makedirs(output_dir, exist_ok=True)
@@ -473,55 +574,74 @@ def gerar_paginas_detalhe_problema(  # type: ignore
         ACAO_ESTABILIZADA: "✅",
         "🔁": "🔁",
     }
-
-    HTML_TEMPLATE = carregar_template_html(
-        os.path.join(BASE_TEMPLATE_DIR, MAIN_TEMPLATE)
-    )
     footer_text = f"Relatório gerado em {timestamp_str}"
 
     logger.info(f"Gerando páginas de detalhe para o contexto: '{file_prefix}'...")
-    for problem_desc in problem_list:
-        sanitized_name = re.sub(
-            r"[^a-zA-Z0-9_-]", "", problem_desc[:50].replace(" ", "_")
+    # Seleciona de uma vez os Casos de todos os problemas listados e formata as
+    # células de forma vetorizada; as páginas são montadas a partir de um único groupby.
+    problems_df = df_source[
+        df_source[COL_SHORT_DESCRIPTION].isin(problem_list)
+    ].sort_values(by="alert_count", ascending=False, kind="mergesort")
+    if reaproveitamento is not None:
+        problem_list = _filtrar_paginas_reaproveitadas(
+            reaproveitamento,
+            problems_df,
+            COL_SHORT_DESCRIPTION,
+            problem_list,
+            lambda nome: os.path.join(
+                output_dir, _arquivo_detalhe_problema(file_prefix, nome)
+            ),
+            f"detalhe:{summary_filename}:{squad_reports_dir_name}",
+            footer_text,
         )
+        if problem_list.empty:
+            return
+        problems_df = problems_df[problems_df[COL_SHORT_DESCRIPTION].isin(problem_list)]
+    celulas = formatacao_html.formatar_celulas_caso(problems_df, emoji_map)
+    if "acao_sugerida" in problems_df.columns:
+        linkar_squad = problems_df["acao_sugerida"].isin(ACAO_FLAGS_ATUACAO)
+    else:
+        linkar_squad = pd.Series(False, index=problems_df.index)
+    squad_info = _formatar_link_squad(
+        problems_df, celulas, squad_reports_dir_name
+    ).where(linkar_squad, celulas["squad_nome"])
+    linhas = (
+        "<tr><td>"
+        + celulas["recurso"]
+        + "</td><td>"
+        + celulas["acao"]
+        + "</td><td>"
+        + celulas["periodo"]
+        + "</td><td>"
+        + celulas["alertas"]
+        + "</td><td>"
+        + squad_info
+        + "</td></tr>"
+    )
+    linhas_por_problema = _agrupar_linhas_html(
+        problems_df, linhas, COL_SHORT_DESCRIPTION, problem_list
+    )
+
+    for problem_desc in problem_list:
+        if problem_desc not in linhas_por_problema.index:
+            continue
+        total_instances, total_alerts, linhas_html = linhas_por_problema.loc[
+            problem_desc
+        ]
         output_path = os.path.join(
-            output_dir, f"detalhe_{file_prefix}{sanitized_name}.html"
+            output_dir, _arquivo_detalhe_problema(file_prefix, problem_desc)
         )
-        problem_df = df_source[
-            df_source[COL_SHORT_DESCRIPTION] == problem_desc
-        ].sort_values(by="alert_count", ascending=False)
-        if problem_df.empty:
-            continue
-        total_alerts = problem_df["alert_count"].sum()
-        total_instances = len(problem_df)
         title = f"Resumo do Problema: {escape(problem_desc)}"
         body_content = f'<p><a href="../{summary_filename}">&larr; Voltar para o Dashboard</a></p><h2>{escape(problem_desc)}</h2><p>Total de alertas: <strong>{total_alerts}</strong> | Casos distintos: <strong>{total_instances}</strong></p>'
         body_content += "<table><thead><tr><th>Recurso (CI) / Nó</th><th>Ação Sugerida</th><th>Período</th><th>Total de Alertas</th><th>Squad</th></tr></thead><tbody>"
-        for _, row in problem_df.iterrows():
-            recurso_info = f"<strong>{escape(row[COL_CMDB_CI])}</strong>"
-            if row[COL_NODE] != row[COL_CMDB_CI]:
-                recurso_info += f"<br><small style='color:var(--text-secondary-color)'>{escape(row[COL_NODE])}</small>"
-            acao_sugerida = row.get("acao_sugerida", UNKNOWN)
-            acao_info = f"<span class='emoji'>{emoji_map.get(acao_sugerida, '⚙️')}</span> {escape(str(acao_sugerida))}"
-            periodo_info = f"{row['first_event'].strftime('%d/%m %H:%M')} a<br>{row['last_event'].strftime('%d/%m %H:%M')}"
-            squad_name = row[COL_ASSIGNMENT_GROUP]
-            if acao_sugerida in ACAO_FLAGS_ATUACAO:
-                sanitized_squad_name = re.sub(
-                    r"[^a-zA-Z0-9_-]", "", squad_name.replace(" ", "_")
-                )
-                report_path = (
-                    f"../{squad_reports_dir_name}/squad-{sanitized_squad_name}.html"
-                )
-                squad_info = f'<a href="{report_path}">{escape(squad_name)}</a>'
-            else:
-                squad_info = escape(squad_name)
-            body_content += f"<tr><td>{recurso_info}</td><td>{acao_info}</td><td>{periodo_info}</td><td>{row['alert_count']}</td><td>{squad_info}</td></tr>"
+        body_content += linhas_html
         body_content += "</tbody></table>"  # Fim da tabela
-        html_content = gerador_html.renderizar_template_string(
-            template_string=HTML_TEMPLATE,
+        html_content = gerador_html.renderizar_template(
+            MAIN_TEMPLATE,
             title=title,
             body_content=body_content,
             footer_text=footer_text,
+            nivel=1,
         )
         with open(output_path, "w", encoding="utf-8") as f:
             f.write(html_content)
@@ -537,6 +657,7 @@ def gerar_paginas_detalhe_metrica(  # type: ignore
     summary_filename: str,
     squad_reports_dir_name: str,
     timestamp_str: str,
+    reaproveitamento: ReaproveitamentoPaginas | None = None,
 ):
     """Gera páginas de detalhe para categorias de métricas com Casos em aberto."""
     if metric_list.empty:
@@ -548,48 +669,59 @@ def gerar_paginas_detalhe_metrica(  # type: ignore
         ACAO_STATUS_AUSENTE: "❓",
         ACAO_INCONSISTENTE: "🔍",
     }
-
-    HTML_TEMPLATE = carregar_template_html(
-        os.path.join(BASE_TEMPLATE_DIR, MAIN_TEMPLATE)
-    )
     footer_text = f"Relatório gerado em {timestamp_str}"
 
     logger.info("Gerando páginas de detalhe para Métricas em Aberto...")
+    metrics_df = df_atuacao_source[
+        df_atuacao_source[COL_METRIC_NAME].isin(metric_list)
+    ].sort_values(by="last_event", ascending=False, kind="mergesort")
+    if reaproveitamento is not None:
+        metric_list = _filtrar_paginas_reaproveitadas(
+            reaproveitamento,
+            metrics_df,
+            COL_METRIC_NAME,
+            metric_list,
+            lambda nome: os.path.join(output_dir, _arquivo_detalhe_metrica(nome)),
+            f"detalhe:{summary_filename}:{squad_reports_dir_name}",
+            footer_text,
+        )
+        if metric_list.empty:
+            return
+        metrics_df = metrics_df[metrics_df[COL_METRIC_NAME].isin(metric_list)]
+    celulas = formatacao_html.formatar_celulas_caso(metrics_df, emoji_map)
+    linhas = (
+        "<tr><td>"
+        + celulas["recurso"]
+        + "</td><td>"
+        + celulas["acao"]
+        + "</td><td>"
+        + celulas["periodo"]
+        + "</td><td>"
+        + formatacao_html.escapar_serie(metrics_df[COL_SHORT_DESCRIPTION])
+        + "</td><td>"
+        + _formatar_link_squad(metrics_df, celulas, squad_reports_dir_name)
+        + "</td></tr>"
+    )
+    linhas_por_metrica = _agrupar_linhas_html(
+        metrics_df, linhas, COL_METRIC_NAME, metric_list
+    )
+
     for metric_name in metric_list:
-        sanitized_name = re.sub(r"[^a-zA-Z0-9_-]", "", metric_name.replace(" ", "_"))
-        output_path = os.path.join(output_dir, f"detalhe_metrica_{sanitized_name}.html")
-        metric_df = df_atuacao_source[
-            df_atuacao_source[COL_METRIC_NAME] == metric_name
-        ].sort_values(by="last_event", ascending=False)
-        if metric_df.empty:
+        if metric_name not in linhas_por_metrica.index:
             continue
-        total_instances = len(metric_df)
+        total_instances, _, linhas_html = linhas_por_metrica.loc[metric_name]
+        output_path = os.path.join(output_dir, _arquivo_detalhe_metrica(metric_name))
         title = f"Detalhe da Métrica em Aberto: {escape(metric_name)}"
         body_content = f'<p><a href="../{summary_filename}">&larr; Voltar para o Dashboard</a></p><h2>{escape(metric_name)}</h2><p>Total de Casos em aberto: <strong>{total_instances}</strong></p>'
         body_content += "<table><thead><tr><th>Recurso (CI) / Nó</th><th>Ação Sugerida</th><th>Período</th><th>Problema</th><th>Squad</th></tr></thead><tbody>"
-        for _, row in metric_df.iterrows():
-            recurso_info = f"<strong>{escape(row[COL_CMDB_CI])}</strong>"
-            if row[COL_NODE] != row[COL_CMDB_CI]:
-                recurso_info += f"<br><small style='color:var(--text-secondary-color)'>{escape(row[COL_NODE])}</small>"
-            acao_sugerida = row.get("acao_sugerida", UNKNOWN)
-            acao_info = f"<span class='emoji'>{emoji_map.get(acao_sugerida, '⚙️')}</span> {escape(str(acao_sugerida))}"
-            periodo_info = f"{row['first_event'].strftime('%d/%m %H:%M')} a<br>{row['last_event'].strftime('%d/%m %H:%M')}"
-            squad_name = row[COL_ASSIGNMENT_GROUP]
-            sanitized_squad_name = re.sub(
-                r"[^a-zA-Z0-9_-]", "", squad_name.replace(" ", "_")
-            )
-            report_path = (
-                f"../{squad_reports_dir_name}/squad-{sanitized_squad_name}.html"
-            )
-            squad_info = f'<a href="{report_path}">{escape(squad_name)}</a>'
-            problema_info = escape(row[COL_SHORT_DESCRIPTION])
-            body_content += f"<tr><td>{recurso_info}</td><td>{acao_info}</td><td>{periodo_info}</td><td>{problema_info}</td><td>{squad_info}</td></tr>"  # Fim da linha
+        body_content += linhas_html
         body_content += "</tbody></table>"  # Fim da tabela
-        html_content = gerador_html.renderizar_template_string(
-            template_string=HTML_TEMPLATE,
+        html_content = gerador_html.renderizar_template(
+            MAIN_TEMPLATE,
             title=title,
             body_content=body_content,
             footer_text=footer_text,
+            nivel=1,
         )
         with open(output_path, "w", encoding="utf-8") as f:
             f.write(html_content)
@@ -606,36 +738,24 @@ def gerar_pagina_visualizacao_csv(
     """Gera uma página HTML genérica para visualização de um arquivo CSV."""
     csv_path = os.path.join(output_dir, csv_filename)
     output_html_path = os.path.join(output_dir, output_html_filename)
-    # CORREÇÃO: Usa o template genérico e correto para visualizadores de CSV.
-    viewer_template_path = os.path.join(BASE_TEMPLATE_DIR, "csv_viewer_template.html")
 
     logger.info(f"Gerando página de visualização para '{csv_filename}'...")
 
-    try:
-        with open(csv_path, "r", encoding="utf-8") as f:
-            csv_content = f.read().lstrip()
-    except FileNotFoundError:
-        csv_content = ""
+    if not os.path.exists(csv_path):
         logger.warning(f"Arquivo '{csv_path}' não encontrado. Gerando página vazia.")
 
-    try:
-        # Carrega o template do visualizador (que contém o placeholder para o CSV)
-        template_str = carregar_template_html(viewer_template_path)
-
-        # CORREÇÃO: Usa o renderizador Jinja2 em vez de .format() para evitar o KeyError.
-        # Isso trata o CSS e os placeholders de forma segura.
-        html_content = gerador_html.renderizar_template_string(
-            template_string=template_str,
-            page_title=page_title,
-            csv_filename=csv_filename,
-            back_link_url=frontend_url,
-            csv_data_payload=csv_content.replace("`", "\\`"),  # Escapa para o JS
-        )
-        with open(output_html_path, "w", encoding="utf-8") as f_out:
-            f_out.write(html_content)
-
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Template '{viewer_template_path}' não encontrado.")
+    # As linhas não são mais embutidas no HTML: a página busca cada página de
+    # dados na API de tabelas do relatório (ver `tabelas_relatorio`).
+    html_content = gerador_html.renderizar_template(
+        CSV_VIEWER_TEMPLATE,
+        page_title=page_title,
+        csv_filename=csv_filename,
+        csv_path=csv_filename,
+        page_size=CSV_VIEWER_PAGE_SIZE,
+        back_link_url=frontend_url,
+    )
+    with open(output_html_path, "w", encoding="utf-8") as f_out:
+        f_out.write(html_content)
     logger.info(
         f"Página de visualização '{output_html_filename}' gerada: {output_html_path}"
     )
@@ -673,74 +793,241 @@ def _gerar_relatorios_csv_viewer(
             )
 
 
-def gerar_paginas_atuar_por_squad(
-    df_atuacao: pd.DataFrame, output_dir: str, frontend_url: str
-):
-    """Gera arquivos de atuação (CSV e HTML) filtrados para cada squad."""
-    if df_atuacao.empty:
-        return
-
-    logger.info("Gerando páginas de atuação filtradas por squad...")
-    viewer_template_path = os.path.join(BASE_TEMPLATE_DIR, "csv_viewer_template.html")
+def _gerar_plano_de_acao_squad(
+    squad_name: str, squad_df: pd.DataFrame, planos_dir: str
+) -> list:
+    """Grava o plano de ação (CSV e visualizador HTML) de uma squad; retorna os caminhos."""
+    sanitized_name = re.sub(r"[^a-zA-Z0-9_-]", "", squad_name.replace(" ", "_"))
+    # CORREÇÃO: Define o diretório e o nome do arquivo corretamente.
+    os.makedirs(planos_dir, exist_ok=True)
+    csv_filename = f"plano-de-acao-{sanitized_name}.csv"
+    html_filename = f"plano-de-acao-{sanitized_name}.html"
+    csv_path = os.path.join(planos_dir, csv_filename)
+    html_path = os.path.join(planos_dir, html_filename)
+
+    df_to_save = squad_df.copy()
+    # REUTILIZAÇÃO: Usa a função _save_csv para garantir a consistência
+    # na formatação e seleção de colunas.
+    _save_csv(df_to_save, csv_path, "score_ponderado_final", FULL_EMOJI_MAP, False)
+
+    # 2. Gera o HTML correspondente, que carrega as linhas do CSV pela API.
+    final_html = gerador_html.renderizar_template(
+        CSV_VIEWER_TEMPLATE,
+        page_title=f"Plano de Ação: {squad_name}",
+        csv_filename=csv_filename,
+        csv_path=f"{REPORTS_DIR_PLANS}/{csv_filename}",
+        page_size=CSV_VIEWER_PAGE_SIZE,
+        nivel=1,
+        back_link_url="../resumo_geral.html",  # CORREÇÃO: Usa um caminho relativo para voltar ao dashboard do relatório.
+    )
 
-    template_content = carregar_template_html(viewer_template_path)
+    with open(html_path, "w", encoding="utf-8") as f_out:
+        f_out.write(final_html)
+    return [csv_path, html_path]
 
-    for squad_name, squad_df in df_atuacao.groupby(COL_ASSIGNMENT_GROUP, observed=True):
-        if squad_df.empty:
-            continue
 
-        sanitized_name = re.sub(r"[^a-zA-Z0-9_-]", "", squad_name.replace(" ", "_"))
-        # CORREÇÃO: Define o diretório e o nome do arquivo corretamente.
-        planos_dir = os.path.join(output_dir, REPORTS_DIR_PLANS)
-        os.makedirs(planos_dir, exist_ok=True)
-        csv_filename = f"plano-de-acao-{sanitized_name}.csv"
-        html_filename = f"plano-de-acao-{sanitized_name}.html"
-        csv_path = os.path.join(planos_dir, csv_filename)
-        html_path = os.path.join(planos_dir, html_filename)
-
-        df_to_save = squad_df.copy()
-        # REUTILIZAÇÃO: Usa a função _save_csv para garantir a consistência
-        # na formatação e seleção de colunas.
-        _save_csv(df_to_save, csv_path, "score_ponderado_final", FULL_EMOJI_MAP, False)
-
-        # 2. Gera o HTML correspondente
-        # CORREÇÃO: Lê o conteúdo do CSV recém-criado para injetar no HTML.
-        with open(csv_path, "r", encoding="utf-8") as f:
-            csv_content = f.read().lstrip()
+def _gerar_pagina_atuar_geral(output_dir: str, frontend_url: str):
+    """Gera o arquivo atuar.html geral, se houver dados em atuar.csv."""
+    geral_atuar_csv_path = os.path.join(output_dir, "atuar.csv")
+    if not os.path.exists(geral_atuar_csv_path):
+        return
+    with open(geral_atuar_csv_path, "r", encoding="utf-8") as f:
+        # Basta saber se há alguma linha além do cabeçalho, sem ler o arquivo todo.
+        linhas = (linha for linha in f if linha.strip())
+        possui_dados = next(linhas, None) is not None and next(linhas, None) is not None
 
+    if possui_dados:
+        atuar_html_path = os.path.join(output_dir, FILENAME_ACTION_PLAN)
         # CORREÇÃO: Usa o renderizador Jinja2 em vez de .format() para evitar o KeyError. # noqa: E501
-        final_html = gerador_html.renderizar_template_string(
-            template_string=template_content,
-            page_title=f"Plano de Ação: {squad_name}",
-            csv_filename=csv_filename,
-            back_link_url="../resumo_geral.html",  # CORREÇÃO: Usa um caminho relativo para voltar ao dashboard do relatório.
-            # Escapa para o JS
-            csv_data_payload=csv_content.replace("`", "\\`"),
+        final_html = gerador_html.renderizar_template(
+            CSV_VIEWER_TEMPLATE,
+            page_title="Plano de Ação Geral",
+            csv_filename="atuar.csv",
+            csv_path="atuar.csv",
+            page_size=CSV_VIEWER_PAGE_SIZE,
+            back_link_url=frontend_url,  # CORREÇÃO: Aponta para a raiz da SPA
         )
 
-        with open(html_path, "w", encoding="utf-8") as f_out:
+        with open(atuar_html_path, "w", encoding="utf-8") as f_out:
             f_out.write(final_html)
 
-    # Adicional: Gera o arquivo atuar.html geral, se houver dados.
-    geral_atuar_csv_path = os.path.join(output_dir, "atuar.csv")
-    csv_content = ""  # Garante que a variável seja reiniciada
-    if os.path.exists(geral_atuar_csv_path):
-        with open(geral_atuar_csv_path, "r", encoding="utf-8") as f:
-            csv_content = f.read().lstrip()
-
-        if len(csv_content.splitlines()) > 1:
-            atuar_html_path = os.path.join(output_dir, FILENAME_ACTION_PLAN)
-            # CORREÇÃO: Usa o renderizador Jinja2 em vez de .format() para evitar o KeyError. # noqa: E501
-            final_html = gerador_html.renderizar_template_string(
-                template_string=template_content,
-                page_title="Plano de Ação Geral",
-                csv_filename="atuar.csv",
-                back_link_url=frontend_url,  # CORREÇÃO: Aponta para a raiz da SPA
-                # Escapa para o JS
-                csv_data_payload=csv_content.replace("`", "\\`"),
+
+# =============================================================================
+# RENDERIZAÇÃO POR SQUAD (SÉRIE OU PARALELA)
+# =============================================================================
+
+
+def _renderizar_artefatos_squad(tarefa: dict) -> dict:
+    """
+    Gera todos os artefatos de uma squad: página do relatório e plano de ação.
+
+    Executada tanto no processo principal (modo em série) quanto nos workers do
+    `ProcessPoolExecutor`; por isso recebe apenas os registros já fatiados da
+    squad e é definida no nível do módulo (serializável por pickle).
+
+    Returns:
+        Entrada do manifesto: nome da squad e caminhos gerados (relativos a `output_dir`).
+    """
+    squad = tarefa["squad"]
+    output_dir = tarefa["output_dir"]
+    arquivos = _renderizar_pagina_squad(
+        squad,
+        os.path.join(output_dir, REPORTS_DIR_SQUADS),
+        tarefa["footer_text"],
+    )
+    arquivos += _gerar_plano_de_acao_squad(
+        squad.nome, tarefa["plano_df"], os.path.join(output_dir, REPORTS_DIR_PLANS)
+    )
+    return {
+        "squad": squad.nome,
+        "arquivos": [
+            os.path.relpath(caminho, output_dir).replace(os.sep, "/")
+            for caminho in arquivos
+        ],
+    }
+
+
+def _arquivos_squad(nome_sanitizado: str) -> list:
+    """Artefatos de uma squad, relativos à execução, na ordem em que são gerados."""
+    return [
+        f"{REPORTS_DIR_SQUADS}/squad-{nome_sanitizado}.html",
+        f"{REPORTS_DIR_SQUADS}/squad-{nome_sanitizado}{SUFIXO_DETALHES_SQUAD}",
+        f"{REPORTS_DIR_PLANS}/plano-de-acao-{nome_sanitizado}.csv",
+        f"{REPORTS_DIR_PLANS}/plano-de-acao-{nome_sanitizado}.html",
+    ]
+
+
+def gerar_paginas_por_squad(
+    df_atuacao: pd.DataFrame,
+    output_dir: str,
+    timestamp_str: str,
+    workers: int | None = None,
+    modelo_squads: list | None = None,
+    reaproveitamento: ReaproveitamentoPaginas | None = None,
+) -> list:
+    """
+    Gera as páginas de relatório e os planos de ação de todas as squads.
+
+    Com `workers` > 1, cada squad é enviada a um worker de um
+    `ProcessPoolExecutor` junto apenas com seus próprios registros. A saída é
+    idêntica (byte a byte) à do modo em série, pois ambos executam a mesma
+    função por squad.
+
+    Cada squad recebe um hash dos seus registros (gravado no manifesto); com
+    `reaproveitamento`, as squads cujo hash não mudou desde a execução anterior
+    têm seus artefatos vinculados de lá (com o rodapé desta execução) e não são
+    renderizadas.
+
+    Args:
+        df_atuacao: DataFrame com os Casos que precisam de atuação.
+        output_dir: Diretório raiz da execução.
+        timestamp_str: Data/hora de geração exibida no rodapé.
+        workers: Número de processos. Se omitido, usa `RENDER_WORKERS`.
+        modelo_squads: Modelo de renderização já construído (opcional).
+        reaproveitamento: Páginas da execução anterior que podem ser reaproveitadas.
+
+    Returns:
+        O manifesto: uma entrada por squad, na ordem alfabética das squads (ver
+        `gravar_manifesto_renderizacao`).
+    """
+    if df_atuacao.empty:
+        logger.info("Nenhum caso precisa de atuação. Nenhuma página de squad gerada.")
+        return []
+    if reaproveitamento is None:
+        reaproveitamento = ReaproveitamentoPaginas(output_dir)
+
+    os.makedirs(os.path.join(output_dir, REPORTS_DIR_SQUADS), exist_ok=True)
+    os.makedirs(os.path.join(output_dir, REPORTS_DIR_PLANS), exist_ok=True)
+    footer_text = f"Relatório gerado em {timestamp_str}"
+    manifesto = {}
+    pendentes = set()
+    for nome, registros in df_atuacao.groupby(COL_ASSIGNMENT_GROUP, observed=True):
+        arquivos = _arquivos_squad(modelo_renderizacao.sanitizar_nome(nome))
+        manifesto[nome] = {"squad": nome, "arquivos": arquivos}
+        hash_squad = reaproveitamento.hash_fatia("squad", nome, registros)
+        if not reaproveitamento.reaproveitar(arquivos, hash_squad, footer_text):
+            pendentes.add(nome)
+
+    if pendentes:
+        # Apenas as squads alteradas passam pelo modelo e pela renderização.
+        df_pendentes = df_atuacao[df_atuacao[COL_ASSIGNMENT_GROUP].isin(pendentes)]
+        if modelo_squads is None:
+            modelo_squads = modelo_renderizacao.construir_modelo_squads(
+                df_pendentes, EMOJI_MAP_ATUACAO
+            )
+        else:
+            modelo_squads = [s for s in modelo_squads if s.nome in pendentes]
+        # Envia para cada worker apenas as colunas usadas pelo plano de ação.
+        colunas_plano = [
+            c for c in colunas_essenciais_relatorio if c in df_atuacao.columns
+        ]
+        fatias = dict(
+            tuple(
+                df_pendentes[colunas_plano].groupby(COL_ASSIGNMENT_GROUP, observed=True)
             )
+        )
+        tarefas = [
+            {
+                "squad": squad,
+                "plano_df": fatias[squad.nome],
+                "output_dir": output_dir,
+                "footer_text": footer_text,
+            }
+            for squad in modelo_squads
+        ]
+
+        workers = RENDER_WORKERS if workers is None else workers
+        workers = max(1, min(workers, len(tarefas)))
+        if workers == 1:
+            logger.info(f"Renderizando {len(tarefas)} squads em série...")
+            renderizadas = [_renderizar_artefatos_squad(tarefa) for tarefa in tarefas]
+        else:
+            logger.info(
+                f"Renderizando {len(tarefas)} squads em paralelo ({workers} processos)..."
+            )
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                renderizadas = list(executor.map(_renderizar_artefatos_squad, tarefas))
+        for entrada in renderizadas:
+            manifesto[entrada["squad"]] = entrada
+
+    manifesto = list(manifesto.values())
+    logger.info(
+        f"Páginas por squad geradas: {len(manifesto)} squads "
+        f"({len(manifesto) - len(pendentes)} reaproveitadas da execução anterior)."
+    )
+    return manifesto
 
-            with open(atuar_html_path, "w", encoding="utf-8") as f_out:
-                f_out.write(final_html)
 
-    logger.info("Páginas de atuação (geral e por squad) geradas com sucesso.")
+def gravar_manifesto_renderizacao(
+    output_dir: str, manifesto: list, reaproveitamento: ReaproveitamentoPaginas
+):
+    """
+    Grava `manifesto_renderizacao.json` no diretório da execução: o manifesto
+    das squads e os hashes de todas as páginas geradas por fatia, lidos por
+    `carregar_hashes_paginas` na execução seguinte.
+    """
+    with open(
+        os.path.join(output_dir, FILENAME_RENDER_MANIFEST), "w", encoding="utf-8"
+    ) as f:
+        json.dump(
+            {"squads": manifesto, "hashes": reaproveitamento.hashes},
+            f,
+            ensure_ascii=False,
+            indent=2,
+        )
+
+
+def carregar_hashes_paginas(output_dir: str) -> dict:
+    """
+    Lê os hashes das páginas gravados no manifesto de uma execução.
+
+    Returns:
+        Dicionário caminho relativo -> hash; vazio se a execução não tiver
+        manifesto (ex.: gerada sob demanda ou antes da geração incremental).
+    """
+    caminho = os.path.join(output_dir, FILENAME_RENDER_MANIFEST)
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f).get("hashes", {})
+    except (OSError, ValueError):
+        return {}
@@ -0,0 +1,255 @@
+"""
+Índice de pertinência dos Casos por execução, em mapas de bits.
+
+Perguntas como "quais Casos persistiram em cada uma das últimas 8 execuções" ou
+"o que foi resolvido desde a execução X" exigiriam carregar e mesclar vários
+resumos. Em vez disso, a pasta de relatórios mantém um dicionário global de
+Casos (`dicionario_casos.npz`: as chaves de 64 bits, apenas acrescentadas, de
+modo que o id de um Caso, sua posição, nunca muda) e cada execução guarda o
+mapa de bits compactado (`np.packbits`) dos ids dos seus Casos de atuação
+(`casos_bitmap.npz`). As consultas são operações de conjunto sobre esses mapas,
+mantidos em memória: nenhum resumo é carregado.
+
+O mapa de uma execução registra o identificador do dicionário sobre o qual foi
+montado. Se o dicionário for recriado (por exemplo, em uma pasta de relatórios
+nova, com as execuções restauradas dos bundles), os mapas antigos são refeitos
+a partir do armazenamento compacto da execução na primeira consulta.
+"""
+
+import fcntl
+import logging
+import os
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+
+from . import serie_tendencia
+from .constants import ACAO_FLAGS_ATUACAO
+
+logger = logging.getLogger(__name__)
+
+ARQUIVO_DICIONARIO = "dicionario_casos.npz"
+ARQUIVO_TRAVA = ".dicionario_casos.lock"
+ARQUIVO_BITMAP = "casos_bitmap.npz"
+OPERACOES = ("persistentes", "novos", "resolvidos", "qualquer")
+# Número de bits ligados de cada byte, para contar os Casos sem desempacotar
+# (usado apenas sem `np.bitwise_count`, disponível a partir do NumPy 2.0).
+_BITS_POR_BYTE = np.array([i.bit_count() for i in range(256)], dtype=np.int64)
+
+
+def _versao(caminho: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(caminho)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@contextmanager
+def _trava_dicionario(reports_folder: str):
+    # Serializa, entre processos, as atualizações do dicionário.
+    with open(os.path.join(reports_folder, ARQUIVO_TRAVA), "a") as trava:
+        fcntl.flock(trava, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(trava, fcntl.LOCK_UN)
+
+
+@lru_cache(maxsize=8)
+def _ler_dicionario(caminho: str, _versao: tuple) -> tuple[str, np.ndarray, np.ndarray]:
+    # A versão faz parte da chave do cache: um dicionário ampliado é lido de novo.
+    with np.load(caminho, allow_pickle=False) as dados:
+        chaves = dados["chaves"]
+        identificador = str(dados["identificador"])
+    return identificador, chaves, np.argsort(chaves, kind="stable")
+
+
+def carregar_dicionario(
+    reports_folder: str,
+) -> tuple[str, np.ndarray, np.ndarray] | None:
+    """
+    Retorna `(identificador, chaves, ordem)` do dicionário global de Casos, em
+    que `chaves[id]` é a chave do Caso `id` e `ordem` ordena as chaves. Retorna
+    None se o dicionário ainda não existir.
+    """
+    caminho = os.path.join(reports_folder, ARQUIVO_DICIONARIO)
+    versao = _versao(caminho)
+    return _ler_dicionario(caminho, versao) if versao is not None else None
+
+
+def _localizar(chaves: np.ndarray, ordem: np.ndarray, procuradas: np.ndarray):
+    """Ids das chaves `procuradas` no dicionário e a máscara das encontradas."""
+    if not len(chaves):
+        return np.zeros(len(procuradas), np.int64), np.zeros(len(procuradas), bool)
+    posicao = np.searchsorted(chaves, procuradas, sorter=ordem)
+    ids = ordem[np.minimum(posicao, len(chaves) - 1)]
+    return ids, chaves[ids] == procuradas
+
+
+def chaves_atuacao(casos: dict) -> np.ndarray:
+    """Chaves dos Casos de atuação de uma execução (de `carregar_casos_compactos`)."""
+    atuacao = np.isin(casos["acoes"], ACAO_FLAGS_ATUACAO)[casos["acao"]]
+    return np.unique(casos["chave"][atuacao])
+
+
+def registrar_execucao(
+    run_dir: str, reports_folder: str, json_summary_path: str | None = None
+) -> str | None:
+    """
+    Grava o mapa de bits dos Casos de atuação de uma execução, acrescentando ao
+    dicionário global as chaves ainda desconhecidas.
+
+    Returns:
+        O caminho do mapa gravado, ou None se os Casos da execução não estiverem
+        disponíveis ou não for possível gravá-lo.
+    """
+    casos = serie_tendencia.carregar_casos_compactos(run_dir, json_summary_path)
+    if casos is None:
+        return None
+    chaves = chaves_atuacao(casos)
+    caminho_dicionario = os.path.join(reports_folder, ARQUIVO_DICIONARIO)
+    caminho = os.path.join(run_dir, ARQUIVO_BITMAP)
+    try:
+        with _trava_dicionario(reports_folder):
+            dicionario = carregar_dicionario(reports_folder)
+            if dicionario is None:
+                identificador = uuid.uuid4().hex
+                todas, ordem = np.empty(0, np.uint64), np.empty(0, np.int64)
+            else:
+                identificador, todas, ordem = dicionario
+            ids, encontradas = _localizar(todas, ordem, chaves)
+            novas = chaves[~encontradas]
+            if len(novas) or dicionario is None:
+                # As chaves já vêm únicas e ordenadas de `chaves_atuacao`.
+                ids[~encontradas] = len(todas) + np.arange(len(novas))
+                todas = np.concatenate((todas, novas))
+                serie_tendencia.gravar_npz_atomicamente(
+                    caminho_dicionario,
+                    chaves=todas,
+                    identificador=np.array(identificador),
+                )
+        bits = np.zeros(len(todas), dtype=bool)
+        bits[ids] = True
+        serie_tendencia.gravar_npz_atomicamente(
+            caminho, bitmap=np.packbits(bits), identificador=np.array(identificador)
+        )
+    except OSError as e:
+        logger.warning(f"Não foi possível gravar o índice de Casos de '{run_dir}': {e}")
+        return None
+    logger.info(f"Mapa de bits dos Casos gravado em: {caminho} ({len(chaves)} Casos)")
+    return caminho
+
+
+@lru_cache(maxsize=256)
+def _ler_bitmap(caminho: str, _versao: tuple) -> tuple[str, np.ndarray]:
+    with np.load(caminho, allow_pickle=False) as dados:
+        return str(dados["identificador"]), dados["bitmap"]
+
+
+def carregar_bitmap(
+    run_dir: str, reports_folder: str, json_summary_path: str | None = None
+) -> np.ndarray | None:
+    """
+    Retorna o mapa de bits compactado dos Casos de uma execução, refazendo-o se
+    estiver ausente ou tiver sido montado sobre outro dicionário.
+    """
+    caminho = os.path.join(run_dir, ARQUIVO_BITMAP)
+    versao = _versao(caminho)
+    dicionario = carregar_dicionario(reports_folder)
+    if versao is not None and dicionario is not None:
+        identificador, bitmap = _ler_bitmap(caminho, versao)
+        if identificador == dicionario[0]:
+            return bitmap
+    if registrar_execucao(run_dir, reports_folder, json_summary_path) is None:
+        return None
+    return _ler_bitmap(caminho, _versao(caminho))[1]
+
+
+def _alinhar(bitmaps: list[np.ndarray]) -> np.ndarray:
+    """
+    Mapas das execuções como linhas de uma matriz de palavras de 64 bits, para
+    que as operações de conjunto processem 64 Casos por vez.
+    """
+    # Mapas de execuções antigas são mais curtos: os Casos acrescentados depois
+    # ao dicionário não estavam nelas (bits zerados).
+    largura = -(-max(len(b) for b in bitmaps) // 8) * 8
+    matriz = np.zeros((len(bitmaps), largura), dtype=np.uint8)
+    for linha, bitmap in zip(matriz, bitmaps):
+        linha[: len(bitmap)] = bitmap
+    return matriz.view(np.uint64)
+
+
+def contar(bitmap: np.ndarray) -> int:
+    """Número de Casos (bits ligados) de um mapa compactado."""
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(bitmap).sum(dtype=np.int64))
+    return int(_BITS_POR_BYTE[bitmap.view(np.uint8)].sum())
+
+
+def consultar(
+    bitmaps: list[np.ndarray], operacao: str, chaves: np.ndarray, limite: int = 100
+) -> dict:
+    """
+    Responde a uma consulta de conjunto sobre os mapas de N execuções, em ordem
+    cronológica:
+
+    - `persistentes`: Casos presentes em todas as execuções;
+    - `novos`: Casos da última execução ausentes de todas as anteriores;
+    - `resolvidos`: Casos da primeira execução ausentes da última;
+    - `qualquer`: Casos presentes em ao menos uma execução.
+
+    Args:
+        bitmaps: os mapas compactados das execuções.
+        operacao: uma de `OPERACOES`.
+        chaves: as chaves do dicionário global, para identificar os Casos.
+        limite: número máximo de chaves de Casos devolvidas.
+
+    Returns:
+        Dicionário com o `total` de Casos do resultado, até `limite` `casos`
+        (chaves em hexadecimal) e `sequencias`: para k = 1..N, quantos Casos
+        estão presentes em cada uma das últimas k execuções.
+
+    Raises:
+        ValueError: se a operação for inválida, não houver execuções ou a
+            operação exigir ao menos duas.
+    """
+    if operacao not in OPERACOES:
+        raise ValueError(
+            f"Operação inválida: '{operacao}'. Use uma de: {', '.join(OPERACOES)}."
+        )
+    if not bitmaps:
+        raise ValueError("Nenhuma execução selecionada para a consulta.")
+    if operacao in ("novos", "resolvidos") and len(bitmaps) < 2:
+        raise ValueError(f"A operação '{operacao}' exige ao menos duas execuções.")
+
+    matriz = _alinhar(bitmaps)
+    if operacao == "persistentes":
+        resultado = np.bitwise_and.reduce(matriz, axis=0)
+    elif operacao == "qualquer":
+        resultado = np.bitwise_or.reduce(matriz, axis=0)
+    elif operacao == "novos":
+        resultado = matriz[-1] & ~np.bitwise_or.reduce(matriz[:-1], axis=0)
+    else:
+        resultado = matriz[0] & ~matriz[-1]
+
+    sequencias = []
+    acumulado = matriz[-1].copy()
+    for k, linha in enumerate(matriz[::-1], start=1):
+        acumulado &= linha
+        sequencias.append({"execucoes": k, "casos": contar(acumulado)})
+
+    # Só os primeiros bytes não nulos (cada um com ao menos um Caso) são
+    # desempacotados para obter os ids devolvidos.
+    resultado = resultado.view(np.uint8)
+    bytes_ocupados = np.flatnonzero(resultado)[:limite]
+    bits = np.flatnonzero(np.unpackbits(resultado[bytes_ocupados]))[:limite]
+    ids = bytes_ocupados[bits // 8] * 8 + bits % 8
+    return {
+        "operacao": operacao,
+        "total": contar(resultado),
+        "casos": [f"{chave:016x}" for chave in chaves[ids].tolist()],
+        "sequencias": sequencias,
+    }
@@ -0,0 +1,294 @@
+"""
+Modelo de dados usado na renderização das páginas por squad.
+
+A hierarquia squad → métrica → problema → Caso é montada uma única vez por
+execução, com uma ordenação e uma varredura sequencial do DataFrame de atuação.
+As páginas são renderizadas a partir desses registros já ordenados, sem filtros
+booleanos repetidos nem `iterrows()`.
+"""
+
+import logging
+import re
+
+import numpy as np
+import pandas as pd
+
+from . import formatacao_html
+from .constants import (
+    COL_ASSIGNMENT_GROUP,
+    COL_METRIC_NAME,
+    COL_SHORT_DESCRIPTION,
+)
+
+logger = logging.getLogger(__name__)
+
+# Quantidade de problemas exibidos no gráfico "Top Problemas da Squad".
+TOP_PROBLEMAS_POR_SQUAD = 10
+# Faixa de score usada na cor da coluna de prioridade.
+FAIXA_COR_PRIORIDADE = (0, 20)
+
+_COL_PRIORIDADE_METRICA = "_prioridade_metrica"
+_COL_PRIORIDADE_PROBLEMA = "_prioridade_problema"
+_COL_ACAO_PRINCIPAL = "_acao_principal"
+
+
+class CasoRender:
+    """
+    Uma linha (Caso) da tabela de um problema.
+
+    As células exibidas (`prioridade`, `cor_prioridade`, `recurso`, `acao` e
+    `periodo`) chegam já escapadas e formatadas (ver `formatacao_html`).
+    """
+
+    __slots__ = (
+        "acao",
+        "alert_count",
+        "alert_numbers",
+        "cor_prioridade",
+        "periodo",
+        "prioridade",
+        "recurso",
+        "row_index",
+        "status_chronology",
+    )
+
+    def __init__(
+        self,
+        row_index,
+        prioridade,
+        cor_prioridade,
+        recurso,
+        acao,
+        periodo,
+        alert_count,
+        alert_numbers,
+        status_chronology,
+    ):
+        self.row_index = row_index
+        self.prioridade = prioridade
+        self.cor_prioridade = cor_prioridade
+        self.recurso = recurso
+        self.acao = acao
+        self.periodo = periodo
+        self.alert_count = alert_count
+        self.alert_numbers = alert_numbers
+        self.status_chronology = status_chronology
+
+
+class ProblemaRender:
+    """Um problema de uma métrica, com seus Casos já ordenados por alertas."""
+
+    __slots__ = ("acao_principal", "casos", "nome", "total_alertas")
+
+    def __init__(self, nome, acao_principal):
+        self.nome = nome
+        self.acao_principal = acao_principal
+        self.total_alertas = 0
+        self.casos = []
+
+    @property
+    def num_casos(self) -> int:
+        return len(self.casos)
+
+
+class MetricaRender:
+    """Uma categoria de métrica da squad, com seus problemas já ordenados."""
+
+    __slots__ = ("nome", "problemas")
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.problemas = []
+
+    @property
+    def num_problemas(self) -> int:
+        return len(self.problemas)
+
+
+class SquadRender:
+    """Todos os dados necessários para renderizar a página de uma squad."""
+
+    __slots__ = (
+        "metricas",
+        "nome",
+        "nome_sanitizado",
+        "top_problemas",
+        "total_alertas",
+        "total_casos",
+    )
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.nome_sanitizado = sanitizar_nome(nome)
+        self.total_casos = 0
+        self.total_alertas = 0
+        self.top_problemas = []
+        self.metricas = []
+
+
+def sanitizar_nome(nome: str) -> str:
+    """Converte um nome de squad/problema em um trecho seguro para nomes de arquivo."""
+    return re.sub(r"[^a-zA-Z0-9_-]", "", nome.replace(" ", "_"))
+
+
+def _calcular_top_problemas(df_atuacao: pd.DataFrame) -> dict:
+    """Retorna, por squad, os problemas com mais alertas como tuplas (nome, total)."""
+    totais = (
+        df_atuacao.groupby(
+            [COL_ASSIGNMENT_GROUP, COL_SHORT_DESCRIPTION], observed=True
+        )["alert_count"]
+        .sum()
+        .reset_index()
+        .sort_values(
+            [COL_ASSIGNMENT_GROUP, "alert_count"],
+            ascending=[True, False],
+            kind="mergesort",
+        )
+    )
+    totais = totais.groupby(COL_ASSIGNMENT_GROUP, observed=True).head(
+        TOP_PROBLEMAS_POR_SQUAD
+    )
+    top_problemas: dict = {}
+    for squad, problema, total in zip(
+        totais[COL_ASSIGNMENT_GROUP].to_numpy(),
+        totais[COL_SHORT_DESCRIPTION].to_numpy(),
+        totais["alert_count"].to_numpy(),
+    ):
+        top_problemas.setdefault(squad, []).append((problema, total))
+    return top_problemas
+
+
+def construir_modelo_squads(
+    df_atuacao: pd.DataFrame, emojis_acao: dict | None = None
+) -> list:
+    """
+    Constrói a hierarquia de renderização de todas as squads em uma única passada.
+
+    Ordem produzida (a mesma das páginas): squads por nome; métricas pelo maior
+    `score_ponderado_final` (desc); problemas da métrica pelo maior score (desc);
+    Casos do problema por `alert_count` (desc). Empates são resolvidos pelo nome,
+    o que torna a saída determinística.
+
+    Args:
+        df_atuacao: DataFrame com os Casos que precisam de atuação.
+        emojis_acao: Emoji exibido ao lado de cada ação sugerida.
+
+    Returns:
+        Lista de `SquadRender`, na ordem alfabética das squads.
+    """
+    if df_atuacao.empty:
+        return []
+
+    chaves_metrica = [COL_ASSIGNMENT_GROUP, COL_METRIC_NAME]
+    chaves_problema = [COL_ASSIGNMENT_GROUP, COL_METRIC_NAME, COL_SHORT_DESCRIPTION]
+    df = df_atuacao.reset_index(drop=True)
+    df = df.assign(
+        **{
+            _COL_PRIORIDADE_METRICA: df.groupby(chaves_metrica, observed=True)[
+                "score_ponderado_final"
+            ].transform("max"),
+            _COL_PRIORIDADE_PROBLEMA: df.groupby(chaves_problema, observed=True)[
+                "score_ponderado_final"
+            ].transform("max"),
+            # A ação exibida no cabeçalho do problema é a do primeiro Caso na
+            # ordem de entrada (o de maior score no df de atuação).
+            _COL_ACAO_PRINCIPAL: df.groupby(chaves_problema, observed=True)[
+                "acao_sugerida"
+            ].transform("first"),
+        }
+    )
+    df = df.sort_values(
+        [
+            COL_ASSIGNMENT_GROUP,
+            _COL_PRIORIDADE_METRICA,
+            COL_METRIC_NAME,
+            _COL_PRIORIDADE_PROBLEMA,
+            COL_SHORT_DESCRIPTION,
+            "alert_count",
+        ],
+        ascending=[True, False, True, False, True, False],
+        kind="mergesort",
+    )
+
+    squads_col = df[COL_ASSIGNMENT_GROUP].to_numpy()
+    metricas_col = df[COL_METRIC_NAME].to_numpy()
+    problemas_col = df[COL_SHORT_DESCRIPTION].to_numpy()
+    # Marca onde começa cada novo squad/métrica/problema na ordem já classificada.
+    n = len(df)
+    nova_squad = np.ones(n, dtype=bool)
+    nova_squad[1:] = squads_col[1:] != squads_col[:-1]
+    nova_metrica = nova_squad.copy()
+    nova_metrica[1:] |= metricas_col[1:] != metricas_col[:-1]
+    novo_problema = nova_metrica.copy()
+    novo_problema[1:] |= problemas_col[1:] != problemas_col[:-1]
+
+    top_problemas = _calcular_top_problemas(df_atuacao)
+    celulas = formatacao_html.formatar_celulas_caso(df, emojis_acao or {})
+    colunas = zip(
+        squads_col,
+        metricas_col,
+        problemas_col,
+        nova_squad,
+        nova_metrica,
+        novo_problema,
+        df[_COL_ACAO_PRINCIPAL].to_numpy(),
+        formatacao_html.formatar_decimais(df["score_ponderado_final"]).to_numpy(),
+        formatacao_html.formatar_cores_de_fundo(
+            df["score_ponderado_final"], *FAIXA_COR_PRIORIDADE
+        ).to_numpy(),
+        celulas["recurso"].to_numpy(),
+        celulas["acao"].to_numpy(),
+        celulas["periodo"].to_numpy(),
+        df["alert_count"].to_numpy(),
+        df["alert_numbers"].to_numpy(),
+        df["status_chronology"].to_numpy(),
+    )
+
+    squads = []
+    squad = metrica = problema = None
+    for (
+        squad_nome,
+        metrica_nome,
+        problema_nome,
+        inicia_squad,
+        inicia_metrica,
+        inicia_problema,
+        acao_principal,
+        prioridade,
+        cor_prioridade,
+        recurso,
+        acao,
+        periodo,
+        alert_count,
+        alert_numbers,
+        chronology,
+    ) in colunas:
+        if inicia_squad:
+            squad = SquadRender(squad_nome)
+            squad.top_problemas = top_problemas.get(squad_nome, [])
+            squads.append(squad)
+        if inicia_metrica:
+            metrica = MetricaRender(metrica_nome)
+            squad.metricas.append(metrica)
+        if inicia_problema:
+            problema = ProblemaRender(problema_nome, acao_principal)
+            metrica.problemas.append(problema)
+        squad.total_casos += 1
+        squad.total_alertas += alert_count
+        problema.total_alertas += alert_count
+        problema.casos.append(
+            CasoRender(
+                squad.total_casos,
+                prioridade,
+                cor_prioridade,
+                recurso,
+                acao,
+                periodo,
+                alert_count,
+                alert_numbers,
+                chronology,
+            )
+        )
+
+    logger.info(f"Modelo de renderização construído para {len(squads)} squads.")
+    return squads
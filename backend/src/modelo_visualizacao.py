@@ -0,0 +1,160 @@
+"""
+Modelo de visualização (JSON) de uma execução, consumido pelo frontend.
+
+Reúne, em um único arquivo compacto e versionado por execução, os dados por trás
+do dashboard, das páginas de squad e das páginas de detalhe: KPIs, listas de
+destaque e os registros dos Casos. Com ele a SPA pode montar essas visões no
+navegador (e mantê-las em cache), sem depender das páginas HTML geradas no
+servidor.
+
+Formato dos Casos (colunar): cada coluna é uma lista com um valor por Caso. As
+colunas de texto muito repetido (squad, problema, métrica, ação) são codificadas
+por dicionário: `{"valores": [...], "codigos": [...]}`, em que cada código é o
+índice do valor em `valores` (-1 para ausente). Datas seguem o formato ISO 8601.
+"""
+
+import logging
+
+import pandas as pd
+
+from .constants import (
+    COL_ASSIGNMENT_GROUP,
+    COL_CMDB_CI,
+    COL_METRIC_NAME,
+    COL_NODE,
+    COL_SHORT_DESCRIPTION,
+)
+
+logger = logging.getLogger(__name__)
+
+# Incrementada a cada mudança incompatível no formato do modelo.
+VERSAO_MODELO = 1
+
+FORMATO_DATA_ISO = "%Y-%m-%dT%H:%M:%S"
+
+COLUNAS_CASO = [
+    COL_ASSIGNMENT_GROUP,
+    COL_SHORT_DESCRIPTION,
+    COL_METRIC_NAME,
+    COL_CMDB_CI,
+    COL_NODE,
+    "acao_sugerida",
+    "score_ponderado_final",
+    "alert_count",
+    "alert_numbers",
+    "status_chronology",
+    "first_event",
+    "last_event",
+]
+COLUNAS_DICIONARIO = {
+    COL_ASSIGNMENT_GROUP,
+    COL_SHORT_DESCRIPTION,
+    COL_METRIC_NAME,
+    "acao_sugerida",
+}
+
+# Listas de destaque do dashboard: chave no modelo -> chave no contexto.
+LISTAS_DESTAQUE = {
+    "squads": "top_squads",
+    "metricas": "top_metrics",
+    "problemas_atuacao": "top_problemas_atuacao",
+    "problemas_remediados": "top_problemas_remediados",
+    "problemas_geral": "top_problemas_geral",
+    "problemas_instabilidade": "top_problemas_instabilidade",
+}
+
+
+def construir_modelo_visualizacao(
+    dashboard_context: dict,
+    summary: pd.DataFrame,
+    df_atuacao: pd.DataFrame,
+    timestamp_str: str,
+) -> dict:
+    """
+    Constrói o modelo de visualização de uma execução.
+
+    Os Casos incluídos são os que precisam de atuação (páginas de squad e de
+    métrica) e os dos problemas em destaque (páginas de detalhe), nesta ordem.
+
+    Args:
+        dashboard_context: Contexto do dashboard (ver `context_builder`).
+        summary: DataFrame com o resumo de todos os Casos.
+        df_atuacao: DataFrame com os Casos que precisam de atuação.
+        timestamp_str: Data/hora de geração do relatório.
+
+    Returns:
+        Dicionário serializável em JSON.
+    """
+    problemas_destaque = set()
+    for chave in LISTAS_DESTAQUE.values():
+        if chave.startswith("top_problemas"):
+            problemas_destaque.update(dashboard_context[chave].index)
+    demais = summary[
+        summary[COL_SHORT_DESCRIPTION].isin(problemas_destaque)
+        & ~summary.index.isin(df_atuacao.index)
+    ]
+    casos = pd.concat([df_atuacao, demais])
+
+    return {
+        "versao": VERSAO_MODELO,
+        "gerado_em": timestamp_str,
+        "periodo": dashboard_context["date_range_text"],
+        "kpis": _calcular_kpis(dashboard_context),
+        "destaques": {
+            nome: _serie_para_pares(dashboard_context[chave])
+            for nome, chave in LISTAS_DESTAQUE.items()
+        },
+        "squads_prioritarias": [
+            {"squad": squad, "score_acumulado": float(score), "casos": int(total)}
+            for squad, score, total in dashboard_context[
+                "top_5_squads_agrupadas"
+            ].itertuples(index=False)
+        ],
+        "squads": _serie_para_pares(dashboard_context["all_squads"]),
+        "num_logs_invalidos": int(dashboard_context["num_logs_invalidos"]),
+        "casos": {
+            "total": len(casos),
+            "colunas": {
+                coluna: _codificar_coluna(coluna, casos[coluna])
+                for coluna in COLUNAS_CASO
+                if coluna in casos.columns
+            },
+        },
+    }
+
+
+def _calcular_kpis(context: dict) -> dict:
+    """KPIs do dashboard, com as mesmas chaves do resumo de KPIs da API."""
+    taxa_sucesso = float(context["taxa_sucesso"])
+    return {
+        "casos_atuacao": int(context["grupos_atuacao"]),
+        "alertas_atuacao": int(context["total_alertas_problemas"]),
+        "casos_instabilidade": int(context["grupos_instabilidade"]),
+        "alertas_instabilidade": int(context["total_alertas_instabilidade"]),
+        "casos_sucesso_parcial": int(context["grupos_sucesso_parcial"]),
+        "alertas_sucesso_parcial": int(context["total_alertas_sucesso_parcial"]),
+        "alertas_sucesso": int(context["total_alertas_remediados_ok"]),
+        "taxa_sucesso_automacao": f"{taxa_sucesso:.1f}%",
+        "taxa_sucesso_valor": taxa_sucesso,
+        "casos_sucesso": int(context["casos_ok_estaveis"]),
+        "total_casos": int(context["total_grupos"]),
+        "total_alertas": int(context["total_alertas_geral"]),
+    }
+
+
+def _serie_para_pares(serie: pd.Series) -> list:
+    """Converte uma série (nome -> total) em uma lista de pares [nome, total]."""
+    return [[str(nome), int(total)] for nome, total in serie.items()]
+
+
+def _codificar_coluna(coluna: str, serie: pd.Series):
+    """Converte uma coluna de Casos para a sua representação compacta em JSON."""
+    if coluna in COLUNAS_DICIONARIO:
+        codigos, valores = pd.factorize(serie)
+        return {"valores": [str(v) for v in valores], "codigos": codigos.tolist()}
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        texto = serie.dt.strftime(FORMATO_DATA_ISO)
+        return texto.astype(object).where(serie.notna(), None).tolist()
+    if coluna == "status_chronology":
+        return [list(v) if isinstance(v, (list, tuple)) else [] for v in serie]
+    return serie.astype(object).where(serie.notna(), None).tolist()
@@ -60,6 +60,10 @@ class TrendAnalysis(db.Model):
         db.Integer, db.ForeignKey("report.id"), nullable=False, unique=True
     )
     trend_report_path = db.Column(db.String(512), nullable=False, unique=True)
+    # KPIs e diagnóstico rápido calculados na criação da análise (servidos pelo
+    # dashboard sem reprocessar os resumos). Nulos em análises mais antigas.
+    kpis = db.Column(db.JSON, nullable=True)
+    quick_diagnosis_html = db.Column(db.Text, nullable=True)
 
 
 class ReportBundle(db.Model):
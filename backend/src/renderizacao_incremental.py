@@ -0,0 +1,134 @@
+"""
+Geração incremental: reaproveita páginas de uma execução anterior.
+
+Cada página gerada por fatia de dados (página de squad e plano de ação, páginas
+de detalhe de problema e de métrica) recebe um hash do conteúdo da sua fatia de
+entrada, combinado com a versão dos templates. Os hashes ficam no manifesto de
+renderização da execução; na execução seguinte, as páginas cujo hash não mudou
+são vinculadas (hardlink ou cópia) a partir da execução anterior em vez de
+renderizadas novamente. Assim, o tempo de geração acompanha o número de squads
+e problemas que de fato mudaram.
+
+O rodapé ("Relatório gerado em ...") não entra no hash, pois muda a cada
+execução. Uma página reaproveitada cujo rodapé difere do da execução atual é
+copiada com o rodapé substituído, sem passar de novo pelos templates.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+
+import pandas as pd
+
+from . import gerador_html
+
+logger = logging.getLogger(__name__)
+
+# Parágrafo do rodapé gravado por `template.html` (com ou sem minificação). Os
+# valores dinâmicos do corpo chegam escapados, então não o reproduzem.
+_RODAPE_HTML = re.compile(r'(<div class="footer">\s*<p>)(.*?)(</p>)', re.DOTALL)
+
+
+def calcular_hashes_linhas(df: pd.DataFrame) -> pd.Series:
+    """
+    Calcula, de forma vetorizada, um hash de 64 bits por linha de `df`.
+
+    Colunas de objetos (ex.: listas em `status_chronology`) são convertidas para
+    texto antes do hash, pois `hash_pandas_object` exige valores hasheáveis.
+    """
+    normalizado = df.copy(deep=False)
+    for coluna in df.columns:
+        if df[coluna].dtype == object:
+            normalizado[coluna] = df[coluna].astype(str)
+    return pd.util.hash_pandas_object(normalizado, index=False)
+
+
+class ReaproveitamentoPaginas:
+    """Decide, por página, entre reaproveitar a versão anterior ou renderizar."""
+
+    __slots__ = (
+        "_prefixo_hash",
+        "dir_anterior",
+        "hashes",
+        "hashes_anteriores",
+        "output_dir",
+        "reaproveitadas",
+    )
+
+    def __init__(
+        self,
+        output_dir: str,
+        dir_anterior: str | None = None,
+        hashes_anteriores: dict | None = None,
+    ):
+        self.output_dir = output_dir
+        self.dir_anterior = dir_anterior
+        self.hashes_anteriores = hashes_anteriores or {}
+        # Hashes das páginas desta execução: caminho relativo -> hash.
+        self.hashes: dict = {}
+        self.reaproveitadas = 0
+        # A versão dos templates (e a minificação) altera todas as páginas.
+        self._prefixo_hash = (
+            f"{gerador_html.versao_templates()}:{int(gerador_html.MINIFY_HTML)}"
+        )
+
+    def hash_fatia(self, tipo: str, nome: str, fatia: pd.DataFrame) -> str:
+        """Hash do conteúdo de uma fatia (colunas e linhas, na ordem) de uma página."""
+        digest = hashlib.sha256(f"{self._prefixo_hash}:{tipo}:{nome}".encode())
+        digest.update("\x1f".join(map(str, fatia.columns)).encode())
+        digest.update(calcular_hashes_linhas(fatia).to_numpy().tobytes())
+        return digest.hexdigest()[:32]
+
+    def reaproveitar(
+        self, arquivos: list, hash_pagina: str, rodape: str | None = None
+    ) -> bool:
+        """
+        Vincula os `arquivos` (relativos à execução) da execução anterior, se
+        todos foram gerados lá com o mesmo hash. Registra o hash em ambos os casos.
+
+        Com `rodape`, as páginas HTML com outro rodapé são copiadas com ele no
+        lugar do anterior; as demais continuam vinculadas.
+
+        Returns:
+            True se os arquivos foram reaproveitados; False se devem ser renderizados.
+        """
+        for arquivo in arquivos:
+            self.hashes[arquivo] = hash_pagina
+        if not self.dir_anterior or any(
+            self.hashes_anteriores.get(arquivo) != hash_pagina
+            or not os.path.isfile(os.path.join(self.dir_anterior, arquivo))
+            for arquivo in arquivos
+        ):
+            return False
+        for arquivo in arquivos:
+            destino = os.path.join(self.output_dir, arquivo)
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            origem = os.path.join(self.dir_anterior, arquivo)
+            if rodape is None or not arquivo.endswith(".html"):
+                _vincular_arquivo(origem, destino)
+            else:
+                _vincular_com_rodape(origem, destino, rodape)
+        self.reaproveitadas += 1
+        return True
+
+
+def _vincular_arquivo(origem: str, destino: str) -> None:
+    """Cria `destino` como hardlink de `origem`; copia se o hardlink não for possível."""
+    try:
+        os.link(origem, destino)
+    except OSError:
+        shutil.copy2(origem, destino)
+
+
+def _vincular_com_rodape(origem: str, destino: str, rodape: str) -> None:
+    """Vincula `origem` em `destino`, trocando o rodapé se ele for outro."""
+    with open(origem, encoding="utf-8") as f:
+        html = f.read()
+    ocorrencia = _RODAPE_HTML.search(html)
+    if ocorrencia is None or ocorrencia.group(2) == rodape:
+        _vincular_arquivo(origem, destino)
+        return
+    with open(destino, "w", encoding="utf-8") as f:
+        f.write(html[: ocorrencia.start(2)] + rodape + html[ocorrencia.end(2) :])
@@ -0,0 +1,302 @@
+"""
+Renderização sob demanda das páginas de um relatório.
+
+No modo sob demanda (`LAZY_REPORT_RENDERING`), o upload gera apenas o dashboard
+e o resumo JSON. As demais páginas (squads, planos de ação, detalhes e
+visualizadores de CSV) são renderizadas na primeira requisição a partir do
+resumo persistido da execução e ficam armazenadas em disco, em uma pasta por
+versão dos templates:
+
+    <execução>/_cache_paginas/<versão dos templates>/<caminho da página>
+
+Uma alteração em qualquer template muda a versão, e a página volta a ser
+renderizada na próxima requisição.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+from functools import lru_cache
+
+import pandas as pd
+
+from . import gerador_html, gerador_paginas, modelo_renderizacao
+from .analisar_alertas import colunas_essenciais_relatorio
+from .constants import (
+    ACAO_FLAGS_ATUACAO,
+    ACAO_FLAGS_INSTABILIDADE,
+    ACAO_FLAGS_OK,
+    COL_ASSIGNMENT_GROUP,
+    COL_METRIC_NAME,
+    COL_SHORT_DESCRIPTION,
+)
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_NAME = "_cache_paginas"
+# Formato das datas gravadas em `resumo_problemas.json` (ver export_summary_to_json).
+FORMATO_DATA_RESUMO = "%d/%m/%Y %H:%M:%S"
+# Quantidade de resumos de execução mantidos em memória pelo processo.
+RESUMOS_EM_CACHE = 4
+
+_NOME = r"(?P<nome>[A-Za-z0-9_-]+)"
+PADRAO_SQUAD = re.compile(
+    rf"^{gerador_paginas.REPORTS_DIR_SQUADS}/squad-{_NOME}"
+    rf"(\.html|{re.escape(gerador_paginas.SUFIXO_DETALHES_SQUAD)})$"
+)
+PADRAO_PLANO = re.compile(
+    rf"^{gerador_paginas.REPORTS_DIR_PLANS}/plano-de-acao-{_NOME}\.(csv|html)$"
+)
+PADRAO_DETALHE_METRICA = re.compile(
+    rf"^{gerador_paginas.REPORTS_DIR_DETAILS}/detalhe_metrica_{_NOME}\.html$"
+)
+PADRAO_DETALHE_PROBLEMA = re.compile(
+    rf"^{gerador_paginas.REPORTS_DIR_DETAILS}/detalhe_"
+    rf"(?P<prefixo>aberto_|remediado_|geral_|instabilidade_){_NOME}\.html$"
+)
+
+# Serializa as renderizações do processo; entre processos, a troca atômica do
+# arquivo final (os.replace) garante que nenhuma página parcial seja servida.
+_lock_renderizacao = threading.Lock()
+
+
+def carregar_metadados_execucao(run_dir: str) -> dict | None:
+    """Lê os metadados gravados no upload; retorna None para execuções antigas."""
+    caminho = os.path.join(run_dir, gerador_paginas.FILENAME_RUN_METADATA)
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=RESUMOS_EM_CACHE)
+def _carregar_resumo_cacheado(caminho: str, _mtime_ns: int, _tamanho: int) -> tuple:
+    """Carrega o resumo da execução e o DataFrame de atuação (chaveado por mtime/tamanho)."""
+    with open(caminho, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+    registros = dados["records"] if isinstance(dados, dict) else dados
+    summary = pd.DataFrame(registros)
+    for coluna in ("first_event", "last_event"):
+        if coluna in summary.columns:
+            summary[coluna] = pd.to_datetime(
+                summary[coluna], format=FORMATO_DATA_RESUMO, errors="coerce"
+            )
+    # Mesma seleção e ordenação de `gerar_relatorios_csv`.
+    df_atuacao = summary[summary["acao_sugerida"].isin(ACAO_FLAGS_ATUACAO)].copy()
+    df_atuacao = df_atuacao.sort_values(by="score_ponderado_final", ascending=False)
+    return summary, df_atuacao
+
+
+def carregar_resumo_execucao(run_dir: str) -> tuple:
+    """
+    Retorna `(summary, df_atuacao)` da execução a partir do `resumo_problemas.json`.
+
+    Os DataFrames são compartilhados entre requisições e não devem ser alterados.
+    """
+    caminho = os.path.join(run_dir, gerador_paginas.FILENAME_JSON_SUMMARY)
+    stat = os.stat(caminho)
+    return _carregar_resumo_cacheado(caminho, stat.st_mtime_ns, stat.st_size)
+
+
+def _vincular_arquivo(origem: str, destino: str):
+    """Disponibiliza um arquivo da execução na pasta temporária (hardlink ou cópia)."""
+    try:
+        os.link(origem, destino)
+    except OSError:
+        shutil.copy2(origem, destino)
+
+
+def _localizar_por_nome_sanitizado(nomes, nome_sanitizado: str, limite=None):
+    """Encontra o nome original cuja versão sanitizada corresponde ao arquivo pedido."""
+    for nome in pd.unique(nomes):
+        if modelo_renderizacao.sanitizar_nome(str(nome)[:limite]) == nome_sanitizado:
+            return nome
+    return None
+
+
+def _renderizar_squad(run_dir, tmp_dir, nome_sanitizado, metadados) -> list:
+    """Renderiza a página e o plano de ação de uma squad."""
+    _, df_atuacao = carregar_resumo_execucao(run_dir)
+    squad_nome = _localizar_por_nome_sanitizado(
+        df_atuacao[COL_ASSIGNMENT_GROUP], nome_sanitizado
+    )
+    if squad_nome is None:
+        return []
+    df_squad = df_atuacao[df_atuacao[COL_ASSIGNMENT_GROUP] == squad_nome]
+    (squad,) = modelo_renderizacao.construir_modelo_squads(
+        df_squad, gerador_paginas.EMOJI_MAP_ATUACAO
+    )
+    os.makedirs(os.path.join(tmp_dir, gerador_paginas.REPORTS_DIR_SQUADS))
+    colunas_plano = [c for c in colunas_essenciais_relatorio if c in df_squad.columns]
+    entrada = gerador_paginas._renderizar_artefatos_squad(
+        {
+            "squad": squad,
+            "plano_df": df_squad[colunas_plano],
+            "output_dir": tmp_dir,
+            "footer_text": f"Relatório gerado em {metadados['timestamp_str']}",
+        }
+    )
+    return entrada["arquivos"]
+
+
+def _renderizar_detalhe_problema(run_dir, tmp_dir, prefixo, nome_sanitizado, metadados):
+    """Renderiza a página de detalhe de um problema no contexto do prefixo."""
+    summary, df_atuacao = carregar_resumo_execucao(run_dir)
+    fontes = {
+        "aberto_": df_atuacao,
+        "remediado_": summary[summary["acao_sugerida"].isin(ACAO_FLAGS_OK)],
+        "geral_": summary,
+        "instabilidade_": summary[
+            summary["acao_sugerida"].isin(ACAO_FLAGS_INSTABILIDADE)
+        ],
+    }
+    df_source = fontes[prefixo]
+    problema = _localizar_por_nome_sanitizado(
+        df_source[COL_SHORT_DESCRIPTION], nome_sanitizado, limite=50
+    )
+    if problema is None:
+        return []
+    gerador_paginas.gerar_paginas_detalhe_problema(
+        df_source,
+        pd.Index([problema]),
+        os.path.join(tmp_dir, gerador_paginas.REPORTS_DIR_DETAILS),
+        gerador_paginas.FILENAME_SUMMARY,
+        prefixo,
+        gerador_paginas.REPORTS_DIR_SQUADS,
+        metadados["timestamp_str"],
+    )
+    return [
+        f"{gerador_paginas.REPORTS_DIR_DETAILS}/detalhe_{prefixo}{nome_sanitizado}.html"
+    ]
+
+
+def _renderizar_detalhe_metrica(run_dir, tmp_dir, nome_sanitizado, metadados):
+    """Renderiza a página de detalhe de uma métrica com Casos em aberto."""
+    _, df_atuacao = carregar_resumo_execucao(run_dir)
+    metrica = _localizar_por_nome_sanitizado(
+        df_atuacao[COL_METRIC_NAME], nome_sanitizado
+    )
+    if metrica is None:
+        return []
+    gerador_paginas.gerar_paginas_detalhe_metrica(
+        df_atuacao,
+        pd.Index([metrica]),
+        os.path.join(tmp_dir, gerador_paginas.REPORTS_DIR_DETAILS),
+        gerador_paginas.FILENAME_SUMMARY,
+        gerador_paginas.REPORTS_DIR_SQUADS,
+        metadados["timestamp_str"],
+    )
+    return [
+        f"{gerador_paginas.REPORTS_DIR_DETAILS}/detalhe_metrica_{nome_sanitizado}.html"
+    ]
+
+
+def _renderizar_todas_as_squads(run_dir, tmp_dir, metadados):
+    """Renderiza a página com o gráfico de todas as squads."""
+    _, df_atuacao = carregar_resumo_execucao(run_dir)
+    gerador_paginas.gerar_pagina_squads(
+        df_atuacao[COL_ASSIGNMENT_GROUP].value_counts(),
+        os.path.join(tmp_dir, gerador_paginas.REPORTS_DIR_SQUADS),
+        tmp_dir,
+        gerador_paginas.FILENAME_SUMMARY,
+        metadados["timestamp_str"],
+    )
+    return [gerador_paginas.FILENAME_ALL_SQUADS]
+
+
+def _renderizar_visualizador_csv(run_dir, tmp_dir, pagina, metadados):
+    """Renderiza um visualizador de CSV (incluindo o atuar.html) a partir do CSV da execução."""
+    relatorios = list(gerador_paginas.RELATORIOS_CSV_VIEWER)
+    if metadados.get("num_logs_invalidos", 0) > 0:
+        relatorios.append(gerador_paginas.RELATORIO_CSV_LOGS_INVALIDOS)
+    if pagina == gerador_paginas.FILENAME_ACTION_PLAN:
+        relatorios = [("atuar.csv", pagina, None)]
+    config = next((r for r in relatorios if r[1] == pagina), None)
+    if config is None or not os.path.exists(os.path.join(run_dir, config[0])):
+        return []
+    _vincular_arquivo(
+        os.path.join(run_dir, config[0]), os.path.join(tmp_dir, config[0])
+    )
+    if pagina == gerador_paginas.FILENAME_ACTION_PLAN:
+        gerador_paginas._gerar_pagina_atuar_geral(tmp_dir, metadados["frontend_url"])
+    else:
+        gerador_paginas._gerar_relatorios_csv_viewer(
+            [config], tmp_dir, metadados["frontend_url"]
+        )
+    return [pagina]
+
+
+def _renderizar(run_dir: str, tmp_dir: str, pagina: str, metadados: dict) -> list:
+    """Renderiza a página pedida em `tmp_dir`; retorna os caminhos relativos gerados."""
+    if match := PADRAO_SQUAD.match(pagina) or PADRAO_PLANO.match(pagina):
+        return _renderizar_squad(run_dir, tmp_dir, match["nome"], metadados)
+    if match := PADRAO_DETALHE_METRICA.match(pagina):
+        return _renderizar_detalhe_metrica(run_dir, tmp_dir, match["nome"], metadados)
+    if match := PADRAO_DETALHE_PROBLEMA.match(pagina):
+        return _renderizar_detalhe_problema(
+            run_dir, tmp_dir, match["prefixo"], match["nome"], metadados
+        )
+    if pagina == gerador_paginas.FILENAME_ALL_SQUADS:
+        return _renderizar_todas_as_squads(run_dir, tmp_dir, metadados)
+    return _renderizar_visualizador_csv(run_dir, tmp_dir, pagina, metadados)
+
+
+def _remover_versoes_antigas(cache_dir: str, versao: str):
+    """Remove as páginas renderizadas com versões anteriores dos templates."""
+    for entrada in os.scandir(cache_dir):
+        # Pastas iniciadas por "." são renderizações em andamento.
+        if (
+            entrada.is_dir()
+            and entrada.name != versao
+            and not entrada.name.startswith(".")
+        ):
+            shutil.rmtree(entrada.path, ignore_errors=True)
+
+
+def obter_pagina(run_dir: str, pagina: str) -> str | None:
+    """
+    Retorna o caminho da página em cache, renderizando-a se ainda não existir.
+
+    Args:
+        run_dir: Diretório da execução.
+        pagina: Caminho da página relativo à execução (ex.: `squads/squad-X.html`).
+
+    Returns:
+        O caminho absoluto do arquivo a servir, ou None se a execução não estiver
+        no modo sob demanda ou a página não existir neste relatório.
+    """
+    metadados = carregar_metadados_execucao(run_dir)
+    if not metadados or metadados.get("modo") != gerador_paginas.MODO_SOB_DEMANDA:
+        return None
+    pagina = pagina.replace(os.sep, "/")
+    versao = gerador_html.versao_templates()
+    cache_dir = os.path.join(run_dir, CACHE_DIR_NAME)
+    versao_dir = os.path.join(cache_dir, versao)
+    destino = os.path.join(versao_dir, pagina)
+    if os.path.exists(destino):
+        return destino
+
+    with _lock_renderizacao:
+        if os.path.exists(destino):
+            return destino
+        os.makedirs(versao_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".renderizando_", dir=cache_dir)
+        try:
+            gerados = _renderizar(run_dir, tmp_dir, pagina, metadados)
+            for relativo in gerados:
+                final = os.path.join(versao_dir, relativo)
+                os.makedirs(os.path.dirname(final), exist_ok=True)
+                os.replace(os.path.join(tmp_dir, relativo), final)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        _remover_versoes_antigas(cache_dir, versao)
+
+    if not os.path.exists(destino):
+        return None
+    logger.info(f"Página '{pagina}' renderizada sob demanda em '{run_dir}'.")
+    return destino
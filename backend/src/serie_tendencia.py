@@ -0,0 +1,268 @@
+"""
+Série temporal de tendência sobre todas as execuções retidas.
+
+`analise_tendencia` compara apenas dois períodos adjacentes, carregando e mesclando
+os dois resumos JSON. Para a evolução semanal/mensal sobre as até
+`MAX_REPORTS_HISTORY` execuções, este módulo mantém, por execução, um armazenamento
+compacto dos Casos (`casos_compactos.npz`: chave de 64 bits do Caso, squad, ação,
+alert_count e score) e calcula novos, resolvidos e persistentes, a trajetória de
+cada squad e a idade dos Casos em uma única passada vetorizada sobre todas as
+execuções.
+
+O armazenamento compacto é gravado a cada upload; execuções antigas, anteriores a
+ele, têm o seu gerado a partir do resumo JSON na primeira consulta.
+"""
+
+import logging
+import os
+import tempfile
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .analise_tendencia import calcular_chaves_casos, load_summary_from_json
+from .constants import ACAO_FLAGS_ATUACAO, COL_ASSIGNMENT_GROUP, UNKNOWN
+
+logger = logging.getLogger(__name__)
+
+ARQUIVO_CASOS_COMPACTOS = "casos_compactos.npz"
+COL_SCORE = "score_ponderado_final"
+# Agrupamentos aceitos: cada período é representado pela última execução dele.
+AGRUPAMENTOS = {"execucao": None, "semana": "W", "mes": "M"}
+FORMATO_ROTULO = {"execucao": "%d/%m/%Y", "semana": "%d/%m/%Y", "mes": "%m/%Y"}
+
+
+def gravar_npz_atomicamente(caminho: str, comprimir: bool = False, **arrays) -> None:
+    """
+    Grava `arrays` em um `.npz` por meio de um arquivo temporário e troca
+    atômica: leitores simultâneos nunca veem um arquivo parcial.
+    """
+    diretorio, nome = os.path.split(caminho)
+    fd, temporario = tempfile.mkstemp(dir=diretorio, prefix=f".{nome}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            (np.savez_compressed if comprimir else np.savez)(f, **arrays)
+        os.replace(temporario, caminho)
+    except OSError:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def gravar_casos_compactos(summary_df: pd.DataFrame, output_dir: str) -> str:
+    """
+    Grava o armazenamento compacto dos Casos de uma execução em `output_dir`.
+
+    Returns:
+        O caminho do arquivo gravado.
+    """
+    squad_codigos, squads = pd.factorize(
+        summary_df[COL_ASSIGNMENT_GROUP].astype(str)
+        if COL_ASSIGNMENT_GROUP in summary_df.columns
+        else pd.Series(UNKNOWN, index=summary_df.index)
+    )
+    acao_codigos, acoes = pd.factorize(
+        summary_df["acao_sugerida"].astype(str)
+        if "acao_sugerida" in summary_df.columns
+        else pd.Series(UNKNOWN, index=summary_df.index)
+    )
+    score = (
+        summary_df[COL_SCORE].to_numpy(np.float32)
+        if COL_SCORE in summary_df.columns
+        else np.zeros(len(summary_df), np.float32)
+    )
+    caminho = os.path.join(output_dir, ARQUIVO_CASOS_COMPACTOS)
+    # Também gravado na primeira consulta de execuções antigas, possivelmente
+    # por requisições simultâneas.
+    gravar_npz_atomicamente(
+        caminho,
+        comprimir=True,
+        chave=calcular_chaves_casos(summary_df),
+        squad=squad_codigos.astype(np.int32),
+        squads=np.asarray(squads, dtype=str),
+        acao=acao_codigos.astype(np.int32),
+        acoes=np.asarray(acoes, dtype=str),
+        alert_count=summary_df["alert_count"].fillna(0).to_numpy(np.int32),
+        score=score,
+    )
+    logger.info(f"Armazenamento compacto dos Casos gravado em: {caminho}")
+    return caminho
+
+
+@lru_cache(maxsize=128)
+def _ler_casos_compactos(caminho: str, _mtime_ns: int) -> dict:
+    # O mtime faz parte da chave do cache: um arquivo regravado é lido de novo.
+    with np.load(caminho, allow_pickle=False) as dados:
+        return {nome: dados[nome] for nome in dados.files}
+
+
+def carregar_casos_compactos(run_dir: str, json_summary_path: str) -> dict | None:
+    """
+    Carrega o armazenamento compacto de uma execução, gerando-o a partir do
+    resumo JSON se ainda não existir. Retorna None se nenhum dos dois existir.
+    """
+    caminho = os.path.join(run_dir, ARQUIVO_CASOS_COMPACTOS)
+    if not os.path.isfile(caminho):
+        if not json_summary_path or not os.path.isfile(json_summary_path):
+            return None
+        summary_df = load_summary_from_json(json_summary_path)
+        if summary_df is None:
+            return None
+        try:
+            gravar_casos_compactos(summary_df, run_dir)
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar '{caminho}': {e}")
+            return None
+    return _ler_casos_compactos(caminho, os.stat(caminho).st_mtime_ns)
+
+
+def data_da_execucao(date_range: str | None, timestamp: datetime) -> datetime:
+    """Data de referência de uma execução: o fim do período do CSV ou, sem ele, o upload."""
+    if date_range:
+        try:
+            return datetime.strptime(date_range.split(" a ")[-1].strip(), "%d/%m/%Y")
+        except ValueError:
+            pass
+    return timestamp.replace(tzinfo=None)
+
+
+def selecionar_execucoes(datas: list[datetime], agrupamento: str) -> list[int]:
+    """
+    Índices (em ordem cronológica) das execuções que representam cada período:
+    a última execução de cada semana/mês, ou todas em `execucao`.
+    """
+    if agrupamento not in AGRUPAMENTOS:
+        raise ValueError(
+            f"Agrupamento inválido: '{agrupamento}'. Use um de: {', '.join(AGRUPAMENTOS)}."
+        )
+    ordem = np.argsort(np.asarray(datas, dtype="datetime64[ns]"), kind="stable")
+    frequencia = AGRUPAMENTOS[agrupamento]
+    if frequencia is None or not len(ordem):
+        return ordem.tolist()
+    periodos = pd.DatetimeIndex([datas[i] for i in ordem]).to_period(frequencia)
+    ultimo = np.append(periodos[1:] != periodos[:-1], True)
+    return ordem[ultimo].tolist()
+
+
+def _rotulo(data: datetime, agrupamento: str) -> str:
+    if agrupamento == "semana":
+        data = pd.Timestamp(data).to_period("W").start_time
+    return data.strftime(FORMATO_ROTULO[agrupamento])
+
+
+def calcular_serie(execucoes: list[dict]) -> dict:
+    """
+    Calcula a série de tendência sobre N execuções em uma única passada.
+
+    Considera apenas os Casos que exigem atuação (`ACAO_FLAGS_ATUACAO`), como a
+    análise comparativa. Um Caso é persistente em uma execução se estava na
+    execução imediatamente anterior; sua idade é o número de execuções
+    consecutivas em que aparece até ali.
+
+    Args:
+        execucoes: em ordem cronológica, dicionários com os arrays de
+            `carregar_casos_compactos`.
+
+    Returns:
+        Dicionário com arrays por execução (`total`, `novos`, `resolvidos`,
+        `persistentes`, `alertas`, `idade_media`), a matriz `casos_por_squad`
+        (execução x squad), os nomes das `squads` e `idades_atuais` (contagem de
+        Casos da última execução por idade).
+    """
+    n = len(execucoes)
+    atuacao = [np.isin(e["acoes"], ACAO_FLAGS_ATUACAO)[e["acao"]] for e in execucoes]
+    chave = np.concatenate(
+        [e["chave"][m] for e, m in zip(execucoes, atuacao)] or [np.empty(0, np.uint64)]
+    )
+    execucao = np.repeat(np.arange(n), [int(m.sum()) for m in atuacao])
+    alertas = np.concatenate(
+        [e["alert_count"][m] for e, m in zip(execucoes, atuacao)]
+        or [np.empty(0, np.int32)]
+    )
+    # Os dicionários de squads de cada execução são unificados em um só.
+    squad_codigos, squads = pd.factorize(
+        np.concatenate(
+            [e["squads"][e["squad"][m]] for e, m in zip(execucoes, atuacao)]
+            or [np.empty(0, str)]
+        )
+    )
+
+    ordem = np.lexsort((execucao, chave))
+    chave_ord, execucao_ord = chave[ordem], execucao[ordem]
+    continua = np.zeros(len(ordem), dtype=bool)
+    continua[1:] = (chave_ord[1:] == chave_ord[:-1]) & (
+        execucao_ord[1:] == execucao_ord[:-1] + 1
+    )
+    inicio = np.flatnonzero(~continua)
+    sequencia = np.cumsum(~continua) - 1
+    idade = np.arange(len(ordem)) - inicio[sequencia] + 1 if len(ordem) else inicio
+
+    total = np.bincount(execucao, minlength=n)
+    persistentes = np.bincount(execucao_ord[continua], minlength=n)
+    anterior = np.concatenate(([0], total[:-1]))
+    soma_idade = np.bincount(execucao_ord, weights=idade, minlength=n)
+    s = len(squads)
+    casos_por_squad = np.bincount(execucao * s + squad_codigos, minlength=n * s)
+
+    return {
+        "total": total,
+        "novos": total - persistentes,
+        "resolvidos": anterior - persistentes,
+        "persistentes": persistentes,
+        "alertas": np.bincount(execucao, weights=alertas, minlength=n).astype(np.int64),
+        "idade_media": np.divide(soma_idade, total, out=np.zeros(n), where=total > 0),
+        "casos_por_squad": casos_por_squad.reshape(n, s),
+        "squads": squads.tolist(),
+        "idades_atuais": np.bincount(idade[execucao_ord == n - 1])
+        if n
+        else np.empty(0, np.int64),
+    }
+
+
+def montar_resposta(execucoes: list[dict], agrupamento: str) -> dict:
+    """
+    Monta a resposta da API a partir das execuções selecionadas, cada uma com
+    `run_folder`, `data` e os arrays de `carregar_casos_compactos`.
+
+    Os valores de novos, resolvidos e persistentes do primeiro período são nulos:
+    não há período anterior com que compará-lo.
+    """
+    serie = calcular_serie(execucoes)
+    periodos = []
+    for i, execucao in enumerate(execucoes):
+        periodos.append(
+            {
+                "rotulo": _rotulo(execucao["data"], agrupamento),
+                "data": execucao["data"].strftime("%Y-%m-%d"),
+                "run_folder": execucao["run_folder"],
+                "total_casos": int(serie["total"][i]),
+                "novos": int(serie["novos"][i]) if i else None,
+                "resolvidos": int(serie["resolvidos"][i]) if i else None,
+                "persistentes": int(serie["persistentes"][i]) if i else None,
+                "alertas": int(serie["alertas"][i]),
+                "idade_media": round(float(serie["idade_media"][i]), 2),
+            }
+        )
+    casos_por_squad = serie["casos_por_squad"]
+    # Squads com mais Casos no período mais recente primeiro.
+    ordem_squads = (
+        np.lexsort((serie["squads"], -casos_por_squad[-1])) if len(execucoes) else []
+    )
+    return {
+        "agrupamento": agrupamento,
+        "periodos": periodos,
+        "squads": [
+            {
+                "nome": serie["squads"][j],
+                "casos": casos_por_squad[:, j].tolist(),
+            }
+            for j in ordem_squads
+        ],
+        "idade_casos_atuais": [
+            {"idade": idade, "casos": int(casos)}
+            for idade, casos in enumerate(serie["idades_atuais"])
+            if casos
+        ],
+    }
@@ -3,12 +3,16 @@ Módulo de Serviço para encapsular a lógica de negócio principal da aplicaç
 """
 
 import io
+import itertools
 import json
 import os
 import shutil
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import partial
 import logging
+import pandas as pd
 from flask import current_app, has_app_context, has_request_context, request
 from werkzeug.utils import secure_filename
 
@@ -21,7 +25,15 @@ from .analise_tendencia import (
     generate_executive_summary_html,
 )
 from .get_date_range import get_date_range_from_file
-from . import context_builder, gerador_paginas
+from . import (
+    cache_resumos,
+    comparacao_multipla,
+    context_builder,
+    gerador_html,
+    gerador_paginas,
+    indice_casos,
+    serie_tendencia,
+)
 from .models import ReportBundle
 from .constants import (
     MAX_REPORTS_HISTORY,
@@ -34,6 +46,10 @@ from .constants import (
 logger = logging.getLogger(__name__)
 
 ACTION_PLAN_FILENAME = "atuar.html"
+# Processos usados para analisar em paralelo os arquivos de uma comparação
+# (1 = em série). O pool é criado a cada requisição no worker web, por isso o
+# padrão é em série; aumente apenas onde houver CPUs livres para isso.
+COMPARISON_WORKERS = int(os.getenv("COMPARISON_WORKERS", "1"))
 
 
 def _sanitize_base_url(value: str | None) -> str | None:
@@ -103,6 +119,8 @@ def _enforce_report_limit(db, report_model):
                 report_dir = os.path.dirname(report.report_path)
                 if os.path.isdir(report_dir):
                     shutil.rmtree(report_dir)
+                cache_resumos.CACHE.invalidar_diretorio(report_dir)
+                _remove_report_comparisons(report.id, os.path.dirname(report_dir))
                 db.session.delete(report)
 
             db.session.commit()
@@ -166,12 +184,18 @@ def ensure_run_folder_available(run_folder: str, reports_folder: str) -> bool:
 def calculate_kpi_summary(report_path: str) -> dict | None:
     """Calcula os KPIs gerenciais a partir de um arquivo de resumo JSON.
 
+    Os KPIs ficam no cache do processo enquanto o arquivo não mudar.
+
     Args:
         report_path (str): O caminho para o arquivo JSON de resumo.
 
     Returns:
         dict | None: Um dicionário com os KPIs ou None se ocorrer um erro.
     """
+    return cache_resumos.CACHE.obter_kpis(report_path, _calcular_kpi_summary)
+
+
+def _calcular_kpi_summary(report_path: str) -> dict | None:
     try:
         with open(report_path, "r") as f:
             summary_data = json.load(f)
@@ -240,6 +264,62 @@ def calculate_kpi_summary(report_path: str) -> dict | None:
         return None
 
 
+def _kpis_serializaveis(kpis: dict) -> dict:
+    """Converte os KPIs de tendência (com escalares numpy) em tipos nativos do Python."""
+    return {
+        chave: valor.item() if hasattr(valor, "item") else valor
+        for chave, valor in kpis.items()
+    }
+
+
+def _calcular_diagnostico_tendencia(trend_analysis, reports_folder: str) -> str | None:
+    """
+    Recalcula o diagnóstico rápido de uma análise de tendência a partir dos
+    resumos JSON dos dois relatórios comparados.
+
+    Usado apenas para análises criadas antes de o diagnóstico ser persistido.
+    """
+    prev_report = trend_analysis.previous_report
+    curr_report = trend_analysis.current_report
+    if not (prev_report and curr_report):
+        return None
+
+    prev_run_folder = os.path.basename(os.path.dirname(prev_report.report_path))
+    curr_run_folder = os.path.basename(os.path.dirname(curr_report.report_path))
+    if not (
+        ensure_run_folder_available(prev_run_folder, reports_folder)
+        and ensure_run_folder_available(curr_run_folder, reports_folder)
+    ):
+        return None
+
+    prev_json_path = os.path.join(
+        reports_folder, prev_run_folder, os.path.basename(prev_report.json_summary_path)
+    )
+    curr_json_path = os.path.join(
+        reports_folder, curr_run_folder, os.path.basename(curr_report.json_summary_path)
+    )
+    if not (os.path.exists(prev_json_path) and os.path.exists(curr_json_path)):
+        return None
+
+    df_p1 = load_summary_from_json(prev_json_path)
+    df_p2 = load_summary_from_json(curr_json_path)
+    if df_p1 is None or df_p2 is None:
+        return None
+
+    df_p1_atuacao = df_p1[df_p1["acao_sugerida"].isin(ACAO_FLAGS_ATUACAO)].copy()
+    df_p2_atuacao = df_p2[df_p2["acao_sugerida"].isin(ACAO_FLAGS_ATUACAO)].copy()
+    kpis, merged_df = calculate_kpis_and_merged_df(df_p1_atuacao, df_p2_atuacao)
+    trend_data = prepare_trend_dataframes(merged_df, df_p1_atuacao, df_p2_atuacao)
+    return generate_executive_summary_html(
+        kpis,
+        trend_data["persistent_squads_summary"],
+        trend_data["new_cases"],
+        is_direct_comparison=False,
+        run_folder=curr_run_folder,
+        base_url=_resolve_frontend_base_url(),
+    )
+
+
 def get_dashboard_summary_data(report_model, trend_model, reports_folder: str) -> dict:
     """Monta os dados necessários para o dashboard principal."""
 
@@ -310,71 +390,14 @@ def get_dashboard_summary_data(report_model, trend_model, reports_folder: str) -
             trend_model.timestamp.desc()
         ).first()
         if latest_trend_analysis:
-            prev_report = latest_trend_analysis.previous_report
-            curr_report = latest_trend_analysis.current_report
-
-            if prev_report and curr_report:
-                prev_run_folder = os.path.basename(
-                    os.path.dirname(prev_report.report_path)
-                )
-                curr_run_folder = os.path.basename(
-                    os.path.dirname(curr_report.report_path)
-                )
-
-                prev_available = ensure_run_folder_available(
-                    prev_run_folder, reports_folder
-                )
-                curr_available = ensure_run_folder_available(
-                    curr_run_folder, reports_folder
+            # O diagnóstico é calculado e persistido quando a tendência é criada;
+            # só análises anteriores a isso precisam ser recalculadas aqui.
+            quick_diagnosis_html = latest_trend_analysis.quick_diagnosis_html
+            if quick_diagnosis_html is None:
+                quick_diagnosis_html = _calcular_diagnostico_tendencia(
+                    latest_trend_analysis, reports_folder
                 )
 
-                if prev_available and curr_available:
-                    prev_json_path = os.path.join(
-                        reports_folder,
-                        prev_run_folder,
-                        os.path.basename(prev_report.json_summary_path),
-                    )
-                    curr_json_path = os.path.join(
-                        reports_folder,
-                        curr_run_folder,
-                        os.path.basename(curr_report.json_summary_path),
-                    )
-
-                    if os.path.exists(prev_json_path) and os.path.exists(
-                        curr_json_path
-                    ):
-                        df_p1 = load_summary_from_json(prev_json_path)
-                        df_p2 = load_summary_from_json(curr_json_path)
-
-                        if df_p1 is not None and df_p2 is not None:
-                            df_p1_atuacao = df_p1[
-                                df_p1["acao_sugerida"].isin(ACAO_FLAGS_ATUACAO)
-                            ].copy()
-                            df_p2_atuacao = df_p2[
-                                df_p2["acao_sugerida"].isin(ACAO_FLAGS_ATUACAO)
-                            ].copy()
-
-                            kpis, merged_df = calculate_kpis_and_merged_df(
-                                df_p1_atuacao, df_p2_atuacao
-                            )
-                            trend_data = prepare_trend_dataframes(
-                                merged_df, df_p1_atuacao, df_p2_atuacao
-                            )
-
-                            current_run_folder = os.path.basename(
-                                os.path.dirname(curr_report.report_path)
-                            )
-                            base_url = _resolve_frontend_base_url()
-
-                            quick_diagnosis_html = generate_executive_summary_html(
-                                kpis,
-                                trend_data["persistent_squads_summary"],
-                                trend_data["new_cases"],
-                                is_direct_comparison=False,
-                                run_folder=current_run_folder,
-                                base_url=base_url,
-                            )
-
     return {
         "kpi_summary": kpi_summary,
         "trend_history": trend_history,
@@ -452,6 +475,110 @@ def get_unified_history_list(report_model, trend_model) -> list:
     return history_items
 
 
+def get_trend_series(report_model, reports_folder: str, agrupamento: str) -> dict:
+    """
+    Monta a série temporal de tendência sobre todos os relatórios retidos.
+
+    Cada período (execução, semana ou mês) é representado pelo último relatório
+    dele; os Casos vêm do armazenamento compacto de cada execução.
+
+    Raises:
+        ValueError: se o agrupamento não for suportado.
+    """
+    reports = report_model.query.order_by(report_model.timestamp.asc()).all()
+    datas = [
+        serie_tendencia.data_da_execucao(report.date_range, report.timestamp)
+        for report in reports
+    ]
+    execucoes = []
+    for indice in serie_tendencia.selecionar_execucoes(datas, agrupamento):
+        report = reports[indice]
+        run_folder = os.path.basename(os.path.dirname(report.report_path))
+        if not ensure_run_folder_available(run_folder, reports_folder):
+            continue
+        run_dir = os.path.join(reports_folder, run_folder)
+        casos = serie_tendencia.carregar_casos_compactos(
+            run_dir, os.path.join(run_dir, os.path.basename(report.json_summary_path))
+        )
+        if casos is None:
+            logger.warning(
+                f"Casos do relatório {report.id} indisponíveis; fora da série."
+            )
+            continue
+        execucoes.append({**casos, "run_folder": run_folder, "data": datas[indice]})
+    return serie_tendencia.montar_resposta(execucoes, agrupamento)
+
+
+def query_case_membership(
+    report_model,
+    reports_folder: str,
+    operacao: str,
+    report_ids: list[int] | None = None,
+    ultimas: int | None = None,
+    limite: int = 100,
+) -> dict | None:
+    """
+    Responde a uma consulta de pertinência de Casos sobre um conjunto de
+    relatórios, pelos mapas de bits do índice de Casos (sem carregar resumos).
+
+    Args:
+        report_model (db.Model): Classe do modelo `Report`.
+        reports_folder (str): O caminho absoluto para a pasta de relatórios.
+        operacao (str): Uma de `indice_casos.OPERACOES`.
+        report_ids (list[int], opcional): Os relatórios consultados. Se omitido,
+            todos os relatórios retidos.
+        ultimas (int, opcional): Restringe a consulta aos `ultimas` relatórios
+            mais recentes da seleção.
+        limite (int): Número máximo de chaves de Casos devolvidas.
+
+    Returns:
+        dict | None: O resultado de `indice_casos.consultar`, com as `execucoes`
+        consultadas em ordem cronológica, ou None se algum relatório ou os seus
+        Casos não existirem.
+
+    Raises:
+        ValueError: Se a operação ou a seleção de relatórios for inválida.
+    """
+    query = report_model.query
+    if report_ids is not None:
+        query = query.filter(report_model.id.in_(report_ids))
+    reports = query.all()
+    if report_ids is not None and len(reports) != len(set(report_ids)):
+        return None
+    reports.sort(
+        key=lambda report: (
+            serie_tendencia.data_da_execucao(report.date_range, report.timestamp),
+            report.id,
+        )
+    )
+    if ultimas is not None:
+        if ultimas < 1:
+            raise ValueError("'ultimas' deve ser um número positivo.")
+        reports = reports[-ultimas:]
+
+    execucoes = []
+    bitmaps = []
+    for report in reports:
+        run_folder = os.path.basename(os.path.dirname(report.report_path))
+        if not ensure_run_folder_available(run_folder, reports_folder):
+            return None
+        run_dir = os.path.join(reports_folder, run_folder)
+        bitmap = indice_casos.carregar_bitmap(
+            run_dir,
+            reports_folder,
+            os.path.join(run_dir, os.path.basename(report.json_summary_path)),
+        )
+        if bitmap is None:
+            return None
+        bitmaps.append(bitmap)
+        execucoes.append({"report_id": report.id, "run_folder": run_folder})
+
+    dicionario = indice_casos.carregar_dicionario(reports_folder)
+    chaves = dicionario[1] if dicionario is not None else None
+    resultado = indice_casos.consultar(bitmaps, operacao, chaves, limite)
+    return {**resultado, "execucoes": execucoes}
+
+
 def delete_report_and_artifacts(report_id: int, db, report_model) -> bool:
     """
     Exclui um relatório e todos os seus artefatos associados (arquivos e registro no DB).
@@ -479,6 +606,8 @@ def delete_report_and_artifacts(report_id: int, db, report_model) -> bool:
         if os.path.isdir(report_dir):
             shutil.rmtree(report_dir)
             logger.info(f"Diretório '{report_dir}' excluído com sucesso.")
+        cache_resumos.CACHE.invalidar_diretorio(report_dir)
+        _remove_report_comparisons(report_id, os.path.dirname(report_dir))
 
         # Deleta o registro do banco de dados (e TrendAnalysis em cascata)
         db.session.delete(report)
@@ -493,6 +622,23 @@ def delete_report_and_artifacts(report_id: int, db, report_model) -> bool:
         return False
 
 
+def _is_later_period(
+    date_range_anterior: str | None, date_range_recente: str | None
+) -> bool:
+    """Indica se o período recente começa depois do anterior.
+
+    É a condição para gerar uma tendência entre dois relatórios, tanto no
+    upload quanto no backfill. Sem os dois períodos, a tendência não é gerada.
+    """
+    if not date_range_anterior or not date_range_recente:
+        return False
+    inicio_anterior, inicio_recente = (
+        datetime.strptime(date_range.split(" a ")[0], "%d/%m/%Y")
+        for date_range in (date_range_anterior, date_range_recente)
+    )
+    return inicio_recente > inicio_anterior
+
+
 def process_upload_and_generate_reports(
     file_recente,
     upload_folder: str,
@@ -595,24 +741,7 @@ def process_upload_and_generate_reports(
     if previous_report_for_trend and os.path.exists(
         previous_report_for_trend.json_summary_path
     ):
-        date_range_anterior_obj = (
-            datetime.strptime(
-                previous_report_for_trend.date_range.split(" a ")[0], "%d/%m/%Y"
-            )
-            if previous_report_for_trend.date_range
-            else None
-        )
-        date_range_recente_obj = (
-            datetime.strptime(date_range_recente.split(" a ")[0], "%d/%m/%Y")
-            if date_range_recente
-            else None
-        )
-
-        if (
-            date_range_anterior_obj
-            and date_range_recente_obj
-            and date_range_recente_obj > date_range_anterior_obj
-        ):
+        if _is_later_period(previous_report_for_trend.date_range, date_range_recente):
             logger.info("Período do upload é mais recente. Gerando tendência...")
             output_trend_path = os.path.join(output_dir, "comparativo_periodos.html")
 
@@ -636,9 +765,13 @@ def process_upload_and_generate_reports(
             logger.info(f"Relatório de tendência gerado em: {output_trend_path}")
 
             # Prepara o objeto TrendAnalysis para ser salvo depois
+            # O diagnóstico rápido é persistido com a tendência: o dashboard o
+            # serve direto do banco, sem reprocessar os resumos a cada requisição.
             new_trend_analysis = trend_model(
                 trend_report_path=output_trend_path,
                 previous_report_id=previous_report_for_trend.id,
+                kpis=_kpis_serializaveis(_kpis) if _kpis else None,
+                quick_diagnosis_html=diagnosis_html,
             )
 
         else:
@@ -665,14 +798,31 @@ def process_upload_and_generate_reports(
         trend_report_path=trend_report_path_relative,
     )
 
-    # 4. Geração de todas as páginas HTML
+    # 4. Geração de todas as páginas HTML. As páginas cujos dados não mudaram
+    # desde o último relatório são reaproveitadas da execução dele.
+    ultimo_relatorio = report_model.query.order_by(
+        report_model.timestamp.desc()
+    ).first()
+    execucao_anterior = (
+        os.path.dirname(ultimo_relatorio.report_path) if ultimo_relatorio else None
+    )
     summary_html_path = gerador_paginas.gerar_ecossistema_de_relatorios(
         dashboard_context=dashboard_context,
         analysis_results=analysis_results,
         output_dir=output_dir,
         frontend_url=frontend_url,
+        execucao_anterior=(
+            execucao_anterior
+            if execucao_anterior and os.path.isdir(execucao_anterior)
+            else None
+        ),
     )
 
+    # Armazenamento compacto dos Casos, base da série temporal de tendência, e
+    # o mapa de bits dos Casos da execução no índice de pertinência.
+    serie_tendencia.gravar_casos_compactos(analysis_results["summary"], output_dir)
+    indice_casos.registrar_execucao(output_dir, reports_folder)
+
     # 5. Compacta os artefatos gerados para armazenamento persistente
     bundle_bytes = _zip_directory(output_dir)
     report_bundle = ReportBundle(run_folder=run_folder_name, bundle=bundle_bytes)
@@ -716,12 +866,41 @@ def process_upload_and_generate_reports(
     }
 
 
+def _analyze_files_light(filepaths: list, workers: int | None = None) -> list:
+    """Executa a análise leve de cada arquivo, em série ou em processos paralelos.
+
+    Args:
+        filepaths (list): Caminhos dos CSVs a analisar.
+        workers (int, opcional): Número de processos. Se omitido, usa
+            `COMPARISON_WORKERS`; 1 analisa em série.
+
+    Returns:
+        list: Os resultados de `analisar_arquivo_csv`, na ordem de `filepaths`.
+    """
+    analisar = partial(analisar_arquivo_csv, output_dir=None, light_analysis=True)
+    workers = COMPARISON_WORKERS if workers is None else workers
+    workers = max(1, min(workers, len(filepaths)))
+    if workers == 1:
+        return [analisar(filepath) for filepath in filepaths]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(analisar, filepaths))
+
+
+def _format_date_range(intervalo) -> str | None:
+    """Formata um intervalo (início, fim) como 'DD/MM/YYYY a DD/MM/YYYY'."""
+    inicio, fim = intervalo
+    if pd.isna(inicio) or pd.isna(fim):
+        return None
+    return f"{inicio.strftime('%d/%m/%Y')} a {fim.strftime('%d/%m/%Y')}"
+
+
 def process_direct_comparison(files: list, upload_folder: str, reports_folder: str):
     """Orquestra a comparação direta entre dois arquivos CSV.
 
     Este serviço lida com a funcionalidade de "comparar dois arquivos". Ele salva
-    temporariamente os arquivos, determina sua ordem cronológica, executa uma
-    análise completa em cada um e, finalmente, gera um relatório de tendência
+    temporariamente os arquivos, executa em paralelo uma análise leve (apenas o
+    resumo em memória) de cada um, determina sua ordem cronológica pelas datas
+    lidas nessa análise e, finalmente, gera um relatório de tendência
     comparando os dois. Os arquivos temporários são limpos no final.
 
     Args:
@@ -753,17 +932,22 @@ def process_direct_comparison(files: list, upload_folder: str, reports_folder: s
             f.save(filepath)
             saved_filepaths.append(filepath)
 
-        from .utils import (
-            sort_files_by_date,
-        )  # Importação local para evitar dependência circular
-
-        sorted_paths = sort_files_by_date(saved_filepaths)
-        if not sorted_paths:
+        # Análise leve dos dois arquivos em paralelo: só o resumo em memória,
+        # entregue direto à análise de tendência, sem gravar CSVs ou o resumo
+        # JSON de cada período. A ordem cronológica vem das datas lidas na
+        # própria ingestão, sem uma leitura extra de cada CSV.
+        logger.info(f"Executando análise leve de {len(saved_filepaths)} arquivos...")
+        results = _analyze_files_light(saved_filepaths)
+        if any(pd.isna(r["intervalo_datas"][1]) for r in results):
             raise ValueError(
                 "Não foi possível determinar a ordem cronológica dos arquivos."
             )
-
-        filepath_recente, filepath_anterior = sorted_paths
+        (filepath_anterior, results_anterior), (filepath_recente, results_recente) = (
+            sorted(
+                zip(saved_filepaths, results),
+                key=lambda item: item[1]["intervalo_datas"][1],
+            )
+        )
         filename_recente = os.path.basename(filepath_recente).replace(
             f"temp_{os.path.basename(filepath_recente).split('_')[1]}_", ""
         )
@@ -773,36 +957,23 @@ def process_direct_comparison(files: list, upload_folder: str, reports_folder: s
 
         run_folder_name = f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}_compare"
         output_dir = os.path.join(reports_folder, run_folder_name)
-        output_dir_anterior = os.path.join(output_dir, "anterior")
-        output_dir_recente = os.path.join(output_dir, "recente")
-
-        logger.info(
-            f"Executando análise completa para o arquivo ATUAL: {filename_recente}"
-        )
-        results_recente = analisar_arquivo_csv(
-            filepath_recente, output_dir_recente, light_analysis=False
-        )
-        logger.info(
-            f"Executando análise completa para o arquivo ANTERIOR: {filename_anterior}"
-        )
-        results_anterior = analisar_arquivo_csv(
-            filepath_anterior, output_dir_anterior, light_analysis=False
-        )
 
         output_trend_path = os.path.join(output_dir, "comparativo_periodos.html")
 
         gerar_analise_comparativa(
-            json_anterior=results_anterior["json_path"],
-            json_recente=results_recente["json_path"],
+            json_anterior=None,
+            json_recente=None,
             csv_anterior_name=filename_anterior,
             csv_recente_name=filename_recente,
             output_path=output_trend_path,
-            date_range_anterior=get_date_range_from_file(filepath_anterior),
-            date_range_recente=get_date_range_from_file(filepath_recente),
+            date_range_anterior=_format_date_range(results_anterior["intervalo_datas"]),
+            date_range_recente=_format_date_range(results_recente["intervalo_datas"]),
             is_direct_comparison=True,
             frontend_url=frontend_url,
             run_folder=run_folder_name,
             base_url=frontend_url,  # CORREÇÃO: Passa a URL pública correta
+            resumo_anterior=results_anterior["summary"],
+            resumo_recente=results_recente["summary"],
         )
         return {
             "run_folder": run_folder_name,
@@ -813,3 +984,448 @@ def process_direct_comparison(files: list, upload_folder: str, reports_folder: s
         for p in saved_filepaths:
             if os.path.exists(p):
                 os.remove(p)
+
+
+def process_multi_comparison(files: list, upload_folder: str, reports_folder: str):
+    """Orquestra a comparação direta entre três e seis arquivos CSV.
+
+    Como em `process_direct_comparison`, os arquivos são salvos temporariamente
+    e analisados em paralelo (análise leve, só o resumo em memória). Os períodos
+    são ordenados pelas datas lidas na ingestão e seus Casos casados de uma só
+    vez por `comparacao_multipla`; o resultado é gravado em um relatório HTML e
+    também devolvido para a resposta da API.
+
+    Args:
+        files (list): Os objetos `FileStorage` enviados pelo Flask.
+        upload_folder (str): O caminho absoluto para a pasta de uploads temporários.
+        reports_folder (str): O caminho absoluto para a pasta de relatórios.
+
+    Returns:
+        dict: `run_folder`, `report_filename` e `comparison` (períodos, squads e
+              Casos, como em `comparacao_multipla.comparar_periodos`).
+
+    Raises:
+        ValueError: Se o número de arquivos estiver fora dos limites ou se não
+            for possível determinar a ordem cronológica dos arquivos.
+    """
+    if not (
+        comparacao_multipla.MIN_PERIODOS
+        <= len(files)
+        <= comparacao_multipla.MAX_PERIODOS
+    ):
+        raise ValueError(
+            f"Envie de {comparacao_multipla.MIN_PERIODOS} a "
+            f"{comparacao_multipla.MAX_PERIODOS} arquivos para a comparação."
+        )
+    frontend_url = _resolve_frontend_base_url()
+
+    saved_filepaths = []
+    original_filenames = []
+    try:
+        os.makedirs(upload_folder, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        for index, f in enumerate(files):
+            filename = secure_filename(f.filename)
+            # O índice evita que arquivos homônimos se sobrescrevam.
+            filepath = os.path.join(
+                upload_folder, f"temp_{timestamp}_{index}_{filename}"
+            )
+            f.save(filepath)
+            saved_filepaths.append(filepath)
+            original_filenames.append(filename)
+
+        logger.info(f"Executando análise leve de {len(saved_filepaths)} arquivos...")
+        results = _analyze_files_light(saved_filepaths)
+        if any(pd.isna(r["intervalo_datas"][1]) for r in results):
+            raise ValueError(
+                "Não foi possível determinar a ordem cronológica dos arquivos."
+            )
+        ordered = sorted(
+            zip(original_filenames, results),
+            key=lambda item: item[1]["intervalo_datas"][1],
+        )
+        comparison = comparacao_multipla.comparar_periodos(
+            [result["summary"] for _, result in ordered],
+            [
+                {
+                    "arquivo": filename,
+                    "intervalo": _format_date_range(result["intervalo_datas"]),
+                }
+                for filename, result in ordered
+            ],
+        )
+
+        run_folder_name = (
+            f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}_compare_multi"
+        )
+        output_dir = os.path.join(reports_folder, run_folder_name)
+        os.makedirs(output_dir, exist_ok=True)
+        gerador_html.renderizar_template_em_arquivo(
+            "comparacao_multipla_template.html",
+            os.path.join(output_dir, comparacao_multipla.ARQUIVO_RELATORIO),
+            title="📊 Comparação de Múltiplos Períodos",
+            frontend_url=frontend_url,
+            **comparison,
+        )
+        return {
+            "run_folder": run_folder_name,
+            "report_filename": comparacao_multipla.ARQUIVO_RELATORIO,
+            "comparison": comparison,
+        }
+
+    finally:
+        for p in saved_filepaths:
+            if os.path.exists(p):
+                os.remove(p)
+
+
+COMPARISON_RUN_FOLDER_PREFIX = "run_compare_reports"
+COMPARISON_REPORT_FILENAME = "comparativo_periodos.html"
+
+
+def _comparison_run_folder(previous_report_id: int, current_report_id: int) -> str:
+    return f"{COMPARISON_RUN_FOLDER_PREFIX}_{previous_report_id}_{current_report_id}"
+
+
+def _remove_report_comparisons(report_id: int, reports_folder: str) -> None:
+    """Remove as comparações em cache que envolvem o relatório excluído."""
+    try:
+        entries = os.listdir(reports_folder)
+    except OSError:
+        return
+    for entry in entries:
+        if not entry.startswith(f"{COMPARISON_RUN_FOLDER_PREFIX}_"):
+            continue
+        ids = entry[len(COMPARISON_RUN_FOLDER_PREFIX) + 1 :].split("_")
+        if str(report_id) in ids:
+            shutil.rmtree(os.path.join(reports_folder, entry), ignore_errors=True)
+            logger.info(f"Comparação em cache removida: {entry}")
+
+
+def process_report_comparison(
+    report_id_a: int, report_id_b: int, db, report_model, reports_folder: str
+) -> dict | None:
+    """Gera (ou reaproveita) a comparação entre dois relatórios já processados.
+
+    Ao contrário de `process_direct_comparison`, nenhum CSV é reenviado ou
+    reanalisado: a tendência é montada a partir dos resumos persistidos dos dois
+    relatórios, lidos pelo cache de resumos do processo. Os relatórios são
+    ordenados cronologicamente, e o HTML gerado fica em cache por par de
+    relatórios: enquanto os resumos não mudarem, visualizações seguintes são
+    servidas sem recalcular nada.
+
+    Args:
+        report_id_a (int): ID de um dos relatórios.
+        report_id_b (int): ID do outro relatório.
+        db (flask_sqlalchemy.SQLAlchemy): A instância do banco de dados SQLAlchemy.
+        report_model (db.Model): Classe do modelo `Report`.
+        reports_folder (str): O caminho absoluto para a pasta de relatórios.
+
+    Returns:
+        dict | None: `run_folder`, `report_filename` e `cached` (se o relatório
+        veio do cache), ou None se algum relatório ou resumo não existir.
+
+    Raises:
+        ValueError: Se os dois IDs forem iguais.
+    """
+    if report_id_a == report_id_b:
+        raise ValueError("Informe dois relatórios diferentes para a comparação.")
+
+    reports = [
+        db.session.get(report_model, report_id)
+        for report_id in (report_id_a, report_id_b)
+    ]
+    if any(report is None for report in reports):
+        return None
+    previous_report, current_report = sorted(
+        reports,
+        key=lambda report: (
+            serie_tendencia.data_da_execucao(report.date_range, report.timestamp),
+            report.id,
+        ),
+    )
+
+    json_paths = []
+    for report in (previous_report, current_report):
+        run_folder = os.path.basename(os.path.dirname(report.report_path))
+        if not ensure_run_folder_available(run_folder, reports_folder):
+            return None
+        json_path = os.path.join(
+            reports_folder, run_folder, os.path.basename(report.json_summary_path)
+        )
+        if not os.path.isfile(json_path):
+            return None
+        json_paths.append(json_path)
+
+    run_folder_name = _comparison_run_folder(previous_report.id, current_report.id)
+    output_dir = os.path.join(reports_folder, run_folder_name)
+    output_trend_path = os.path.join(output_dir, COMPARISON_REPORT_FILENAME)
+    result = {
+        "run_folder": run_folder_name,
+        "report_filename": COMPARISON_REPORT_FILENAME,
+        "cached": True,
+    }
+    summaries_mtime = max(os.path.getmtime(path) for path in json_paths)
+    if (
+        os.path.isfile(output_trend_path)
+        and os.path.getmtime(output_trend_path) >= summaries_mtime
+    ):
+        logger.info(f"Comparação reaproveitada do cache: {run_folder_name}")
+        return result
+
+    os.makedirs(output_dir, exist_ok=True)
+    # Gera em um arquivo temporário e o substitui atomicamente: uma requisição
+    # simultânea nunca serve um relatório pela metade.
+    temp_path = f"{output_trend_path}.{os.getpid()}.tmp"
+    frontend_url = _resolve_frontend_base_url()
+    kpis, _diagnosis_html = gerar_analise_comparativa(
+        json_anterior=json_paths[0],
+        json_recente=json_paths[1],
+        csv_anterior_name=previous_report.original_filename,
+        csv_recente_name=current_report.original_filename,
+        output_path=temp_path,
+        date_range_anterior=previous_report.date_range,
+        date_range_recente=current_report.date_range,
+        is_direct_comparison=True,
+        frontend_url=frontend_url,
+        run_folder=run_folder_name,
+        base_url=frontend_url,
+    )
+    if kpis is None:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return None
+    os.replace(temp_path, output_trend_path)
+    return {**result, "cached": False}
+
+
+# Processos usados pelo backfill das análises de tendência (1 = em série).
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", str(os.cpu_count() or 1)))
+BACKFILL_STATE_FILENAME = ".backfill_tendencias.json"
+TREND_REPORT_FILENAME = "comparativo_periodos.html"
+
+
+def _load_backfill_state(state_path: str) -> set:
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            return {tuple(pair) for pair in json.load(f)["concluidos"]}
+    except (OSError, ValueError, KeyError, TypeError):
+        return set()
+
+
+def _save_backfill_state(state_path: str, completed: set) -> None:
+    temp_path = f"{state_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"concluidos": sorted(completed)}, f)
+    os.replace(temp_path, state_path)
+
+
+def _generate_trend_pair(task: dict) -> dict:
+    """Gera, em um processo do pool, o relatório de tendência de um par.
+
+    O relatório é gravado em um arquivo temporário ao lado do definitivo; a
+    substituição e a gravação no banco ficam com o processo principal.
+    """
+    temp_path = f"{task['output_path']}.backfill.tmp"
+    try:
+        kpis, diagnosis_html = gerar_analise_comparativa(
+            json_anterior=task["json_anterior"],
+            json_recente=task["json_recente"],
+            csv_anterior_name=task["csv_anterior_name"],
+            csv_recente_name=task["csv_recente_name"],
+            output_path=temp_path,
+            date_range_anterior=task["date_range_anterior"],
+            date_range_recente=task["date_range_recente"],
+            frontend_url=task["frontend_url"],
+            run_folder=task["run_folder"],
+            base_url=task["frontend_url"],
+        )
+    except Exception as e:
+        logger.error(f"Erro ao gerar a tendência do par {task['pair']}: {e}")
+        kpis, diagnosis_html = None, None
+    if kpis is None:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return {"pair": task["pair"], "temp_path": None}
+    return {
+        "pair": task["pair"],
+        "temp_path": temp_path,
+        "kpis": _kpis_serializaveis(kpis),
+        "quick_diagnosis_html": diagnosis_html,
+    }
+
+
+def _apply_trend_pair(result: dict, task: dict, db, trend_model) -> None:
+    """Publica o relatório gerado e grava a `TrendAnalysis` em um só passo.
+
+    O relatório substitui o anterior atomicamente e o bundle da execução é
+    atualizado na mesma transação da análise; se a transação falhar, o
+    relatório anterior é restaurado.
+    """
+    output_path = task["output_path"]
+    previous_html = None
+    if os.path.isfile(output_path):
+        with open(output_path, "rb") as f:
+            previous_html = f.read()
+    os.replace(result["temp_path"], output_path)
+    try:
+        previous_report_id, current_report_id = task["pair"]
+        trend = trend_model.query.filter_by(current_report_id=current_report_id).first()
+        if trend is None:
+            trend = trend_model(current_report_id=current_report_id)
+            db.session.add(trend)
+        trend.previous_report_id = previous_report_id
+        trend.trend_report_path = output_path
+        trend.kpis = result["kpis"]
+        trend.quick_diagnosis_html = result["quick_diagnosis_html"]
+        bundle = ReportBundle.query.filter_by(run_folder=task["run_folder"]).first()
+        if bundle is not None:
+            bundle.bundle = _zip_directory(os.path.dirname(output_path))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        if previous_html is None:
+            os.remove(output_path)
+        else:
+            with open(output_path, "wb") as f:
+                f.write(previous_html)
+        raise
+
+
+def backfill_trend_history(
+    db,
+    report_model,
+    trend_model,
+    reports_folder: str,
+    workers: int | None = None,
+    dry_run: bool = False,
+    resume: bool = False,
+) -> dict:
+    """Regenera as análises de tendência de todo o histórico retido.
+
+    Percorre os relatórios em ordem de `timestamp` e gera, em um pool de
+    processos e a partir dos resumos persistidos, a tendência de cada par de
+    relatórios adjacentes cujo período recente começa depois do anterior, como
+    no upload; os demais pares são pulados. Cada par é publicado atomicamente
+    (relatório, `TrendAnalysis` e bundle) assim que fica pronto, e registrado em
+    um arquivo de estado na pasta de relatórios: com `resume`, os pares já
+    concluídos em um backfill interrompido são pulados. O estado é removido
+    quando todos os pares são concluídos.
+
+    Args:
+        db (flask_sqlalchemy.SQLAlchemy): A instância do banco de dados SQLAlchemy.
+        report_model (db.Model): Classe do modelo `Report`.
+        trend_model (db.Model): Classe do modelo `TrendAnalysis`.
+        reports_folder (str): O caminho absoluto para a pasta de relatórios.
+        workers (int, opcional): Número de processos. Se omitido, usa
+            `BACKFILL_WORKERS`; 1 gera em série.
+        dry_run (bool): Apenas lista os pares que seriam gerados.
+        resume (bool): Retoma um backfill interrompido.
+
+    Returns:
+        dict: `pares` (os pares `(anterior, recente)` a gerar), `gerados`,
+        `pulados` (já concluídos ou fora de ordem), `fora_de_ordem` (pares sem
+        período ou cujo período recente não começa depois do anterior, que o
+        upload também recusa; suas `TrendAnalysis` não são alteradas) e `falhas` (pares sem
+        resumo ou com erro).
+    """
+    state_path = os.path.join(reports_folder, BACKFILL_STATE_FILENAME)
+    completed = _load_backfill_state(state_path) if resume else set()
+    reports = report_model.query.order_by(
+        report_model.timestamp.asc(), report_model.id.asc()
+    ).all()
+    pairs = []
+    out_of_order = []
+    for previous, current in itertools.pairwise(reports):
+        # Como no upload: só há tendência se o período recente começar depois.
+        if _is_later_period(previous.date_range, current.date_range):
+            pairs.append((previous.id, current.id))
+        else:
+            out_of_order.append((previous.id, current.id))
+    pending = [pair for pair in pairs if pair not in completed]
+    summary = {
+        "pares": pending,
+        "gerados": 0,
+        "pulados": len(pairs) - len(pending) + len(out_of_order),
+        "fora_de_ordem": out_of_order,
+        "falhas": [],
+    }
+    for pair in out_of_order:
+        logger.warning(
+            f"Par {pair} pulado: o período recente não começa depois do anterior."
+        )
+    if dry_run:
+        return summary
+    if not resume and os.path.exists(state_path):
+        os.remove(state_path)
+
+    reports_by_id = {report.id: report for report in reports}
+    frontend_url = _resolve_frontend_base_url()
+    tasks = []
+    for pair in pending:
+        previous, current = (reports_by_id[report_id] for report_id in pair)
+        paths = []
+        for report in (previous, current):
+            run_folder = os.path.basename(os.path.dirname(report.report_path))
+            if not ensure_run_folder_available(run_folder, reports_folder):
+                break
+            paths.append(
+                os.path.join(
+                    reports_folder,
+                    run_folder,
+                    os.path.basename(report.json_summary_path),
+                )
+            )
+        if len(paths) < 2 or not all(os.path.isfile(path) for path in paths):
+            logger.warning(f"Resumos do par {pair} indisponíveis; par pulado.")
+            summary["falhas"].append(pair)
+            continue
+        tasks.append(
+            {
+                "pair": pair,
+                "json_anterior": paths[0],
+                "json_recente": paths[1],
+                "csv_anterior_name": previous.original_filename,
+                "csv_recente_name": current.original_filename,
+                "date_range_anterior": previous.date_range,
+                "date_range_recente": current.date_range,
+                "output_path": os.path.join(
+                    os.path.dirname(paths[1]), TREND_REPORT_FILENAME
+                ),
+                "run_folder": os.path.basename(os.path.dirname(paths[1])),
+                "frontend_url": frontend_url,
+            }
+        )
+
+    workers = BACKFILL_WORKERS if workers is None else workers
+    workers = max(1, min(workers, len(tasks)))
+    logger.info(f"Backfill de {len(tasks)} tendências com {workers} processo(s).")
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        # Pares consecutivos vão para o mesmo processo, que reaproveita do seu
+        # cache o resumo compartilhado entre eles.
+        results = (
+            executor.map(
+                _generate_trend_pair, tasks, chunksize=-(-len(tasks) // workers)
+            )
+            if executor is not None
+            else map(_generate_trend_pair, tasks)
+        )
+        for task, result in zip(tasks, results):
+            if result["temp_path"] is None:
+                summary["falhas"].append(task["pair"])
+                continue
+            _apply_trend_pair(result, task, db, trend_model)
+            completed.add(task["pair"])
+            _save_backfill_state(state_path, completed)
+            summary["gerados"] += 1
+            logger.info(f"Tendência do par {task['pair']} regenerada.")
+    finally:
+        # Interrompido (erro ou Ctrl+C), os pares ainda não iniciados são
+        # cancelados; os concluídos ficam no estado para o `resume`.
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    if not summary["falhas"] and os.path.exists(state_path):
+        os.remove(state_path)
+    return summary
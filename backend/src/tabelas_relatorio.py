@@ -0,0 +1,349 @@
+"""
+Consulta paginada das tabelas (CSVs) e do resumo JSON de um relatório.
+
+Os visualizadores de CSV buscam as linhas sob demanda em vez de embutir o
+arquivo inteiro no HTML. Na primeira consulta, o CSV é convertido em uma cópia
+colunar (`.npz`, uma matriz de texto por coluna) guardada na própria execução;
+as consultas seguintes filtram, ordenam e paginam sobre essas colunas, mantidas
+em memória por um cache LRU do processo.
+
+O visualizador do `resumo_problemas.json` lê os Casos por intervalos: um índice
+com a posição (em bytes) de cada registro do array permite devolver uma página
+com uma única leitura do arquivo, sem decodificar o JSON inteiro a cada pedido.
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from . import renderizacao_sob_demanda
+from .gerador_paginas import FILENAME_JSON_SUMMARY
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_NAME = "_cache_tabelas"
+TAMANHO_PAGINA_PADRAO = 100
+TAMANHO_PAGINA_MAXIMO = 1000
+# Quantidade de tabelas mantidas em memória pelo processo.
+TABELAS_EM_CACHE = int(os.getenv("TABELAS_EM_CACHE", "8"))
+# Formato das datas gravadas nos CSVs dos relatórios (ver `_save_csv`).
+FORMATO_DATA_CSV = "%d/%m/%Y %H:%M:%S"
+
+_CHAVE_COLUNAS = "__colunas__"
+
+REGISTROS_POR_PAGINA_PADRAO = 100
+REGISTROS_POR_PAGINA_MAXIMO = 1000
+_ESPACOS = re.compile(r"\s*")
+
+
+class TabelaColunar:
+    """Colunas de um CSV como matrizes de texto, com chaves de ordenação sob demanda."""
+
+    __slots__ = ("_chaves_ordenacao", "_textos_minusculos", "colunas", "dados")
+
+    def __init__(self, colunas: list, dados: dict):
+        self.colunas = colunas
+        self.dados = dados
+        self._chaves_ordenacao = {}
+        self._textos_minusculos = {}
+
+    @property
+    def num_linhas(self) -> int:
+        return len(self.dados[self.colunas[0]]) if self.colunas else 0
+
+    def texto_minusculo(self, coluna: str) -> np.ndarray:
+        """Valores da coluna em minúsculas, usados na busca sem diferenciar caixa."""
+        if coluna not in self._textos_minusculos:
+            self._textos_minusculos[coluna] = np.char.lower(self.dados[coluna])
+        return self._textos_minusculos[coluna]
+
+    def chave_ordenacao(self, coluna: str) -> pd.Series:
+        """
+        Chave de ordenação da coluna: numérica, data ou texto (sem diferenciar caixa).
+
+        Células vazias viram NaN/NaT e ficam sempre no fim da ordenação.
+        """
+        if coluna not in self._chaves_ordenacao:
+            valores = pd.Series(self.dados[coluna])
+            preenchidos = valores != ""
+            numeros = pd.to_numeric(valores.where(preenchidos), errors="coerce")
+            if numeros[preenchidos].notna().all():
+                chave = numeros
+            else:
+                datas = pd.to_datetime(
+                    valores.where(preenchidos), format=FORMATO_DATA_CSV, errors="coerce"
+                )
+                if datas[preenchidos].notna().all():
+                    chave = datas
+                else:
+                    chave = pd.Series(self.texto_minusculo(coluna)).where(preenchidos)
+            self._chaves_ordenacao[coluna] = chave
+        return self._chaves_ordenacao[coluna]
+
+
+def _caminho_copia_colunar(run_dir: str, tabela: str) -> str:
+    nome = tabela.replace("/", "__").rsplit(".", 1)[0]
+    return os.path.join(run_dir, CACHE_DIR_NAME, f"{nome}.npz")
+
+
+def _gravar_copia_colunar(csv_path: str, npz_path: str) -> TabelaColunar:
+    """Lê o CSV uma única vez e grava sua cópia colunar (troca atômica do arquivo)."""
+    df = pd.read_csv(
+        csv_path, sep=";", dtype=str, keep_default_na=False, encoding="utf-8-sig"
+    )
+    colunas = list(df.columns)
+    dados = {coluna: df[coluna].to_numpy(dtype=str) for coluna in colunas}
+    os.makedirs(os.path.dirname(npz_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=".npz", dir=os.path.dirname(npz_path))
+    with os.fdopen(fd, "wb") as f:
+        np.savez(
+            f,
+            **{_CHAVE_COLUNAS: np.array(colunas, dtype=str)},
+            **{f"c{i}": dados[coluna] for i, coluna in enumerate(colunas)},
+        )
+    os.replace(tmp_path, npz_path)
+    logger.info(f"Cópia colunar de '{csv_path}' gravada em '{npz_path}'.")
+    return TabelaColunar(colunas, dados)
+
+
+@lru_cache(maxsize=TABELAS_EM_CACHE)
+def _carregar_tabela_cacheada(
+    csv_path: str, npz_path: str, _mtime_ns: int, _tamanho: int
+) -> TabelaColunar:
+    if os.path.exists(npz_path) and os.path.getmtime(npz_path) >= os.path.getmtime(
+        csv_path
+    ):
+        with np.load(npz_path, allow_pickle=False) as npz:
+            colunas = [str(coluna) for coluna in npz[_CHAVE_COLUNAS]]
+            dados = {coluna: npz[f"c{i}"] for i, coluna in enumerate(colunas)}
+        return TabelaColunar(colunas, dados)
+    return _gravar_copia_colunar(csv_path, npz_path)
+
+
+def _validar_tabela(tabela: str) -> str:
+    """Normaliza o caminho de uma tabela, aceitando apenas CSVs dentro da execução."""
+    relativo = os.path.normpath(tabela).replace(os.sep, "/")
+    if (
+        not relativo.endswith(".csv")
+        or relativo.startswith(("..", "/"))
+        or relativo.split("/")[0].startswith(("_", "."))
+    ):
+        raise ValueError(f"Tabela inválida: '{tabela}'.")
+    return relativo
+
+
+def carregar_tabela(run_dir: str, tabela: str) -> TabelaColunar:
+    """
+    Carrega uma tabela da execução, reutilizando a cópia colunar quando atual.
+
+    No modo sob demanda, os CSVs dos planos de ação por squad são gerados na
+    primeira consulta.
+
+    Args:
+        run_dir: Diretório da execução.
+        tabela: Caminho do CSV relativo à execução (ex.: `atuar.csv`).
+
+    Raises:
+        ValueError: Se o caminho não apontar para um CSV dentro da execução.
+        FileNotFoundError: Se a tabela não existir neste relatório.
+    """
+    relativo = _validar_tabela(tabela)
+    csv_path = os.path.join(run_dir, relativo)
+    if not os.path.exists(csv_path):
+        csv_path = renderizacao_sob_demanda.obter_pagina(run_dir, relativo)
+        if csv_path is None:
+            raise FileNotFoundError(f"Tabela '{tabela}' não encontrada.")
+    stat = os.stat(csv_path)
+    return _carregar_tabela_cacheada(
+        csv_path,
+        _caminho_copia_colunar(run_dir, relativo),
+        stat.st_mtime_ns,
+        stat.st_size,
+    )
+
+
+def consultar_tabela(
+    tabela: TabelaColunar,
+    pagina: int = 1,
+    tamanho_pagina: int = TAMANHO_PAGINA_PADRAO,
+    ordenar_por: str | None = None,
+    ordem: str = "asc",
+    busca: str | None = None,
+    filtros: dict | None = None,
+) -> dict:
+    """
+    Filtra, ordena e pagina as linhas de uma tabela.
+
+    Args:
+        tabela: Tabela colunar carregada.
+        pagina: Página pedida (a partir de 1).
+        tamanho_pagina: Linhas por página (limitado a `TAMANHO_PAGINA_MAXIMO`).
+        ordenar_por: Coluna de ordenação (opcional).
+        ordem: "asc" ou "desc".
+        busca: Texto procurado em qualquer coluna, sem diferenciar caixa.
+        filtros: Texto procurado por coluna ({coluna: texto}).
+
+    Returns:
+        Dicionário com as colunas, as linhas da página e os totais.
+
+    Raises:
+        ValueError: Se uma coluna de ordenação/filtro não existir ou a ordem for inválida.
+    """
+    filtros = filtros or {}
+    for coluna in [*filtros, *([ordenar_por] if ordenar_por else [])]:
+        if coluna not in tabela.dados:
+            raise ValueError(f"Coluna desconhecida: '{coluna}'.")
+    if ordem not in ("asc", "desc"):
+        raise ValueError("A ordem deve ser 'asc' ou 'desc'.")
+    tamanho_pagina = max(1, min(tamanho_pagina, TAMANHO_PAGINA_MAXIMO))
+
+    mascara = np.ones(tabela.num_linhas, dtype=bool)
+    if busca:
+        encontrado = np.zeros(tabela.num_linhas, dtype=bool)
+        for coluna in tabela.colunas:
+            encontrado |= (
+                np.char.find(tabela.texto_minusculo(coluna), busca.lower()) >= 0
+            )
+        mascara &= encontrado
+    for coluna, texto in filtros.items():
+        mascara &= np.char.find(tabela.texto_minusculo(coluna), texto.lower()) >= 0
+    indices = np.flatnonzero(mascara)
+
+    if ordenar_por:
+        chave = tabela.chave_ordenacao(ordenar_por).iloc[indices]
+        indices = chave.sort_values(
+            ascending=ordem == "asc", kind="mergesort", na_position="last"
+        ).index.to_numpy()
+
+    total = len(indices)
+    total_paginas = max(1, -(-total // tamanho_pagina))
+    pagina = max(1, min(pagina, total_paginas))
+    inicio = (pagina - 1) * tamanho_pagina
+    indices_pagina = indices[inicio : inicio + tamanho_pagina]
+    linhas = (
+        np.column_stack(
+            [tabela.dados[c][indices_pagina] for c in tabela.colunas]
+        ).tolist()
+        if tabela.colunas
+        else []
+    )
+    return {
+        "colunas": tabela.colunas,
+        "linhas": linhas,
+        "pagina": pagina,
+        "tamanho_pagina": tamanho_pagina,
+        "total": total,
+        "total_paginas": total_paginas,
+        "total_geral": tabela.num_linhas,
+    }
+
+
+# =============================================================================
+# LEITURA POR INTERVALOS DO RESUMO JSON
+# =============================================================================
+
+
+def _indexar_registros_json(json_path: str) -> np.ndarray:
+    """
+    Calcula o intervalo em bytes `[início, fim)` de cada registro do array JSON.
+
+    O arquivo é decodificado uma única vez; o índice resultante permite ler
+    qualquer faixa de registros diretamente do disco.
+    """
+    with open(json_path, "rb") as f:
+        conteudo = f.read()
+    texto = conteudo.decode("utf-8")
+    decoder = json.JSONDecoder()
+    pos = _ESPACOS.match(texto).end()
+    if texto[pos : pos + 1] != "[":
+        raise ValueError(f"O resumo '{json_path}' não é um array de registros.")
+    pos = _ESPACOS.match(texto, pos + 1).end()
+
+    limites = []
+    while texto[pos : pos + 1] not in ("]", ""):
+        _, fim = decoder.raw_decode(texto, pos)
+        limites.append((pos, fim))
+        pos = _ESPACOS.match(texto, fim).end()
+        if texto[pos : pos + 1] == ",":
+            pos = _ESPACOS.match(texto, pos + 1).end()
+    indice = np.array(limites, dtype=np.int64).reshape(-1, 2)
+
+    if not conteudo.isascii():
+        # Converte posições de caracteres em posições de bytes (UTF-8).
+        tamanhos = np.frombuffer(texto.encode("utf-32-le"), dtype=np.uint32)
+        bytes_por_char = np.select(
+            [tamanhos < 0x80, tamanhos < 0x800, tamanhos < 0x10000], [1, 2, 3], 4
+        )
+        acumulado = np.concatenate(([0], np.cumsum(bytes_por_char)))
+        indice = acumulado[indice]
+    return indice
+
+
+def _caminho_indice_resumo(run_dir: str) -> str:
+    return os.path.join(run_dir, CACHE_DIR_NAME, "resumo_problemas.indice.npy")
+
+
+@lru_cache(maxsize=TABELAS_EM_CACHE)
+def _carregar_indice_cacheado(
+    json_path: str, indice_path: str, _mtime_ns: int, _tamanho: int
+) -> np.ndarray:
+    if os.path.exists(indice_path) and os.path.getmtime(
+        indice_path
+    ) >= os.path.getmtime(json_path):
+        return np.load(indice_path, allow_pickle=False)
+    indice = _indexar_registros_json(json_path)
+    os.makedirs(os.path.dirname(indice_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=".npy", dir=os.path.dirname(indice_path))
+    with os.fdopen(fd, "wb") as f:
+        np.save(f, indice, allow_pickle=False)
+    os.replace(tmp_path, indice_path)
+    logger.info(f"Índice de registros de '{json_path}' gravado em '{indice_path}'.")
+    return indice
+
+
+def ler_registros_resumo(
+    run_dir: str, inicio: int = 0, quantidade: int = REGISTROS_POR_PAGINA_PADRAO
+) -> bytes:
+    """
+    Lê uma faixa de registros do `resumo_problemas.json` da execução.
+
+    Os registros são copiados do arquivo sem serem decodificados: a resposta é
+    montada com os bytes originais da faixa pedida.
+
+    Args:
+        run_dir: Diretório da execução.
+        inicio: Posição do primeiro registro (a partir de 0).
+        quantidade: Quantidade de registros (limitada a `REGISTROS_POR_PAGINA_MAXIMO`).
+
+    Returns:
+        Um documento JSON (bytes) com `inicio`, `quantidade`, `total` e `registros`.
+
+    Raises:
+        FileNotFoundError: Se a execução não tiver o resumo JSON.
+    """
+    json_path = os.path.join(run_dir, FILENAME_JSON_SUMMARY)
+    stat = os.stat(json_path)
+    indice = _carregar_indice_cacheado(
+        json_path, _caminho_indice_resumo(run_dir), stat.st_mtime_ns, stat.st_size
+    )
+    total = len(indice)
+    inicio = max(0, min(inicio, total))
+    quantidade = max(0, min(quantidade, REGISTROS_POR_PAGINA_MAXIMO, total - inicio))
+
+    registros = b""
+    if quantidade:
+        # A faixa entre o primeiro e o último registro já contém as vírgulas
+        # separadoras, então é copiada em uma única leitura.
+        byte_inicio = int(indice[inicio, 0])
+        byte_fim = int(indice[inicio + quantidade - 1, 1])
+        with open(json_path, "rb") as f:
+            f.seek(byte_inicio)
+            registros = f.read(byte_fim - byte_inicio)
+    cabecalho = json.dumps({"inicio": inicio, "quantidade": quantidade, "total": total})
+    return cabecalho[:-1].encode("utf-8") + b', "registros": [' + registros + b"]}"
@@ -0,0 +1,131 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const container = document.getElementById('table-container');
+    const statusMessage = document.getElementById('status-message');
+    const searchInput = document.getElementById('search-input');
+    const prevButton = document.getElementById('prev-page');
+    const nextButton = document.getElementById('next-page');
+    const pageInfo = document.getElementById('page-info');
+    // As linhas são buscadas na API de tabelas do relatório:
+    // /reports/<execução>/... -> /api/v1/reports/<execução>/tabelas/<csv>
+    const apiUrl = globalThis.location.pathname.replace(
+        /\/reports\/([^/]+)\/.*$/, '/api/v1/reports/$1/tabelas/'
+    ) + csvPathInReport;
+    const state = { pagina: 1, totalPaginas: 1, ordenarPor: null, ordem: 'asc', busca: '' };
+    let hot;
+    let colunas = [];
+    let requestId = 0;
+
+    function headerLabel(coluna) {
+        if (coluna !== state.ordenarPor) return coluna;
+        return coluna + (state.ordem === 'asc' ? ' ▲' : ' ▼');
+    }
+
+    function render(resultado) {
+        colunas = resultado.colunas;
+        const options = {
+            data: resultado.linhas,
+            colHeaders: colunas.map(headerLabel),
+        };
+        if (hot) {
+            hot.updateSettings(options);
+        } else {
+            hot = new Handsontable(container, Object.assign(options, {
+                rowHeaders: (index) => (deslocamentoDaPagina() + index + 1),
+                width: '100%',
+                height: '70vh',
+                stretchH: 'last',
+                autoRowSize: true,
+                wordWrap: true,
+                licenseKey: 'non-commercial-and-evaluation',
+                readOnly: true,
+                manualColumnResize: true,
+                manualRowResize: true,
+                afterOnCellMouseDown: function(event, coords) {
+                    // Clique no cabeçalho: ordena no servidor (asc -> desc -> sem ordenação).
+                    if (coords.row !== -1 || coords.col < 0) return;
+                    const coluna = colunas[coords.col];
+                    if (state.ordenarPor !== coluna) {
+                        state.ordenarPor = coluna;
+                        state.ordem = 'asc';
+                    } else if (state.ordem === 'asc') {
+                        state.ordem = 'desc';
+                    } else {
+                        state.ordenarPor = null;
+                    }
+                    state.pagina = 1;
+                    carregarPagina();
+                },
+            }));
+        }
+        state.totalPaginas = resultado.total_paginas;
+        pageInfo.textContent = 'Página ' + resultado.pagina + ' de ' + resultado.total_paginas;
+        prevButton.disabled = resultado.pagina <= 1;
+        nextButton.disabled = resultado.pagina >= resultado.total_paginas;
+        statusMessage.textContent = resultado.total === resultado.total_geral
+            ? 'Exibindo ' + resultado.linhas.length + ' de ' + resultado.total + ' registros.'
+            : 'Exibindo ' + resultado.linhas.length + ' de ' + resultado.total
+                + ' registros filtrados (' + resultado.total_geral + ' no total).';
+    }
+
+    function deslocamentoDaPagina() {
+        return (state.pagina - 1) * pageSize;
+    }
+
+    function carregarPagina() {
+        const params = new URLSearchParams({ pagina: state.pagina, tamanho_pagina: pageSize });
+        if (state.ordenarPor) {
+            params.set('ordenar_por', state.ordenarPor);
+            params.set('ordem', state.ordem);
+        }
+        if (state.busca) params.set('busca', state.busca);
+        const current = ++requestId;
+        statusMessage.textContent = 'Carregando dados...';
+        fetch(apiUrl + '?' + params.toString())
+            .then((response) => {
+                if (!response.ok) throw new Error('HTTP ' + response.status);
+                return response.json();
+            })
+            .then((resultado) => {
+                // Descarta respostas de requisições já substituídas por outra.
+                if (current !== requestId) return;
+                state.pagina = resultado.pagina;
+                render(resultado);
+            })
+            .catch(() => {
+                if (current === requestId) {
+                    statusMessage.textContent = 'Erro ao carregar os dados do relatório.';
+                }
+            });
+    }
+
+    prevButton.addEventListener('click', () => {
+        if (state.pagina > 1) { state.pagina -= 1; carregarPagina(); }
+    });
+    nextButton.addEventListener('click', () => {
+        if (state.pagina < state.totalPaginas) { state.pagina += 1; carregarPagina(); }
+    });
+    let searchTimer;
+    searchInput.addEventListener('input', () => {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => {
+            state.busca = searchInput.value.trim();
+            state.pagina = 1;
+            carregarPagina();
+        }, 300);
+    });
+
+    carregarPagina();
+
+    // Lógica de navegação contextual para o botão "Voltar".
+    // Isso é usado pelos relatórios de "Plano de Ação" para permitir
+    // voltar para a página de análise da squad de origem.
+    const backButton = document.getElementById('back-button');
+    if (backButton) {
+        const backPage = new URLSearchParams(globalThis.location.search).get('back');
+        if (backPage) {
+            backButton.href = backPage;
+            // Ajusta o texto para ser mais genérico, funcionando para qualquer origem.
+            backButton.innerHTML = '&larr; Voltar para a página anterior';
+        }
+    }
+});
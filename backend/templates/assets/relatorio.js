@@ -0,0 +1,90 @@
+var collapsibles = document.querySelectorAll(".collapsible, .collapsible-row");
+collapsibles.forEach(function(item) {
+    item.addEventListener("click", function() {
+        this.classList.toggle("active");
+        var content = this.nextElementSibling;
+        if (content.style.display === "block") {
+            content.style.display = "none";
+        } else {
+            content.style.display = "block";
+        }
+    });
+});
+
+// Nas páginas de squad, os alertas e a cronologia de cada Caso ficam em um
+// fragmento JSON (um por squad), carregado apenas na primeira expansão de linha.
+var casosSquad = document.getElementById("casos-squad");
+var detalhesCasos = null;
+
+function carregarDetalhesCasos() {
+    if (!detalhesCasos) {
+        detalhesCasos = fetch(casosSquad.dataset.detalhes).then(function(response) {
+            if (!response.ok) {
+                throw new Error("HTTP " + response.status);
+            }
+            return response.json();
+        });
+        detalhesCasos.catch(function() {
+            detalhesCasos = null;
+        });
+    }
+    return detalhesCasos;
+}
+
+function adicionarParagrafoDetalhe(container, rotulo, valor) {
+    var paragrafo = document.createElement("p");
+    var strong = document.createElement("strong");
+    var code = document.createElement("code");
+    strong.textContent = rotulo;
+    code.textContent = valor;
+    paragrafo.append(strong, " ", code);
+    container.appendChild(paragrafo);
+}
+
+function criarLinhaDetalhes(row) {
+    var detailRow = document.createElement("tr");
+    var cell = detailRow.insertCell();
+    var content = document.createElement("div");
+    detailRow.className = "details-row";
+    cell.colSpan = row.cells.length;
+    content.className = "details-row-content";
+    content.textContent = "Carregando detalhes...";
+    cell.appendChild(content);
+    row.after(detailRow);
+    carregarDetalhesCasos()
+        .then(function(detalhes) {
+            // Cada Caso: [total de alertas, números dos alertas, cronologia formatada].
+            var caso = detalhes.casos[Number(row.dataset.caso) - 1];
+            content.textContent = "";
+            adicionarParagrafoDetalhe(content, "Alertas Envolvidos (" + caso[0] + "):", caso[1]);
+            adicionarParagrafoDetalhe(content, "Cronologia:", caso[2]);
+        })
+        .catch(function(error) {
+            console.error("Erro ao carregar os detalhes do Caso:", error);
+            content.textContent = "Não foi possível carregar os detalhes do Caso.";
+        });
+    return detailRow;
+}
+
+var expandableRows = document.querySelectorAll(".expandable-row");
+expandableRows.forEach(function(row) {
+    row.addEventListener("click", function() {
+        this.classList.toggle("active");
+        var detailRow;
+        if (this.dataset.caso) {
+            detailRow = this.nextElementSibling;
+            if (!detailRow || !detailRow.classList.contains("details-row")) {
+                detailRow = criarLinhaDetalhes(this);
+            }
+        } else {
+            detailRow = document.querySelector(this.dataset.target);
+        }
+        if (detailRow) {
+            if (detailRow.style.display === "table-row") {
+                detailRow.style.display = "none";
+            } else {
+                detailRow.style.display = "table-row";
+            }
+        }
+    });
+});
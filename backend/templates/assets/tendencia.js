@@ -0,0 +1,84 @@
+document.addEventListener("DOMContentLoaded", function() {
+    // Botão de voltar contextual: ?back=<página> substitui o destino padrão.
+    try {
+        const backButton = document.querySelector(".report-header a");
+        if (backButton) {
+            const urlParams = new URLSearchParams(window.location.search);
+            const backPage = urlParams.get("back");
+            if (backPage) {
+                // Verifica se o caminho de volta precisa de ajuste de diretório
+                const isSubdirectory = backButton.getAttribute("href").startsWith("../");
+                backButton.href = (isSubdirectory && !backPage.startsWith("../")) ? "../" + backPage : backPage;
+                backButton.textContent = "← Voltar para a Análise";
+            }
+        }
+    } catch (e) {
+        console.error("Erro ao configurar o botão de voltar contextual:", e);
+    }
+
+    function updateParentHeights(element, visited = new Set()) {
+        if (!element) return;
+        let parentContent = element.closest(".collapsible-content");
+        if (parentContent && !visited.has(parentContent) && parentContent.style.maxHeight && parentContent.style.maxHeight !== "0px") {
+            visited.add(parentContent);
+            parentContent.style.maxHeight = parentContent.scrollHeight + 50 + "px";
+            updateParentHeights(parentContent, visited);
+        }
+    }
+
+    document.querySelectorAll(".collapsible").forEach(button => {
+        button.addEventListener("click", function() {
+            this.classList.toggle("active");
+            const content = this.nextElementSibling;
+            if (content.style.maxHeight && content.style.maxHeight !== "0px") {
+                content.style.maxHeight = null;
+            } else {
+                content.style.maxHeight = content.scrollHeight + 50 + "px";
+            }
+            updateParentHeights(content);
+        });
+    });
+
+    setTimeout(() => {
+        document.querySelectorAll(".collapsible.active").forEach(button => {
+            const content = button.nextElementSibling;
+            if (content) {
+                content.style.maxHeight = content.scrollHeight + 50 + "px";
+                updateParentHeights(content);
+            }
+        });
+    }, 150);
+
+    document.querySelectorAll(".tab-container").forEach(container => {
+        const tabLinks = container.querySelectorAll(".tab-link");
+        const tabContents = container.querySelectorAll(".tab-content");
+        tabLinks.forEach(link => {
+            link.addEventListener("click", () => {
+                const targetId = link.dataset.target;
+                if (link.classList.contains("active")) return;
+                tabLinks.forEach(l => l.classList.remove("active"));
+                tabContents.forEach(c => c.classList.remove("active"));
+                link.classList.add("active");
+                const targetContent = container.querySelector("#" + targetId);
+                if (targetContent) { targetContent.classList.add("active"); }
+                updateParentHeights(targetContent || link);
+            });
+        });
+    });
+
+    // Linhas expansíveis da tabela de Casos persistentes.
+    document.querySelectorAll(".expandable-row").forEach(row => {
+        row.addEventListener("click", () => {
+            const detailsRow = document.getElementById(row.dataset.target);
+            if (detailsRow) {
+                row.classList.toggle("open");
+                detailsRow.classList.toggle("open");
+                // Atualiza a altura do contêiner pai se estiver dentro de um 'collapsible'
+                const parentContent = row.closest(".collapsible-content");
+                if (parentContent && parentContent.style.maxHeight) {
+                    parentContent.style.maxHeight = parentContent.scrollHeight + "px";
+                }
+            }
+        });
+    });
+});
@@ -1,6 +1,11 @@
-import pytest
+import json
 import os
+
+import pandas as pd
+import pytest
+
 from src.app import create_app, db
+from src.constants import ACAO_FALHA_PERSISTENTE, ACAO_SEMPRE_OK
 
 
 @pytest.fixture
@@ -54,3 +59,80 @@ def client(app):
 def runner(app):
     """Um runner para executar comandos CLI do Flask, derivado da fixture 'app'."""
     return app.test_cli_runner()
+
+
+def _resumo_casos(casos):
+    """Resumo com um Caso por (squad, recurso, ação, alertas)."""
+    return pd.DataFrame(
+        [
+            {
+                "assignment_group": squad,
+                "short_description": "CPU alta",
+                "node": recurso,
+                "cmdb_ci": recurso,
+                "source": "Zabbix",
+                "metric_name": "cpu",
+                "cmdb_ci.sys_class_name": "cmdb_ci_server",
+                "acao_sugerida": acao,
+                "alert_count": alertas,
+                "score_ponderado_final": 10.0,
+            }
+            for squad, recurso, acao, alertas in casos
+        ]
+    )
+
+
+@pytest.fixture
+def casos_execucoes():
+    """
+    Casos de três execuções: um Caso presente em todas, Casos que surgem e
+    somem e um Caso sem necessidade de atuação.
+    """
+    return [
+        [
+            ("A", "srv1", ACAO_FALHA_PERSISTENTE, 2),
+            ("B", "srv2", ACAO_FALHA_PERSISTENTE, 1),
+        ],
+        [
+            ("A", "srv1", ACAO_FALHA_PERSISTENTE, 3),
+            ("B", "srv3", ACAO_FALHA_PERSISTENTE, 4),
+            ("B", "srv9", ACAO_SEMPRE_OK, 9),
+        ],
+        [
+            ("A", "srv1", ACAO_FALHA_PERSISTENTE, 1),
+            ("C", "srv2", ACAO_FALHA_PERSISTENTE, 5),
+        ],
+    ]
+
+
+@pytest.fixture
+def resumo_casos():
+    """Fábrica de resumos de Casos, um por (squad, recurso, ação, alertas)."""
+    return _resumo_casos
+
+
+@pytest.fixture
+def persistir_relatorio(app):
+    """
+    Fábrica que grava o resumo JSON de uma execução em `REPORTS_FOLDER/<nome>`
+    e registra o `Report` correspondente (argumentos extras vão para o modelo).
+    """
+    from src.models import Report
+
+    def persistir(nome, casos, **kwargs):
+        run = os.path.join(app.config["REPORTS_FOLDER"], nome)
+        os.makedirs(run)
+        json_path = os.path.join(run, "resumo_problemas.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(_resumo_casos(casos).to_dict(orient="records"), f)
+        report = Report(
+            original_filename=f"{nome}.csv",
+            report_path=os.path.join(run, "resumo_geral.html"),
+            json_summary_path=json_path,
+            **kwargs,
+        )
+        db.session.add(report)
+        db.session.commit()
+        return report
+
+    return persistir
@@ -0,0 +1,127 @@
+"""
+Testes para a geração do relatório de tendência (comparativo_periodos.html).
+"""
+
+import json
+
+import pandas as pd
+import pytest
+
+from src.analise_tendencia import (
+    calculate_kpis_and_merged_df,
+    casar_casos,
+    gerar_analise_comparativa,
+)
+from src.constants import ACAO_FALHA_PERSISTENTE
+
+
+def _caso(squad, problema, recurso, alertas):
+    return {
+        "assignment_group": squad,
+        "short_description": problema,
+        "node": recurso,
+        "cmdb_ci": recurso,
+        "source": "Zabbix",
+        "metric_name": "cpu",
+        "cmdb_ci.sys_class_name": "cmdb_ci_server",
+        "acao_sugerida": ACAO_FALHA_PERSISTENTE,
+        "alert_count": alertas,
+    }
+
+
+def _gravar(path, casos):
+    path.write_text(json.dumps(casos), encoding="utf-8")
+    return str(path)
+
+
+def test_relatorio_de_tendencia_agrupa_casos_persistentes_por_squad(tmp_path):
+    """
+    GIVEN dois resumos com Casos persistentes em duas squads, um Caso resolvido
+    e um Caso novo,
+    WHEN o relatório de tendência é gerado,
+    THEN cada squad deve listar apenas os seus Casos persistentes, com o texto
+    escapado, e o título deve ser preenchido.
+    """
+    anterior = _gravar(
+        tmp_path / "anterior.json",
+        [
+            _caso("Squad <A>", "CPU alta", "srv1", 2),
+            _caso("Squad <A>", "Disco", "srv2", 1),
+            _caso("Squad B", "CPU alta", "srv3", 4),
+            _caso("Squad B", "Rede", "srv4", 3),
+        ],
+    )
+    recente = _gravar(
+        tmp_path / "recente.json",
+        [
+            _caso("Squad <A>", "CPU alta", "srv1", 5),
+            _caso("Squad <A>", "Disco", "srv2", 1),
+            _caso("Squad B", "CPU alta", "srv3", 1),
+            _caso("Squad C", "Memória", "srv5", 7),
+        ],
+    )
+    output_path = tmp_path / "run" / "comparativo_periodos.html"
+
+    kpis, resumo = gerar_analise_comparativa(
+        anterior, recente, "anterior.csv", "recente.csv", str(output_path)
+    )
+
+    html = output_path.read_text(encoding="utf-8")
+    assert kpis["persistent"] == 3
+    assert kpis["resolved"] == 1
+    assert kpis["new"] == 1
+    assert resumo in html
+    assert "<title>📊 Análise Comparativa de Alertas</title>" in html
+    assert "{title}" not in html
+    assert "tendencia." in html and ".css" in html
+
+    detalhes_a = html.split("id='details-squad--a-'")[1].split("</tbody>")[0]
+    detalhes_b = html.split("id='details-squad-b'")[1].split("</tbody>")[0]
+    assert "Squad &lt;A&gt;" in html
+    assert detalhes_a.count("<tr><td>") == 2
+    assert "<td>srv1</td><td>5</td><td>2</td>" in detalhes_a
+    assert detalhes_b.count("<tr><td>") == 1
+    assert "<td>srv3</td><td>1</td><td>4</td>" in detalhes_b
+    assert "<td>Total</td>" in html
+
+
+def test_casamento_por_chave_equivale_ao_merge_por_colunas():
+    """
+    GIVEN dois períodos com Casos persistentes, resolvidos e novos,
+    WHEN os Casos são casados pela chave de 64 bits,
+    THEN as posições e os KPIs devem coincidir com um merge externo pelas
+    colunas de identificação, e Casos duplicados devem ser rejeitados.
+    """
+    df_p1 = pd.DataFrame(
+        [
+            _caso("A", "CPU alta", "srv1", 2),
+            _caso("A", "Disco", "srv2", 1),
+            _caso("B", "Rede", "srv3", 4),
+        ]
+    )
+    df_p2 = pd.DataFrame(
+        [
+            _caso("C", "Memória", "srv9", 7),
+            _caso("B", "Rede", "srv3", 1),
+            _caso("A", "CPU alta", "srv1", 5),
+        ]
+    )
+
+    casamento = casar_casos(df_p1, df_p2)
+    kpis, merged_df = calculate_kpis_and_merged_df(df_p1, df_p2)
+
+    assert casamento.resolvidos.tolist() == [1]
+    assert casamento.novos.tolist() == [0]
+    assert casamento.persistentes_p1.tolist() == [2, 0]
+    assert casamento.persistentes_p2.tolist() == [1, 2]
+    assert (kpis["persistent"], kpis["resolved"], kpis["new"]) == (2, 1, 1)
+    assert (kpis["alerts_persistent"], kpis["alerts_persistent_p1"]) == (6, 6)
+    persistentes = merged_df[merged_df["_merge"] == "both"]
+    assert persistentes["node"].tolist() == ["srv1", "srv3"]
+    assert persistentes["alert_count_p2"].tolist() == [5, 1]
+    assert merged_df.loc[merged_df["_merge"] == "right_only", "node"].tolist() == [
+        "srv9"
+    ]
+
+    with pytest.raises(pd.errors.MergeError):
+        casar_casos(pd.concat([df_p1, df_p1.iloc[:1]]), df_p2)
@@ -6,6 +6,8 @@ e garantem que a refatoração não quebre a funcionalidade principal.
 """
 
 import io
+import json
+import os
 from unittest.mock import patch
 
 from src.models import Report, db
@@ -242,6 +244,146 @@ def test_compare_files_success(client, monkeypatch):
     assert called_kwargs["files"][1].filename == "file2.csv"
 
 
+def test_compare_multi_files(client, monkeypatch):
+    """
+    Valida o endpoint POST /api/v1/compare/multi.
+
+    Todos os arquivos enviados em `files` chegam à camada de serviço e a
+    resposta traz a comparação; um número de arquivos fora dos limites
+    resulta em 400.
+    """
+    monkeypatch.setenv("ADMIN_USER", "testadmin")
+    monkeypatch.setenv("ADMIN_PASSWORD", "testpass")
+    jwt_token = client.post(
+        "/admin/login", json={"username": "testadmin", "password": "testpass"}
+    ).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {jwt_token}"}
+    comparison = {"periodos": [{"arquivo": "p1.csv"}], "squads": [], "casos": []}
+
+    with patch("src.services.process_multi_comparison") as mock_service:
+        mock_service.return_value = {
+            "run_folder": "run_compare_multi",
+            "report_filename": "comparativo_multiplo.html",
+            "comparison": comparison,
+        }
+        response = client.post(
+            "/api/v1/compare/multi",
+            headers=headers,
+            data={"files": [(io.BytesIO(b"x"), f"p{i}.csv") for i in range(4)]},
+            content_type="multipart/form-data",
+        )
+
+    assert response.status_code == 200
+    json_data = response.get_json()
+    assert json_data["success"] is True
+    assert json_data["report_url"].endswith(
+        "/run_compare_multi/comparativo_multiplo.html"
+    )
+    assert json_data["periodos"] == comparison["periodos"]
+    assert len(mock_service.call_args.kwargs["files"]) == 4
+
+    poucos = client.post(
+        "/api/v1/compare/multi",
+        headers=headers,
+        data={"files": [(io.BytesIO(b"x"), f"p{i}.csv") for i in range(2)]},
+        content_type="multipart/form-data",
+    )
+    assert poucos.status_code == 400
+
+
+def test_compare_reports_by_id_uses_persisted_summaries(client, app, monkeypatch):
+    """
+    Valida o endpoint POST /api/v1/compare/reports.
+
+    A comparação entre dois relatórios existentes é gerada a partir dos resumos
+    persistidos, reaproveitada do cache na segunda chamada (em qualquer ordem
+    dos IDs) e removida quando um dos relatórios é excluído.
+    """
+    monkeypatch.setenv("ADMIN_USER", "testadmin")
+    monkeypatch.setenv("ADMIN_PASSWORD", "testpass")
+    jwt_token = client.post(
+        "/admin/login", json={"username": "testadmin", "password": "testpass"}
+    ).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {jwt_token}"}
+
+    reports_folder = app.config["REPORTS_FOLDER"]
+    report_ids = []
+    for nome, intervalo, alertas in (
+        ("run_jan", "01/01/2024 a 31/01/2024", 3),
+        ("run_fev", "01/02/2024 a 29/02/2024", 5),
+    ):
+        run = os.path.join(reports_folder, nome)
+        os.makedirs(run)
+        json_path = os.path.join(run, "resumo_problemas.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(
+                [
+                    {
+                        "assignment_group": "Squad A",
+                        "short_description": "CPU alta",
+                        "node": "srv1",
+                        "cmdb_ci": "srv1",
+                        "acao_sugerida": "Falha Persistente",
+                        "alert_count": alertas,
+                    }
+                ],
+                f,
+            )
+        report = Report(
+            original_filename=f"{nome}.csv",
+            report_path=os.path.join(run, "resumo_geral.html"),
+            json_summary_path=json_path,
+            date_range=intervalo,
+        )
+        db.session.add(report)
+        db.session.commit()
+        report_ids.append(report.id)
+
+    with patch("src.services.analisar_arquivo_csv") as mock_analise:
+        primeira = client.post(
+            "/api/v1/compare/reports",
+            headers=headers,
+            json={"report_id_a": report_ids[1], "report_id_b": report_ids[0]},
+        )
+        segunda = client.post(
+            "/api/v1/compare/reports",
+            headers=headers,
+            json={"report_id_a": report_ids[0], "report_id_b": report_ids[1]},
+        )
+    mock_analise.assert_not_called()
+
+    assert primeira.status_code == 200
+    assert primeira.get_json()["cached"] is False
+    assert segunda.get_json() == {**primeira.get_json(), "cached": True}
+    pagina = client.get(primeira.get_json()["report_url"])
+    assert pagina.status_code == 200
+    assert "run_jan.csv" in pagina.get_data(as_text=True).split("run_fev.csv")[0]
+
+    client.delete(f"/api/v1/reports/{report_ids[0]}", headers=headers)
+    assert not [
+        pasta for pasta in os.listdir(reports_folder) if "compare_reports" in pasta
+    ]
+
+    invalida = client.post(
+        "/api/v1/compare/reports",
+        headers=headers,
+        json={"report_id_a": report_ids[1], "report_id_b": report_ids[1]},
+    )
+    ausente = client.post(
+        "/api/v1/compare/reports",
+        headers=headers,
+        json={"report_id_a": report_ids[1], "report_id_b": 999},
+    )
+    booleano = client.post(
+        "/api/v1/compare/reports",
+        headers=headers,
+        json={"report_id_a": report_ids[1], "report_id_b": True},
+    )
+    assert invalida.status_code == 400
+    assert ausente.status_code == 404
+    assert booleano.status_code == 400
+
+
 def test_submit_feedback_success(client, monkeypatch):
     """
     Valida o endpoint POST /api/v1/feedback em caso de sucesso.
@@ -0,0 +1,111 @@
+"""
+Testes para o cache LRU dos resumos de execução.
+"""
+
+import json
+import os
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+
+from src import cache_resumos
+from src.analise_tendencia import load_summary_from_json
+from src.services import calculate_kpi_summary
+
+
+@pytest.fixture(autouse=True)
+def cache_limpo():
+    """Cada teste começa com o cache do processo vazio."""
+    cache_resumos.CACHE.limpar()
+    yield
+    cache_resumos.CACHE.limpar()
+
+
+def _gravar_resumo(caminho, casos):
+    registros = [
+        {"acao_sugerida": "Falha Persistente", "alert_count": i + 1}
+        for i in range(casos)
+    ]
+    caminho.write_text(json.dumps(registros), encoding="utf-8")
+    return str(caminho)
+
+
+def test_resumo_e_kpis_sao_reaproveitados_ate_o_arquivo_mudar(tmp_path):
+    """
+    GIVEN um resumo JSON já carregado e com os KPIs calculados,
+    WHEN ele é pedido de novo e, depois, regravado com outro conteúdo,
+    THEN as leituras repetidas devem vir do cache, alterações no DataFrame
+    devolvido não devem afetá-lo e o arquivo regravado deve ser lido de novo.
+    """
+    caminho = _gravar_resumo(tmp_path / "resumo_problemas.json", 2)
+
+    primeiro = load_summary_from_json(caminho)
+    primeiro["alert_count"] = 0
+    segundo = load_summary_from_json(caminho)
+    kpis = calculate_kpi_summary(caminho)
+    calculate_kpi_summary(caminho)
+
+    assert segundo["alert_count"].tolist() == [1, 2]
+    assert kpis["total_casos"] == 2
+    estatisticas = cache_resumos.CACHE.estatisticas()
+    assert estatisticas["acertos"] == 2
+    assert estatisticas["falhas"] == 2
+    assert estatisticas["entradas"] == 1
+
+    _gravar_resumo(tmp_path / "resumo_problemas.json", 3)
+    stat = os.stat(caminho)
+    os.utime(caminho, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert len(load_summary_from_json(caminho)) == 3
+    assert calculate_kpi_summary(caminho)["total_casos"] == 3
+
+
+def test_orcamento_de_memoria_descarta_o_menos_usado(tmp_path):
+    """
+    GIVEN um cache com orçamento para apenas dois resumos,
+    WHEN três resumos são carregados, reusando o primeiro antes do terceiro,
+    THEN o resumo usado há mais tempo deve ser descartado e contado.
+    """
+    df = pd.DataFrame({"alert_count": range(100)})
+    cache = cache_resumos.CacheResumos(
+        limite_bytes=2 * int(df.memory_usage(deep=True).sum())
+    )
+    carregar = Mock(return_value=df)
+    caminhos = []
+    for nome in ("a", "b", "c"):
+        caminho = tmp_path / f"{nome}.json"
+        caminho.write_text("[]")
+        caminhos.append(str(caminho))
+
+    cache.obter_resumo(caminhos[0], carregar)
+    cache.obter_resumo(caminhos[1], carregar)
+    cache.obter_resumo(caminhos[0], carregar)
+    cache.obter_resumo(caminhos[2], carregar)
+    cache.obter_resumo(caminhos[0], carregar)
+
+    assert carregar.call_count == 3
+    assert cache.estatisticas()["descartes"] == 1
+    cache.obter_resumo(caminhos[1], carregar)
+    assert carregar.call_count == 4
+
+
+def test_exclusao_do_relatorio_invalida_os_resumos_da_pasta(tmp_path):
+    """
+    GIVEN resumos de duas execuções em cache,
+    WHEN a pasta de uma delas é invalidada,
+    THEN apenas os resumos dela devem sair do cache.
+    """
+    (tmp_path / "run_1").mkdir()
+    (tmp_path / "run_10").mkdir()
+    run_1 = _gravar_resumo(tmp_path / "run_1" / "resumo_problemas.json", 1)
+    run_10 = _gravar_resumo(tmp_path / "run_10" / "resumo_problemas.json", 1)
+    load_summary_from_json(run_1)
+    load_summary_from_json(run_10)
+
+    removidos = cache_resumos.CACHE.invalidar_diretorio(str(tmp_path / "run_1"))
+
+    assert removidos == 1
+    estatisticas = cache_resumos.CACHE.estatisticas()
+    assert estatisticas["entradas"] == 1
+    assert estatisticas["invalidacoes"] == 1
@@ -0,0 +1,87 @@
+"""
+Testes para a comparação de múltiplos períodos.
+"""
+
+import pandas as pd
+import pytest
+
+from src import comparacao_multipla
+from src.constants import ACAO_FALHA_PERSISTENTE, ACAO_SEMPRE_OK
+
+PERIODOS = [
+    [
+        ("A", "srv1", ACAO_FALHA_PERSISTENTE, 2),
+        ("B", "srv2", ACAO_FALHA_PERSISTENTE, 1),
+    ],
+    [
+        ("A", "srv1", ACAO_FALHA_PERSISTENTE, 3),
+        ("B", "srv9", ACAO_SEMPRE_OK, 9),
+    ],
+    [
+        ("A", "srv1", ACAO_FALHA_PERSISTENTE, 1),
+        ("B", "srv2", ACAO_FALHA_PERSISTENTE, 5),
+        ("B", "srv3", ACAO_FALHA_PERSISTENTE, 4),
+    ],
+    [
+        ("B", "srv2", ACAO_FALHA_PERSISTENTE, 6),
+        ("B", "srv3", ACAO_FALHA_PERSISTENTE, 2),
+    ],
+]
+
+
+def test_comparacao_calcula_presenca_sequencias_e_variacao_por_squad(resumo_casos):
+    """
+    GIVEN quatro períodos com Casos que persistem, somem e reaparecem, e um Caso
+    sem necessidade de atuação,
+    WHEN os períodos são comparados,
+    THEN o balanço de cada período, a variação das squads e o mapa de presença
+    e as sequências de cada Caso devem considerar apenas os Casos de atuação.
+    """
+    periodos = [{"arquivo": f"p{i}.csv", "intervalo": None} for i in range(4)]
+
+    resultado = comparacao_multipla.comparar_periodos(
+        [resumo_casos(casos) for casos in PERIODOS], periodos
+    )
+
+    balanco = [
+        (p["total_casos"], p["novos"], p["resolvidos"], p["persistentes"], p["alertas"])
+        for p in resultado["periodos"]
+    ]
+    assert balanco == [
+        (2, None, None, None, 3),
+        (1, 0, 1, 1, 3),
+        (3, 2, 0, 1, 10),
+        (2, 0, 1, 2, 8),
+    ]
+    squads = {s["nome"]: s for s in resultado["squads"]}
+    assert [s["nome"] for s in resultado["squads"]] == ["B", "A"]
+    assert squads["B"]["casos"] == [1, 0, 2, 2]
+    assert squads["B"]["variacao_casos"] == [None, -1, 2, 0]
+    assert squads["A"]["variacao_alertas"] == [None, 1, -2, -1]
+
+    casos = {c["recurso"]: c for c in resultado["casos"]}
+    assert set(casos) == {"srv1", "srv2", "srv3"}
+    # srv2 some no segundo período e reaparece: bits 0, 2 e 3.
+    assert casos["srv2"]["presenca"] == 0b1101
+    assert (casos["srv2"]["sequencia_atual"], casos["srv2"]["maior_sequencia"]) == (
+        2,
+        2,
+    )
+    assert casos["srv2"]["alertas"] == [1, 0, 5, 6]
+    assert (casos["srv1"]["sequencia_atual"], casos["srv1"]["maior_sequencia"]) == (
+        0,
+        3,
+    )
+    assert resultado["casos"][0]["recurso"] == "srv2"
+
+
+def test_casamento_rejeita_casos_duplicados_em_um_periodo(resumo_casos):
+    """Um Caso repetido no mesmo período torna o casamento ambíguo."""
+    duplicado = resumo_casos(
+        [("A", "srv1", ACAO_FALHA_PERSISTENTE, 1)] * 2,
+    )
+
+    with pytest.raises(pd.errors.MergeError):
+        comparacao_multipla.casar_periodos(
+            [resumo_casos(PERIODOS[0]), duplicado, resumo_casos(PERIODOS[2])]
+        )
@@ -0,0 +1,96 @@
+"""
+Testes para o envio comprimido dos artefatos dos relatórios.
+"""
+
+import gzip
+import os
+
+import pytest
+
+from src import compressao_artefatos
+
+
+@pytest.fixture
+def pagina(app):
+    """Uma página HTML grande o bastante para ser comprimida."""
+    run = os.path.join(app.config["REPORTS_FOLDER"], "run_gzip")
+    os.makedirs(run)
+    caminho = os.path.join(run, "atuar.html")
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write("<html><body>" + "<tr><td>Caso</td></tr>" * 500 + "</body></html>")
+    return caminho
+
+
+def test_serve_versao_gzip_quando_cliente_aceita(client, pagina):
+    """
+    GIVEN uma página grande de um relatório,
+    WHEN ela é requisitada com e sem `Accept-Encoding: gzip`,
+    THEN a versão gzip deve ser criada ao lado do original e enviada com
+    `Content-Encoding`, `Vary` e um ETag distinto do da versão sem compressão.
+    """
+    with open(pagina, "rb") as f:
+        original = f.read()
+
+    comprimida = client.get(
+        "/reports/run_gzip/atuar.html", headers={"Accept-Encoding": "gzip, deflate"}
+    )
+    sem_compressao = client.get("/reports/run_gzip/atuar.html")
+
+    assert comprimida.status_code == 200
+    assert comprimida.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in comprimida.headers["Vary"]
+    assert comprimida.mimetype == "text/html"
+    assert "Last-Modified" in comprimida.headers
+    assert gzip.decompress(comprimida.data) == original
+    assert len(comprimida.data) < len(original)
+    assert os.path.isfile(pagina + ".gz")
+
+    assert "Content-Encoding" not in sem_compressao.headers
+    assert "Accept-Encoding" in sem_compressao.headers["Vary"]
+    assert sem_compressao.data == original
+    assert sem_compressao.headers["ETag"] != comprimida.headers["ETag"]
+
+
+def test_versao_gzip_suporta_etag_range_e_e_recriada(client, pagina):
+    """
+    GIVEN a versão gzip de uma página já servida,
+    WHEN o cliente revalida pelo ETag, pede uma faixa de bytes ou a página é
+    regenerada,
+    THEN deve receber 304, 206 com os bytes da versão comprimida e, após a
+    regeneração, a nova versão comprimida.
+    """
+    headers = {"Accept-Encoding": "gzip"}
+    primeira = client.get("/reports/run_gzip/atuar.html", headers=headers)
+
+    revalidada = client.get(
+        "/reports/run_gzip/atuar.html",
+        headers={**headers, "If-None-Match": primeira.headers["ETag"]},
+    )
+    faixa = client.get(
+        "/reports/run_gzip/atuar.html", headers={**headers, "Range": "bytes=0-9"}
+    )
+
+    assert revalidada.status_code == 304
+    assert faixa.status_code == 206
+    assert faixa.headers["Content-Encoding"] == "gzip"
+    assert faixa.data == primeira.data[:10]
+
+    with open(pagina, "w", encoding="utf-8") as f:
+        f.write("<html>" + "nova versão " * 200 + "</html>")
+    stat = os.stat(pagina)
+    os.utime(pagina, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    atualizada = client.get("/reports/run_gzip/atuar.html", headers=headers)
+
+    assert gzip.decompress(atualizada.data).startswith(b"<html>nova")
+    assert atualizada.headers["ETag"] != primeira.headers["ETag"]
+
+
+def test_arquivo_pequeno_ou_nao_comprimivel_segue_sem_compressao(tmp_path):
+    """Arquivos pequenos ou de extensões binárias não são comprimidos."""
+    pequeno = tmp_path / "pequeno.html"
+    pequeno.write_text("<p>ok</p>")
+    binario = tmp_path / "dados.zip"
+    binario.write_bytes(b"x" * 4096)
+
+    assert not compressao_artefatos.comprimivel(str(pequeno))
+    assert not compressao_artefatos.comprimivel(str(binario))
@@ -0,0 +1,48 @@
+"""
+Testes para a formatação vetorizada das células HTML.
+"""
+
+from html import escape
+
+import numpy as np
+import pandas as pd
+
+from src import formatacao_html
+from src.gerador_html import gerar_cores_para_barra
+
+
+def test_escapar_serie_equivale_a_escape_por_valor():
+    """
+    GIVEN textos repetidos, ausentes e categóricos com caracteres especiais,
+    WHEN a série é escapada de forma vetorizada,
+    THEN o resultado deve ser igual a `html.escape(str(valor))` linha a linha.
+    """
+    valores = ["<b>A</b>", "x & y", "<b>A</b>", None, "'q'"]
+    serie = pd.Series(valores, index=[10, 11, 12, 13, 14])
+
+    escapada = formatacao_html.escapar_serie(serie)
+    categorica = formatacao_html.escapar_serie(serie.astype("category"))
+
+    esperado = [escape(str(v)) for v in serie]
+    assert escapada.tolist() == esperado
+    assert list(escapada.index) == [10, 11, 12, 13, 14]
+    assert categorica.tolist()[:3] == esperado[:3]
+    assert formatacao_html.escapar_serie(serie.iloc[0:0]).empty
+
+
+def test_formatar_decimais_datas_e_cores():
+    """
+    GIVEN scores e datas de Casos,
+    WHEN são formatados como colunas,
+    THEN devem coincidir com a formatação feita valor a valor.
+    """
+    scores = pd.Series([0.0, 12.25, 20.0, 37.5, 5.05])
+    datas = pd.Series(pd.to_datetime(["2025-03-01 08:05", None]))
+
+    decimais = formatacao_html.formatar_decimais(scores)
+    cores = formatacao_html.formatar_cores_de_fundo(scores, 0, 20)
+
+    assert decimais.tolist() == [f"{v:.1f}" for v in scores]
+    assert cores.tolist() == [gerar_cores_para_barra(v, 0, 20)[0] for v in scores]
+    assert formatacao_html.formatar_datas(datas).tolist() == ["01/03 08:05", ""]
+    assert formatacao_html.formatar_decimais(pd.Series([], dtype=np.float64)).empty
@@ -0,0 +1,106 @@
+"""
+Testes para o ambiente Jinja2 compartilhado, os assets versionados e a minificação das páginas.
+"""
+
+import os
+
+from src import gerador_html
+
+
+def test_obter_template_reutiliza_template_compilado():
+    """
+    GIVEN o template principal do relatório,
+    WHEN ele é solicitado duas vezes,
+    THEN a mesma instância compilada deve ser retornada (sem reler o arquivo).
+    """
+    primeiro = gerador_html.obter_template("template.html")
+    segundo = gerador_html.obter_template("template.html")
+
+    assert primeiro is segundo
+
+
+def test_ambiente_recarrega_template_quando_mtime_muda(tmp_path):
+    """
+    GIVEN um template em disco já compilado pelo ambiente,
+    WHEN o arquivo é alterado e seu mtime avança,
+    THEN a próxima renderização deve refletir o novo conteúdo.
+    """
+    template_path = tmp_path / "pagina.html"
+    template_path.write_text("Olá {{ nome }}", encoding="utf-8")
+    env = gerador_html._criar_ambiente_jinja(str(tmp_path))
+
+    assert env.get_template("pagina.html").render(nome="Squad") == "Olá Squad"
+    assert env.get_template("pagina.html") is env.get_template("pagina.html")
+
+    template_path.write_text("Tchau {{ nome }}", encoding="utf-8")
+    mtime = os.path.getmtime(template_path) + 10
+    os.utime(template_path, (mtime, mtime))
+
+    assert env.get_template("pagina.html").render(nome="Squad") == "Tchau Squad"
+
+
+def test_renderizar_template_string_nao_escapa_html():
+    """
+    GIVEN um trecho de template com conteúdo HTML já escapado pelo chamador,
+    WHEN ele é renderizado,
+    THEN o HTML deve ser preservado (autoescape desligado, como antes).
+    """
+    html = gerador_html.renderizar_template_string(
+        "<p>{{ conteudo }}</p>", conteudo="<strong>ok</strong>"
+    )
+
+    assert html == "<p><strong>ok</strong></p>"
+
+
+def test_paginas_referenciam_assets_versionados(client):
+    """
+    GIVEN o template principal,
+    WHEN uma página é renderizada em um subdiretório da execução,
+    THEN o CSS/JS deve ser referenciado por URL relativa com o hash do conteúdo,
+    servida como imutável; hashes antigos servem a versão atual sem cache.
+    """
+    html = gerador_html.renderizar_template(
+        "template.html", title="T", body_content="", footer_text="", nivel=1
+    )
+    nome_css = gerador_html.nome_asset_versionado("relatorio.css")
+
+    assert f'href="../../_assets/{nome_css}"' in html
+    assert "<style>" not in html
+    response = client.get(f"/reports/_assets/{nome_css}")
+    assert response.status_code == 200
+    assert "immutable" in response.headers["Cache-Control"]
+    antigo = client.get("/reports/_assets/relatorio.000000000000.css")
+    assert antigo.status_code == 200
+    assert antigo.headers["Cache-Control"] == "no-cache"
+    assert client.get("/reports/_assets/inexistente.123.css").status_code == 404
+
+
+def test_minificar_linhas_html_preserva_pre_e_script():
+    """
+    GIVEN um HTML indentado com blocos <pre> e <script>,
+    WHEN ele é minificado (inclusive a partir de fragmentos de um stream),
+    THEN a indentação e as linhas em branco devem sair, exceto nesses blocos.
+    """
+    html = (
+        "<div>\n"
+        "    <p>Olá</p>\n"
+        "\n"
+        "    <pre>\n"
+        "  a\n"
+        "    b</pre>\n"
+        "    <script>\n"
+        "        const x = `\n"
+        "            y`;\n"
+        "    </script>\n"
+        "</div>\n"
+    )
+    fragmentos = [html[i : i + 7] for i in range(0, len(html), 7)]
+
+    minificado = "".join(
+        gerador_html.minificar_linhas_html(gerador_html._dividir_em_linhas(fragmentos))
+    )
+
+    assert minificado == (
+        "<div>\n<p>Olá</p>\n<pre>\n  a\n    b</pre>\n"
+        "<script>\n        const x = `\n            y`;\n    </script>\n</div>\n"
+    )
@@ -0,0 +1,318 @@
+"""
+Testes para a geração das páginas HTML do ecossistema de relatórios.
+"""
+
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from src import context_builder, gerador_html, gerador_paginas
+from src.constants import ACAO_FALHA_PERSISTENTE, ACAO_INTERMITENTE, ACAO_SEMPRE_OK
+from src.renderizacao_incremental import ReaproveitamentoPaginas
+
+
+@pytest.fixture
+def df_atuacao():
+    """Casos que precisam de atuação, com duas squads e nomes que exigem escape."""
+    return pd.DataFrame(
+        {
+            "assignment_group": ["Squad <A>", "Squad <A>", "Squad <A>", "Squad B"],
+            "short_description": ["CPU alta", "CPU alta", "Disco cheio", "Rede"],
+            "node": ["srv1", "srv2.node", "srv3", "srv4"],
+            "cmdb_ci": ["srv1", "srv2", "srv3", "srv4"],
+            "metric_name": ["cpu", "cpu", "disk", "network"],
+            "acao_sugerida": [
+                ACAO_FALHA_PERSISTENTE,
+                ACAO_FALHA_PERSISTENTE,
+                ACAO_INTERMITENTE,
+                ACAO_INTERMITENTE,
+            ],
+            "score_ponderado_final": [30.0, 12.5, 45.25, 8.0],
+            "alert_count": [3, 10, 1, 2],
+            "alert_numbers": ["A1, A2, A3", "A4", "A5", "A6, A7"],
+            "status_chronology": [
+                ["Closed", "Canceled"],
+                ["Closed Incomplete"],
+                ["Open"],
+                ["No Task Found"],
+            ],
+            "first_event": pd.to_datetime(["2025-01-01 10:00"] * 4),
+            "last_event": pd.to_datetime(["2025-01-02 11:30"] * 4),
+        }
+    )
+
+
+def _gerar_e_gravar_manifesto(
+    df_atuacao, run_dir, timestamp_str, reaproveitamento=None, **kwargs
+):
+    """Gera as páginas por squad e grava o manifesto, como o ecossistema faz."""
+    if reaproveitamento is None:
+        reaproveitamento = ReaproveitamentoPaginas(str(run_dir))
+    manifesto = gerador_paginas.gerar_paginas_por_squad(
+        df_atuacao,
+        str(run_dir),
+        timestamp_str,
+        reaproveitamento=reaproveitamento,
+        **kwargs,
+    )
+    gerador_paginas.gravar_manifesto_renderizacao(
+        str(run_dir), manifesto, reaproveitamento
+    )
+    return manifesto
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_gerar_paginas_por_squad_escreve_pagina_ordenada(tmp_path, df_atuacao, workers):
+    """
+    GIVEN Casos de atuação de duas squads,
+    WHEN as páginas por squad são geradas, em série ou em paralelo,
+    THEN cada squad deve ter sua página, com métricas ordenadas por score,
+    Casos ordenados por alertas e índices de detalhe contínuos, e os detalhes
+    dos Casos em um fragmento JSON separado.
+    """
+    gerador_paginas.gerar_paginas_por_squad(
+        df_atuacao, str(tmp_path), "01/01/2025 às 12:00:00", workers=workers
+    )
+
+    squads_dir = tmp_path / gerador_paginas.REPORTS_DIR_SQUADS
+    html = (squads_dir / "squad-Squad_A.html").read_text(encoding="utf-8")
+    assert (squads_dir / "squad-Squad_B.html").exists()
+    assert "<title>Relatório da Squad: Squad &lt;A&gt;</title>" in html
+    assert "Relatório gerado em 01/01/2025 às 12:00:00" in html
+    # A métrica 'disk' (score 45.25) vem antes de 'cpu' (score 30.0).
+    assert html.index("📁</span>disk") < html.index("📁</span>cpu")
+    # Dentro de 'cpu', o Caso com 10 alertas vem antes do Caso com 3.
+    assert html.index("<td>10</td>") < html.index("<td>3</td>")
+    assert 'data-caso="1"' in html and 'data-caso="3"' in html
+    assert "<small style='color:var(--text-secondary-color)'>srv2.node</small>" in html
+    # Alertas e cronologia ficam fora da página, no fragmento JSON da squad.
+    assert 'data-detalhes="squad-Squad_A.detalhes.json"' in html
+    assert "A1, A2, A3" not in html
+    detalhes = json.loads(
+        (squads_dir / "squad-Squad_A.detalhes.json").read_text(encoding="utf-8")
+    )
+    assert detalhes["casos"][2] == [3, "A1, A2, A3", "✅ Closed → 🚫 Canceled"]
+    assert len(detalhes["casos"]) == 3
+
+
+def test_gerar_paginas_detalhe_problema_agrupa_por_problema(tmp_path, df_atuacao):
+    """
+    GIVEN Casos de vários problemas,
+    WHEN as páginas de detalhe de uma lista de problemas são geradas,
+    THEN cada página deve conter apenas os Casos do seu problema, ordenados por
+    alertas, com totais corretos e o link da squad.
+    """
+    gerador_paginas.gerar_paginas_detalhe_problema(
+        df_atuacao,
+        pd.Index(["CPU alta", "Inexistente"]),
+        str(tmp_path),
+        "resumo_geral.html",
+        "aberto_",
+        "squads",
+        "01/01/2025 às 12:00:00",
+    )
+
+    assert [p.name for p in tmp_path.iterdir()] == ["detalhe_aberto_CPU_alta.html"]
+    html = (tmp_path / "detalhe_aberto_CPU_alta.html").read_text(encoding="utf-8")
+    assert "Total de alertas: <strong>13</strong>" in html
+    assert "Casos distintos: <strong>2</strong>" in html
+    assert "srv3" not in html
+    assert html.index("<strong>srv2</strong>") < html.index("<strong>srv1</strong>")
+    assert '<a href="../squads/squad-Squad_A.html">Squad &lt;A&gt;</a>' in html
+    assert "<td>01/01 10:00 a<br>02/01 11:30</td>" in html
+
+
+def test_gerar_paginas_detalhe_metrica_lista_problemas(tmp_path, df_atuacao):
+    """
+    GIVEN Casos em aberto de várias métricas,
+    WHEN as páginas de detalhe por métrica são geradas,
+    THEN cada métrica deve ter sua página com os problemas e Casos correspondentes.
+    """
+    gerador_paginas.gerar_paginas_detalhe_metrica(
+        df_atuacao,
+        pd.Index(["cpu", "disk"]),
+        str(tmp_path),
+        "resumo_geral.html",
+        "squads",
+        "01/01/2025 às 12:00:00",
+    )
+
+    html = (tmp_path / "detalhe_metrica_cpu.html").read_text(encoding="utf-8")
+    assert "Total de Casos em aberto: <strong>2</strong>" in html
+    assert "<td>CPU alta</td>" in html
+    assert "Disco cheio" not in html
+    assert (tmp_path / "detalhe_metrica_disk.html").exists()
+
+
+def test_gerar_paginas_por_squad_paralelo_identico_ao_serial(tmp_path, df_atuacao):
+    """
+    GIVEN os mesmos Casos de atuação,
+    WHEN as páginas por squad são geradas em série e em paralelo,
+    THEN os arquivos e o manifesto devem ser idênticos byte a byte.
+    """
+    serial_dir, paralelo_dir = tmp_path / "serial", tmp_path / "paralelo"
+
+    manifesto_serial = _gerar_e_gravar_manifesto(
+        df_atuacao, serial_dir, "01/01/2025 às 12:00:00", workers=1
+    )
+    manifesto_paralelo = _gerar_e_gravar_manifesto(
+        df_atuacao, paralelo_dir, "01/01/2025 às 12:00:00", workers=2
+    )
+
+    assert manifesto_serial == manifesto_paralelo
+    assert [entrada["squad"] for entrada in manifesto_serial] == [
+        "Squad <A>",
+        "Squad B",
+    ]
+    arquivos = sorted(
+        p.relative_to(serial_dir) for p in serial_dir.rglob("*") if p.is_file()
+    )
+    assert "planos_de_acao/plano-de-acao-Squad_B.csv" in map(str, arquivos)
+    assert "manifesto_renderizacao.json" in map(str, arquivos)
+    for relativo in arquivos:
+        assert (serial_dir / relativo).read_bytes() == (
+            paralelo_dir / relativo
+        ).read_bytes()
+
+
+def test_gerar_paginas_por_squad_reaproveita_squads_inalteradas(tmp_path, df_atuacao):
+    """
+    GIVEN uma execução anterior e um novo upload que altera apenas a 'Squad B',
+    WHEN as páginas por squad são geradas reaproveitando a execução anterior,
+    THEN os artefatos da 'Squad <A>' devem ser vinculados (mesmo conteúdo, sem
+    renderizar), com a página trazendo o rodapé da nova execução, e apenas os
+    da 'Squad B' renderizados novamente.
+    """
+    anterior, atual = tmp_path / "run_1", tmp_path / "run_2"
+    _gerar_e_gravar_manifesto(df_atuacao, anterior, "01/01/2025 às 12:00:00")
+    df_novo = df_atuacao.copy()
+    df_novo.loc[3, "alert_count"] = 7
+
+    manifesto = _gerar_e_gravar_manifesto(
+        df_novo,
+        atual,
+        "02/01/2025 às 12:00:00",
+        reaproveitamento=ReaproveitamentoPaginas(
+            str(atual),
+            str(anterior),
+            gerador_paginas.carregar_hashes_paginas(str(anterior)),
+        ),
+    )
+
+    assert manifesto == [
+        {"squad": nome, "arquivos": gerador_paginas._arquivos_squad(sanitizado)}
+        for nome, sanitizado in (("Squad <A>", "Squad_A"), ("Squad B", "Squad_B"))
+    ]
+    pagina_a, *demais_a = gerador_paginas._arquivos_squad("Squad_A")
+    for arquivo in demais_a:
+        assert os.path.samefile(anterior / arquivo, atual / arquivo)
+    assert (atual / pagina_a).read_text(encoding="utf-8") == (
+        (anterior / pagina_a)
+        .read_text(encoding="utf-8")
+        .replace("01/01/2025 às 12:00:00", "02/01/2025 às 12:00:00")
+    )
+    assert "Relatório gerado em 02/01/2025" in (atual / pagina_a).read_text("utf-8")
+    pagina_b = (atual / "squads" / "squad-Squad_B.html").read_text(encoding="utf-8")
+    assert "Relatório gerado em 02/01/2025 às 12:00:00" in pagina_b
+    assert "<td>7</td>" in pagina_b
+    hashes_anteriores = gerador_paginas.carregar_hashes_paginas(str(anterior))
+    hashes_atuais = gerador_paginas.carregar_hashes_paginas(str(atual))
+    assert (
+        hashes_atuais["squads/squad-Squad_A.html"]
+        == (hashes_anteriores["squads/squad-Squad_A.html"])
+    )
+    assert (
+        hashes_atuais["squads/squad-Squad_B.html"]
+        != (hashes_anteriores["squads/squad-Squad_B.html"])
+    )
+
+
+def test_paginas_de_detalhe_sao_reaproveitadas_ate_os_templates_mudarem(
+    tmp_path, df_atuacao, monkeypatch
+):
+    """
+    GIVEN páginas de detalhe de métrica de uma execução anterior,
+    WHEN são geradas novamente com os mesmos dados,
+    THEN devem ser reaproveitadas; com outra versão dos templates, renderizadas.
+    """
+    anterior = tmp_path / "run_1"
+
+    def gerar(run_dir):
+        reaproveitamento = ReaproveitamentoPaginas(
+            str(run_dir),
+            str(anterior),
+            gerador_paginas.carregar_hashes_paginas(str(anterior)),
+        )
+        gerador_paginas.gerar_paginas_detalhe_metrica(
+            df_atuacao,
+            pd.Index(["cpu", "disk"]),
+            str(run_dir / "detalhes"),
+            "resumo_geral.html",
+            "squads",
+            "01/01/2025 às 12:00:00",
+            reaproveitamento,
+        )
+        _gerar_e_gravar_manifesto(
+            df_atuacao,
+            run_dir,
+            "01/01/2025 às 12:00:00",
+            reaproveitamento=reaproveitamento,
+        )
+        return reaproveitamento
+
+    assert gerar(anterior).reaproveitadas == 0
+    assert gerar(tmp_path / "run_2").reaproveitadas == 4
+    monkeypatch.setattr(gerador_html, "versao_templates", lambda: "nova-versao")
+    assert gerar(tmp_path / "run_3").reaproveitadas == 0
+
+    pagina = "detalhes/detalhe_metrica_cpu.html"
+    assert os.path.samefile(anterior / pagina, tmp_path / "run_2" / pagina)
+    assert not os.path.samefile(anterior / pagina, tmp_path / "run_3" / pagina)
+
+
+def test_ecossistema_sem_atuacao_grava_hashes_das_paginas_de_detalhe(
+    tmp_path, df_atuacao, monkeypatch
+):
+    """
+    GIVEN um upload sem nenhum Caso que precise de atuação,
+    WHEN o ecossistema é gerado duas vezes com os mesmos dados,
+    THEN o manifesto deve ser gravado com os hashes das páginas de detalhe e a
+    segunda execução deve reaproveitá-las da primeira.
+    """
+    summary = df_atuacao.assign(acao_sugerida=ACAO_SEMPRE_OK)
+    sem_atuacao = summary.iloc[:0]
+
+    def gerar(run_dir, execucao_anterior=None):
+        run_dir.mkdir()
+        context = context_builder.build_dashboard_context(
+            summary, sem_atuacao, 0, str(run_dir), "planos_de_acao", "detalhes"
+        )
+        gerador_paginas.gerar_ecossistema_de_relatorios(
+            context,
+            {"summary": summary, "df_atuacao": sem_atuacao, "num_logs_invalidos": 0},
+            str(run_dir),
+            lazy=False,
+            execucao_anterior=execucao_anterior,
+        )
+
+    class RelogioFixo:
+        @staticmethod
+        def now():
+            return datetime(2025, 1, 1, 12)
+
+    # Mesmo rodapé nas duas execuções: as páginas reaproveitadas são vinculadas.
+    monkeypatch.setattr(gerador_paginas, "datetime", RelogioFixo)
+    anterior, atual = tmp_path / "run_1", tmp_path / "run_2"
+    gerar(anterior)
+    gerar(atual, str(anterior))
+
+    hashes = gerador_paginas.carregar_hashes_paginas(str(anterior))
+    pagina = "detalhes/detalhe_geral_CPU_alta.html"
+    assert pagina in hashes
+    assert gerador_paginas.carregar_hashes_paginas(str(atual)) == hashes
+    with open(anterior / gerador_paginas.FILENAME_RENDER_MANIFEST) as f:
+        assert json.load(f)["squads"] == []
+    assert os.path.samefile(anterior / pagina, atual / pagina)
@@ -0,0 +1,123 @@
+"""
+Testes para o índice de pertinência dos Casos em mapas de bits.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src import indice_casos, serie_tendencia
+
+
+def _registrar(tmp_path, resumo_casos, casos_execucoes):
+    bitmaps = []
+    for i, casos in enumerate(casos_execucoes):
+        run_dir = tmp_path / f"run_{i}"
+        run_dir.mkdir()
+        serie_tendencia.gravar_casos_compactos(resumo_casos(casos), str(run_dir))
+        indice_casos.registrar_execucao(str(run_dir), str(tmp_path))
+        bitmaps.append(indice_casos.carregar_bitmap(str(run_dir), str(tmp_path)))
+    return bitmaps
+
+
+def test_consultas_de_conjunto_sobre_os_mapas_das_execucoes(
+    tmp_path, resumo_casos, casos_execucoes
+):
+    """
+    GIVEN três execuções registradas no índice, com um Caso em todas, Casos que
+    surgem e somem e um Caso sem necessidade de atuação,
+    WHEN as operações de conjunto são consultadas,
+    THEN os totais, as chaves e as sequências devem considerar apenas os Casos
+    de atuação, e os ids dos Casos não devem mudar com o crescimento do
+    dicionário.
+    """
+    bitmaps = _registrar(tmp_path, resumo_casos, casos_execucoes)
+    _, chaves, _ = indice_casos.carregar_dicionario(str(tmp_path))
+
+    totais = {
+        operacao: indice_casos.consultar(bitmaps, operacao, chaves)["total"]
+        for operacao in indice_casos.OPERACOES
+    }
+    persistentes = indice_casos.consultar(bitmaps, "persistentes", chaves)
+
+    assert len(chaves) == 4
+    # O mapa da primeira execução não cresce com os Casos acrescentados depois.
+    assert len(bitmaps[0]) == 1
+    assert totais == {"persistentes": 1, "novos": 1, "resolvidos": 1, "qualquer": 4}
+    srv1 = serie_tendencia.calcular_chaves_casos(resumo_casos(casos_execucoes[0][:1]))[
+        0
+    ]
+    assert persistentes["casos"] == [f"{srv1:016x}"]
+    assert [s["casos"] for s in persistentes["sequencias"]] == [2, 1, 1]
+    assert indice_casos.consultar(bitmaps, "qualquer", chaves, limite=2)["casos"] == [
+        f"{chave:016x}" for chave in chaves[:2].tolist()
+    ]
+    with pytest.raises(ValueError):
+        indice_casos.consultar(bitmaps[:1], "novos", chaves)
+
+
+def test_mapa_de_outro_dicionario_e_refeito(tmp_path, resumo_casos, casos_execucoes):
+    """
+    GIVEN mapas montados sobre um dicionário que deixou de existir,
+    WHEN o mapa de uma execução é carregado de novo,
+    THEN ele deve ser refeito sobre o novo dicionário.
+    """
+    _registrar(tmp_path, resumo_casos, casos_execucoes)
+    os.remove(tmp_path / indice_casos.ARQUIVO_DICIONARIO)
+
+    bitmap = indice_casos.carregar_bitmap(str(tmp_path / "run_2"), str(tmp_path))
+    identificador, chaves, _ = indice_casos.carregar_dicionario(str(tmp_path))
+
+    assert len(chaves) == 2
+    assert identificador
+    assert indice_casos.contar(bitmap) == 2
+    # Já montado sobre o dicionário atual: lido sem ser refeito.
+    versao = os.stat(tmp_path / "run_2" / indice_casos.ARQUIVO_BITMAP).st_mtime_ns
+    indice_casos.carregar_bitmap(str(tmp_path / "run_2"), str(tmp_path))
+    assert (
+        os.stat(tmp_path / "run_2" / indice_casos.ARQUIVO_BITMAP).st_mtime_ns == versao
+    )
+
+
+def test_api_de_pertinencia_de_casos(client, persistir_relatorio, casos_execucoes):
+    """
+    GIVEN relatórios antigos com apenas o resumo JSON em disco,
+    WHEN a pertinência dos Casos é consultada,
+    THEN o índice deve ser montado a partir deles e responder às operações sobre
+    a seleção de relatórios; operação inválida retorna 400 e relatório
+    inexistente, 404.
+    """
+    ids = [
+        persistir_relatorio(
+            f"run_{i}",
+            casos,
+            timestamp=datetime(2025, 3, 20, tzinfo=timezone.utc) + timedelta(days=i),
+        ).id
+        for i, casos in enumerate(casos_execucoes)
+    ]
+
+    todas = client.get("/api/v1/cases/membership?operacao=persistentes")
+    ultimas = client.get("/api/v1/cases/membership?operacao=novos&ultimas=2")
+    selecao = client.get(
+        f"/api/v1/cases/membership?operacao=resolvidos&report_ids={ids[2]},{ids[0]}"
+    )
+    invalida = client.get("/api/v1/cases/membership?operacao=xor")
+    inexistente = client.get("/api/v1/cases/membership?report_ids=999")
+
+    assert todas.status_code == 200
+    assert todas.get_json()["total"] == 1
+    assert [e["run_folder"] for e in todas.get_json()["execucoes"]] == [
+        "run_0",
+        "run_1",
+        "run_2",
+    ]
+    # Nas duas últimas execuções, apenas C/srv2 é novo.
+    assert ultimas.get_json()["total"] == 1
+    assert [e["report_id"] for e in selecao.get_json()["execucoes"]] == [
+        ids[0],
+        ids[2],
+    ]
+    assert selecao.get_json()["total"] == 1
+    assert invalida.status_code == 400
+    assert inexistente.status_code == 404
@@ -0,0 +1,79 @@
+"""
+Testes para o modelo de renderização das páginas por squad.
+"""
+
+import pandas as pd
+
+from src.constants import ACAO_FALHA_PERSISTENTE, ACAO_INTERMITENTE
+from src.modelo_renderizacao import construir_modelo_squads
+
+
+def _df_atuacao():
+    return pd.DataFrame(
+        {
+            "assignment_group": ["Squad B", "Squad A", "Squad A", "Squad A", "Squad A"],
+            "short_description": ["Rede", "CPU alta", "CPU alta", "Load", "Disco"],
+            "node": ["n1", "n2", "n3", "n4", "n5"],
+            "cmdb_ci": ["c1", "c2", "c3", "c4", "c5"],
+            "metric_name": ["network", "cpu", "cpu", "cpu", "disk"],
+            "acao_sugerida": [
+                ACAO_INTERMITENTE,
+                ACAO_FALHA_PERSISTENTE,
+                ACAO_INTERMITENTE,
+                ACAO_INTERMITENTE,
+                ACAO_INTERMITENTE,
+            ],
+            "score_ponderado_final": [5.0, 50.0, 20.0, 50.0, 10.0],
+            "alert_count": [1, 2, 7, 4, 3],
+            "alert_numbers": ["A1", "A2", "A3", "A4", "A5"],
+            "status_chronology": [["Closed"]] * 5,
+            "first_event": pd.to_datetime(["2025-03-01 08:05"] * 5),
+            "last_event": pd.to_datetime(["2025-03-02 17:45"] * 5),
+        }
+    )
+
+
+def test_construir_modelo_squads_agrupa_e_ordena_hierarquia():
+    """
+    GIVEN Casos de atuação de duas squads,
+    WHEN o modelo de renderização é construído,
+    THEN squads, métricas, problemas e Casos devem vir agrupados e ordenados.
+    """
+    squads = construir_modelo_squads(_df_atuacao())
+
+    assert [s.nome for s in squads] == ["Squad A", "Squad B"]
+    squad_a = squads[0]
+    assert squad_a.total_casos == 4
+    assert squad_a.total_alertas == 16
+    assert [m.nome for m in squad_a.metricas] == ["cpu", "disk"]
+
+    cpu = squad_a.metricas[0]
+    # Empate de score (50.0) é resolvido pelo nome do problema.
+    assert [p.nome for p in cpu.problemas] == ["CPU alta", "Load"]
+    cpu_alta = cpu.problemas[0]
+    assert cpu_alta.num_casos == 2
+    assert cpu_alta.total_alertas == 9
+    # A ação principal é a do Caso de maior score; os Casos seguem por alertas.
+    assert cpu_alta.acao_principal == ACAO_FALHA_PERSISTENTE
+    assert [c.alert_count for c in cpu_alta.casos] == [7, 2]
+    assert [c.row_index for c in cpu_alta.casos] == [1, 2]
+    assert squad_a.metricas[1].problemas[0].casos[0].row_index == 4
+    assert cpu_alta.casos[0].periodo == "01/03 08:05 a<br>02/03 17:45"
+    assert cpu_alta.casos[0].prioridade == "20.0"
+
+
+def test_construir_modelo_squads_calcula_top_problemas():
+    """
+    GIVEN Casos de atuação de uma squad com vários problemas,
+    WHEN o modelo é construído,
+    THEN o top de problemas deve somar alertas por problema em ordem decrescente.
+    """
+    squads = construir_modelo_squads(_df_atuacao())
+
+    assert squads[0].top_problemas == [("CPU alta", 9), ("Load", 4), ("Disco", 3)]
+    assert squads[1].top_problemas == [("Rede", 1)]
+
+
+def test_construir_modelo_squads_vazio():
+    """Um DataFrame vazio não produz nenhuma squad."""
+    assert construir_modelo_squads(_df_atuacao().iloc[0:0]) == []
@@ -0,0 +1,123 @@
+"""
+Testes para o modelo de visualização (JSON) consumido pela SPA.
+"""
+
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from src import context_builder, gerador_paginas, modelo_visualizacao
+from src.constants import (
+    ACAO_FALHA_PERSISTENTE,
+    ACAO_INTERMITENTE,
+    ACAO_SEMPRE_OK,
+)
+
+TIMESTAMP = "01/01/2025 às 12:00:00"
+
+
+@pytest.fixture
+def resultados():
+    """Resumo com Casos de atuação de duas squads e Casos OK."""
+    summary = pd.DataFrame(
+        {
+            "assignment_group": ["Squad A", "Squad A", "Squad B", "Squad C", "Squad C"],
+            "short_description": ["CPU alta", "Disco", "CPU alta", "Rede", "Rede"],
+            "node": ["srv1", None, "srv3", "srv4", "srv5"],
+            "cmdb_ci": ["srv1", "srv2", "srv3", "srv4", "srv5"],
+            "metric_name": ["cpu", "disk", "cpu", "network", "network"],
+            "acao_sugerida": [
+                ACAO_FALHA_PERSISTENTE,
+                ACAO_INTERMITENTE,
+                ACAO_INTERMITENTE,
+                ACAO_SEMPRE_OK,
+                ACAO_SEMPRE_OK,
+            ],
+            "score_ponderado_final": [30.0, 45.25, 8.0, 0.0, 0.0],
+            "alert_count": [3, 1, 2, 5, 4],
+            "alert_numbers": ["A1, A2, A3", "A4", "A5, A6", "A7", "A8"],
+            "status_chronology": [["Closed"], ["Open"], ["Canceled"], [], ["Closed"]],
+            "first_event": pd.to_datetime(["2025-01-01 10:00"] * 4 + [None]),
+            "last_event": pd.to_datetime(["2025-01-02 11:30"] * 5),
+        }
+    )
+    df_atuacao = summary[summary["acao_sugerida"] != ACAO_SEMPRE_OK].sort_values(
+        "score_ponderado_final", ascending=False
+    )
+    return summary, df_atuacao
+
+
+def _construir(summary, df_atuacao, tmp_path):
+    context = context_builder.build_dashboard_context(
+        summary, df_atuacao, 0, str(tmp_path), "planos_de_acao", "detalhes"
+    )
+    return modelo_visualizacao.construir_modelo_visualizacao(
+        context, summary, df_atuacao, TIMESTAMP
+    )
+
+
+def test_modelo_visualizacao_reune_kpis_destaques_e_casos(resultados, tmp_path):
+    """
+    GIVEN os resultados de uma análise,
+    WHEN o modelo de visualização é construído,
+    THEN deve conter os KPIs, as listas de destaque e os Casos de atuação
+    seguidos dos Casos dos problemas em destaque, em formato colunar.
+    """
+    summary, df_atuacao = resultados
+
+    modelo = json.loads(json.dumps(_construir(summary, df_atuacao, tmp_path)))
+
+    assert modelo["versao"] == modelo_visualizacao.VERSAO_MODELO
+    assert modelo["kpis"]["casos_atuacao"] == 3
+    assert modelo["kpis"]["casos_sucesso"] == 2
+    assert modelo["kpis"]["taxa_sucesso_automacao"] == "40.0%"
+    assert modelo["destaques"]["problemas_atuacao"][0] == ["CPU alta", 5]
+    assert modelo["squads"] == [["Squad A", 2], ["Squad B", 1]]
+    colunas = modelo["casos"]["colunas"]
+    assert modelo["casos"]["total"] == 5
+    squads = colunas["assignment_group"]
+    assert [squads["valores"][c] for c in squads["codigos"]] == [
+        "Squad A",
+        "Squad A",
+        "Squad B",
+        "Squad C",
+        "Squad C",
+    ]
+    assert colunas["node"][:3] == [None, "srv1", "srv3"]
+    assert colunas["first_event"][0] == "2025-01-01T10:00:00"
+    assert colunas["first_event"][-1] is None
+    assert colunas["status_chronology"][3] == []
+
+
+def test_api_retorna_modelo_com_etag(app, client, resultados):
+    """
+    GIVEN uma execução gerada no modo sob demanda,
+    WHEN o modelo de visualização é requisitado duas vezes,
+    THEN deve ser servido como JSON e revalidado pelo ETag na segunda vez;
+    execuções inexistentes retornam 404.
+    """
+    summary, df_atuacao = resultados
+    run = os.path.join(app.config["REPORTS_FOLDER"], "run_modelo")
+    os.makedirs(run)
+    context = context_builder.build_dashboard_context(
+        summary, df_atuacao, 0, run, "planos_de_acao", "detalhes"
+    )
+    gerador_paginas.gerar_ecossistema_de_relatorios(
+        context,
+        {"summary": summary, "df_atuacao": df_atuacao, "num_logs_invalidos": 0},
+        run,
+        lazy=True,
+    )
+
+    response = client.get("/api/v1/reports/run_modelo/modelo")
+    revalidada = client.get(
+        "/api/v1/reports/run_modelo/modelo",
+        headers={"If-None-Match": response.headers["ETag"]},
+    )
+
+    assert response.status_code == 200
+    assert response.get_json()["kpis"]["total_casos"] == 5
+    assert revalidada.status_code == 304
+    assert client.get("/api/v1/reports/inexistente/modelo").status_code == 404
@@ -0,0 +1,161 @@
+"""
+Testes para a renderização sob demanda das páginas do relatório.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from src import context_builder, gerador_html, gerador_paginas
+from src import renderizacao_sob_demanda
+from src.analisar_alertas import export_summary_to_json
+from src.constants import ACAO_FALHA_PERSISTENTE, ACAO_INTERMITENTE, ACAO_SEMPRE_OK
+
+TIMESTAMP = "01/01/2025 às 12:00:00"
+
+
+@pytest.fixture
+def summary():
+    """Resumo de uma execução com Casos de atuação de duas squads e um Caso OK."""
+    return pd.DataFrame(
+        {
+            "assignment_group": ["Squad <A>", "Squad <A>", "Squad B", "Squad C"],
+            "short_description": ["CPU alta", "Disco cheio", "CPU alta", "Rede"],
+            "node": ["srv1", "srv2", "srv3", "srv4"],
+            "cmdb_ci": ["srv1", "srv2", "srv3", "srv4"],
+            "metric_name": ["cpu", "disk", "cpu", "network"],
+            "acao_sugerida": [
+                ACAO_FALHA_PERSISTENTE,
+                ACAO_INTERMITENTE,
+                ACAO_INTERMITENTE,
+                ACAO_SEMPRE_OK,
+            ],
+            "score_ponderado_final": [30.0, 45.25, 8.0, 0.0],
+            "alert_count": [3, 1, 2, 5],
+            "alert_numbers": ["A1, A2, A3", "A4", "A5, A6", "A7"],
+            "status_chronology": [["Closed"], ["Open"], ["Canceled"], ["Closed"]],
+            "first_event": pd.to_datetime(["2025-01-01 10:00"] * 4),
+            "last_event": pd.to_datetime(["2025-01-02 11:30"] * 4),
+        }
+    )
+
+
+@pytest.fixture
+def run_dir(tmp_path, summary):
+    """Diretório de uma execução gerada no modo sob demanda."""
+    run = tmp_path / "run_1"
+    run.mkdir()
+    export_summary_to_json(summary, str(run / gerador_paginas.FILENAME_JSON_SUMMARY))
+    df_atuacao = summary[summary["acao_sugerida"] != ACAO_SEMPRE_OK]
+    context = context_builder.build_dashboard_context(
+        summary, df_atuacao, 0, str(run), "planos_de_acao", "detalhes"
+    )
+    gerador_paginas.gerar_ecossistema_de_relatorios(
+        context,
+        {"summary": summary, "df_atuacao": df_atuacao, "num_logs_invalidos": 0},
+        str(run),
+        lazy=True,
+    )
+    return run
+
+
+def test_ecossistema_sob_demanda_gera_apenas_o_dashboard(run_dir):
+    """
+    GIVEN o modo sob demanda,
+    WHEN o ecossistema de relatórios é gerado,
+    THEN apenas o dashboard, o resumo JSON, o modelo de visualização e os
+    metadados devem existir.
+    """
+    assert sorted(os.listdir(run_dir)) == sorted(
+        [
+            gerador_paginas.FILENAME_SUMMARY,
+            gerador_paginas.FILENAME_JSON_SUMMARY,
+            gerador_paginas.FILENAME_RUN_METADATA,
+            gerador_paginas.FILENAME_VIEW_MODEL,
+        ]
+    )
+    metadados = renderizacao_sob_demanda.carregar_metadados_execucao(str(run_dir))
+    assert metadados["modo"] == gerador_paginas.MODO_SOB_DEMANDA
+
+
+def test_obter_pagina_renderiza_uma_vez_e_reutiliza(run_dir):
+    """
+    GIVEN uma execução sob demanda,
+    WHEN a página de uma squad é pedida duas vezes,
+    THEN ela deve ser renderizada (com o plano de ação e o fragmento de detalhes)
+    na primeira e reutilizada na segunda; squads inexistentes não geram página.
+    """
+    caminho = renderizacao_sob_demanda.obter_pagina(
+        str(run_dir), "squads/squad-Squad_A.html"
+    )
+
+    with open(caminho, encoding="utf-8") as f:
+        html = f.read()
+    assert "<title>Relatório da Squad: Squad &lt;A&gt;</title>" in html
+    assert "Relatório gerado em" in html
+    assert html.index("📁</span>disk") < html.index("📁</span>cpu")
+    plano = renderizacao_sob_demanda.obter_pagina(
+        str(run_dir), "planos_de_acao/plano-de-acao-Squad_A.csv"
+    )
+    assert os.path.dirname(os.path.dirname(plano)) == os.path.dirname(
+        os.path.dirname(caminho)
+    )
+    detalhes = renderizacao_sob_demanda.obter_pagina(
+        str(run_dir), "squads/squad-Squad_A.detalhes.json"
+    )
+    assert os.path.dirname(detalhes) == os.path.dirname(caminho)
+    mtime = os.stat(caminho).st_mtime_ns
+    assert (
+        renderizacao_sob_demanda.obter_pagina(str(run_dir), "squads/squad-Squad_A.html")
+        == caminho
+    )
+    assert os.stat(caminho).st_mtime_ns == mtime
+    assert (
+        renderizacao_sob_demanda.obter_pagina(str(run_dir), "squads/squad-Nenhuma.html")
+        is None
+    )
+
+
+def test_obter_pagina_renderiza_novamente_quando_os_templates_mudam(
+    run_dir, monkeypatch
+):
+    """
+    GIVEN uma página já renderizada sob demanda,
+    WHEN a versão dos templates muda,
+    THEN a página deve ser renderizada novamente e a versão antiga descartada.
+    """
+    antigo = renderizacao_sob_demanda.obter_pagina(str(run_dir), "todas_as_squads.html")
+    monkeypatch.setattr(gerador_html, "versao_templates", lambda: "nova-versao")
+
+    novo = renderizacao_sob_demanda.obter_pagina(str(run_dir), "todas_as_squads.html")
+
+    assert novo != antigo and os.path.exists(novo)
+    assert not os.path.exists(antigo)
+    assert os.listdir(run_dir / renderizacao_sob_demanda.CACHE_DIR_NAME) == [
+        "nova-versao"
+    ]
+
+
+def test_rota_de_relatorio_renderiza_pagina_sob_demanda(app, client, summary):
+    """
+    GIVEN uma execução sob demanda na pasta de relatórios,
+    WHEN uma página de detalhe ainda não gerada é requisitada,
+    THEN ela deve ser renderizada e servida; páginas desconhecidas retornam 404.
+    """
+    run = os.path.join(app.config["REPORTS_FOLDER"], "run_lazy")
+    os.makedirs(run)
+    export_summary_to_json(summary, os.path.join(run, "resumo_problemas.json"))
+    gerador_paginas._gravar_metadados_execucao(
+        run, TIMESTAMP, "/", 0, gerador_paginas.MODO_SOB_DEMANDA
+    )
+
+    response = client.get("/reports/run_lazy/detalhes/detalhe_aberto_CPU_alta.html")
+    not_found = client.get("/reports/run_lazy/detalhes/detalhe_aberto_Nada.html")
+
+    assert response.status_code == 200
+    html = response.get_data(as_text=True)
+    assert "Resumo do Problema: CPU alta" in html
+    assert f"Relatório gerado em {TIMESTAMP}" in html
+    assert "squad-Squad_B.html" in html
+    assert not_found.status_code == 404
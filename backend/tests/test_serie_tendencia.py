@@ -0,0 +1,127 @@
+"""
+Testes para a série temporal de tendência sobre várias execuções.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from src import serie_tendencia
+
+
+@pytest.fixture
+def carregar(tmp_path, resumo_casos):
+    """Grava e carrega o armazenamento compacto de uma execução."""
+
+    def carregar_execucao(casos, nome):
+        run_dir = tmp_path / nome
+        run_dir.mkdir()
+        serie_tendencia.gravar_casos_compactos(resumo_casos(casos), str(run_dir))
+        return serie_tendencia.carregar_casos_compactos(str(run_dir), None)
+
+    return carregar_execucao
+
+
+def test_serie_calcula_novos_resolvidos_persistentes_e_idade(carregar, casos_execucoes):
+    """
+    GIVEN três execuções com um Caso presente em todas, Casos que surgem e somem
+    e um Caso sem necessidade de atuação,
+    WHEN a série é calculada,
+    THEN as contagens por execução, a trajetória das squads e a idade dos Casos
+    atuais devem considerar apenas os Casos de atuação.
+    """
+    execucoes = [carregar(casos, f"run_{i}") for i, casos in enumerate(casos_execucoes)]
+
+    serie = serie_tendencia.calcular_serie(execucoes)
+
+    assert serie["total"].tolist() == [2, 2, 2]
+    assert serie["persistentes"].tolist() == [0, 1, 1]
+    assert serie["novos"][1:].tolist() == [1, 1]
+    assert serie["resolvidos"][1:].tolist() == [1, 1]
+    assert serie["alertas"].tolist() == [3, 7, 6]
+    assert serie["idade_media"].tolist() == [1.0, 1.5, 2.0]
+    # srv1 está na terceira execução consecutiva; srv2 (squad C) é novo.
+    assert serie["idades_atuais"].tolist() == [0, 1, 0, 1]
+    trajetorias = dict(zip(serie["squads"], serie["casos_por_squad"].T.tolist()))
+    assert trajetorias == {"A": [1, 1, 1], "B": [1, 1, 0], "C": [0, 0, 1]}
+
+
+def test_armazenamento_compacto_e_gravado_atomicamente(
+    tmp_path, monkeypatch, carregar, resumo_casos, casos_execucoes
+):
+    """
+    GIVEN o armazenamento compacto de uma execução já gravado,
+    WHEN uma nova gravação falha no meio,
+    THEN o arquivo anterior deve permanecer íntegro e nenhum temporário deve
+    sobrar na pasta da execução.
+    """
+    anterior = carregar(casos_execucoes[0], "run_0")
+
+    def falhar(arquivo, **arrays):
+        arquivo.write(b"PK\x03\x04parcial")
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(np, "savez_compressed", falhar)
+    with pytest.raises(OSError):
+        serie_tendencia.gravar_casos_compactos(
+            resumo_casos(casos_execucoes[1]), str(tmp_path / "run_0")
+        )
+
+    assert os.listdir(tmp_path / "run_0") == [serie_tendencia.ARQUIVO_CASOS_COMPACTOS]
+    casos = serie_tendencia.carregar_casos_compactos(str(tmp_path / "run_0"), None)
+    assert casos["chave"].tolist() == anterior["chave"].tolist()
+
+
+def test_selecao_mantem_a_ultima_execucao_de_cada_periodo():
+    """Cada semana/mês é representado pela sua última execução."""
+    datas = [
+        datetime(2025, 3, 4),
+        datetime(2025, 3, 2),
+        datetime(2025, 3, 6),
+        datetime(2025, 4, 1),
+    ]
+
+    assert serie_tendencia.selecionar_execucoes(datas, "execucao") == [1, 0, 2, 3]
+    assert serie_tendencia.selecionar_execucoes(datas, "semana") == [1, 2, 3]
+    assert serie_tendencia.selecionar_execucoes(datas, "mes") == [2, 3]
+
+
+def test_api_serie_de_tendencia_gera_armazenamento_dos_relatorios_antigos(
+    app, client, persistir_relatorio, casos_execucoes
+):
+    """
+    GIVEN relatórios antigos com apenas o resumo JSON em disco,
+    WHEN a série mensal é consultada,
+    THEN o armazenamento compacto de cada execução deve ser gerado e a resposta
+    deve trazer um período por mês; um agrupamento inválido retorna 400.
+    """
+    reports_folder = app.config["REPORTS_FOLDER"]
+    intervalos = ["01/02/2025 a 07/02/2025", "01/03/2025 a 07/03/2025", None]
+    for i, casos in enumerate(casos_execucoes):
+        persistir_relatorio(
+            f"run_{i}",
+            casos,
+            date_range=intervalos[i],
+            timestamp=datetime(2025, 3, 20, tzinfo=timezone.utc) + timedelta(days=i),
+        )
+
+    response = client.get("/api/v1/trends/series?agrupamento=mes")
+    invalido = client.get("/api/v1/trends/series?agrupamento=ano")
+
+    assert response.status_code == 200
+    dados = response.get_json()
+    assert [p["rotulo"] for p in dados["periodos"]] == ["02/2025", "03/2025"]
+    assert [p["run_folder"] for p in dados["periodos"]] == ["run_0", "run_2"]
+    assert dados["periodos"][0]["novos"] is None
+    assert dados["periodos"][1]["persistentes"] == 1
+    assert dados["squads"][0]["nome"] == "A"
+    # Apenas as execuções que representam um período são carregadas.
+    assert not os.path.isfile(
+        os.path.join(reports_folder, "run_1", serie_tendencia.ARQUIVO_CASOS_COMPACTOS)
+    )
+    assert os.path.isfile(
+        os.path.join(reports_folder, "run_2", serie_tendencia.ARQUIVO_CASOS_COMPACTOS)
+    )
+    assert invalido.status_code == 400
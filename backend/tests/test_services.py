@@ -1,8 +1,10 @@
+import io
 import json
 import os
 from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 
 from src import services
@@ -80,7 +82,10 @@ def test_process_upload_and_generate_reports(
     }
 
     # CORREÇÃO: Configura o mock para retornar uma tupla válida, evitando o ValueError.
-    mock_gerar_tendencia.return_value = (None, "<html></html>")
+    mock_gerar_tendencia.return_value = (
+        {"persistent": np.int64(2), "improvement_rate": np.float64(50.0)},
+        "<html></html>",
+    )
 
     # O gerador de páginas principal retorna o caminho do dashboard como uma STRING
     mock_dashboard_path = "fake/path/resumo_geral.html"
@@ -107,10 +112,15 @@ def test_process_upload_and_generate_reports(
     # O caminho absoluto é dinâmico, então usamos ANY da unittest.mock
     from unittest.mock import ANY
 
+    # KPIs (em tipos nativos, serializáveis) e diagnóstico são persistidos juntos.
     mock_dependencies["TrendAnalysis"].assert_called_with(
         trend_report_path=ANY,
         previous_report_id=mock_last_report.id,
+        kpis={"persistent": 2, "improvement_rate": 50.0},
+        quick_diagnosis_html="<html></html>",
     )
+    kpis = mock_dependencies["TrendAnalysis"].call_args.kwargs["kpis"]
+    assert type(kpis["persistent"]) is int
 
     # Valida que o ID do novo relatório foi atribuído à análise de tendência
     assert NewTrendAnalysisInstance.current_report_id == mock_new_report.id
@@ -422,6 +432,54 @@ def test_enforce_report_limit_deletes_oldest(
     mock_db.session.commit.assert_called_once()
 
 
+def test_dashboard_summary_serves_persisted_quick_diagnosis(app):
+    """
+    GIVEN uma análise de tendência com o diagnóstico persistido na criação,
+    WHEN os dados do dashboard são montados,
+    THEN o diagnóstico deve vir do banco, sem recarregar os resumos JSON.
+    """
+    from src.models import Report, TrendAnalysis, db
+
+    reports_folder = app.config["REPORTS_FOLDER"]
+    reports = []
+    for i, nome in enumerate(("run_anterior", "run_recente")):
+        run = os.path.join(reports_folder, nome)
+        os.makedirs(run)
+        reports.append(
+            Report(
+                original_filename=f"{nome}.csv",
+                report_path=os.path.join(run, "resumo_geral.html"),
+                json_summary_path=os.path.join(run, "resumo_problemas.json"),
+                timestamp=datetime.now(timezone.utc) - timedelta(minutes=2 - i),
+            )
+        )
+    db.session.add_all(reports)
+    db.session.flush()
+    db.session.add(
+        TrendAnalysis(
+            previous_report_id=reports[0].id,
+            current_report_id=reports[1].id,
+            trend_report_path=os.path.join(
+                reports_folder, "run_recente", "comparativo_periodos.html"
+            ),
+            kpis={"persistent": 2},
+            quick_diagnosis_html="<p>diagnóstico</p>",
+        )
+    )
+    db.session.commit()
+
+    with patch(
+        "src.services.load_summary_from_json",
+        side_effect=AssertionError("resumo JSON não deveria ser carregado"),
+    ):
+        data = services.get_dashboard_summary_data(
+            Report, TrendAnalysis, reports_folder
+        )
+
+    assert data["quick_diagnosis_html"] == "<p>diagnóstico</p>"
+    assert data["latest_report_files"]["trend"] == "comparativo_periodos.html"
+
+
 def test_calculate_kpi_summary_success(tmp_path):
     """
     GIVEN um arquivo JSON de resumo válido,
@@ -504,13 +562,17 @@ def test_delete_report_and_artifacts_success(
     mock_db.session.get.return_value = mock_report_instance
 
     # Act
-    result = services.delete_report_and_artifacts(1, mock_db, report_model)
+    with patch.object(
+        services.cache_resumos.CacheResumos, "invalidar_diretorio"
+    ) as mock_invalidar:
+        result = services.delete_report_and_artifacts(1, mock_db, report_model)
 
     # Assert
     assert result is True
     mock_db.session.get.assert_called_once_with(report_model, 1)
     mock_isdir.assert_called_once_with("/fake/dir")
     mock_rmtree.assert_called_once_with("/fake/dir")
+    mock_invalidar.assert_called_once_with("/fake/dir")
     mock_db.session.delete.assert_called_once_with(mock_report_instance)
     mock_db.session.commit.assert_called_once()
     mock_db.session.rollback.assert_not_called()
@@ -546,3 +608,216 @@ def test_delete_report_and_artifacts_exception(
     mock_db.session.delete.assert_not_called()
     mock_db.session.commit.assert_not_called()
     mock_db.session.rollback.assert_called_once()
+
+
+CSV_HEADER = (
+    "assignment_group;short_description;node;cmdb_ci.sys_class_name;cmdb_ci;source;"
+    "metric_name;sys_created_on;number;severity;sn_priority_group;state;sys_id;"
+    "u_closed_date;message_key;Pilar;tasks_count;tasks_numbers;tasks_status;"
+    "has_remediation_task;alert_found"
+)
+
+
+def _csv_alertas(path, mes, recursos, status_task="Closed Skipped"):
+    linhas = [
+        f"Squad A;CPU alta;{recurso};cmdb_ci_server;{recurso};Zabbix;cpu;"
+        f"2025-{mes:02d}-0{i + 1} 10:00:00;ALR{mes}{i};Aviso;Baixo(a);Closed;"
+        f"id{mes}{i};;k{i};P1;1;TASK{i};{status_task};REM_NOT_OK;true"
+        for i, recurso in enumerate(recursos)
+    ]
+    path.write_text("\n".join([CSV_HEADER, *linhas]), encoding="utf-8")
+    return path
+
+
+def test_process_direct_comparison_uses_in_memory_summaries(app, tmp_path):
+    """
+    GIVEN dois CSVs de períodos diferentes,
+    WHEN a comparação direta é processada,
+    THEN apenas o relatório de tendência deve ser gravado (sem CSVs ou resumos
+    JSON por período) e os KPIs devem refletir os Casos dos dois arquivos.
+    """
+    from werkzeug.datastructures import FileStorage
+
+    anterior = _csv_alertas(tmp_path / "marco.csv", 3, ["srv1", "srv2"])
+    recente = _csv_alertas(tmp_path / "abril.csv", 4, ["srv1", "srv3", "srv4"])
+    files = [
+        FileStorage(stream=io.BytesIO(path.read_bytes()), filename=path.name)
+        for path in (recente, anterior)
+    ]
+    reports_folder = app.config["REPORTS_FOLDER"]
+
+    with patch(
+        "src.services.gerar_analise_comparativa",
+        wraps=services.gerar_analise_comparativa,
+    ) as mock_trend:
+        result = services.process_direct_comparison(
+            files, app.config["UPLOAD_FOLDER"], reports_folder
+        )
+
+    run_dir = os.path.join(reports_folder, result["run_folder"])
+    assert os.listdir(run_dir) == ["comparativo_periodos.html"]
+    kwargs = mock_trend.call_args.kwargs
+    assert kwargs["json_anterior"] is None
+    assert kwargs["csv_anterior_name"] == "marco.csv"
+    assert len(kwargs["resumo_anterior"]) == 2
+    assert len(kwargs["resumo_recente"]) == 3
+
+
+def test_analyze_files_light_in_parallel_matches_serial(tmp_path):
+    """
+    GIVEN dois CSVs independentes,
+    WHEN são analisados em processos paralelos e em série,
+    THEN os resumos e os intervalos de datas lidos na ingestão devem coincidir,
+    na ordem dos arquivos de entrada.
+    """
+    paths = [
+        str(_csv_alertas(tmp_path / "abril.csv", 4, ["srv1", "srv3"])),
+        str(_csv_alertas(tmp_path / "marco.csv", 3, ["srv1"])),
+    ]
+
+    paralelo = services._analyze_files_light(paths, workers=2)
+    serie = services._analyze_files_light(paths, workers=1)
+
+    assert [len(r["summary"]) for r in paralelo] == [2, 1]
+    for r_paralelo, r_serie in zip(paralelo, serie):
+        assert r_paralelo["summary"].equals(r_serie["summary"])
+        assert r_paralelo["intervalo_datas"] == r_serie["intervalo_datas"]
+    assert services._format_date_range(paralelo[0]["intervalo_datas"]) == (
+        "01/04/2025 a 02/04/2025"
+    )
+
+
+def test_process_multi_comparison_orders_periods_and_writes_report(
+    app, tmp_path, monkeypatch
+):
+    """
+    GIVEN três CSVs de meses diferentes, enviados fora de ordem,
+    WHEN a comparação de múltiplos períodos é processada,
+    THEN os períodos devem ser ordenados pelas datas lidas na ingestão, o
+    relatório gravado e os arquivos temporários removidos; dois arquivos não
+    bastam para a comparação.
+    """
+    from werkzeug.datastructures import FileStorage
+
+    monkeypatch.setattr(services, "COMPARISON_WORKERS", 1)
+    falha = "Closed Incomplete"
+    paths = [
+        _csv_alertas(tmp_path / "abril.csv", 4, ["srv1", "srv3"], falha),
+        _csv_alertas(tmp_path / "fevereiro.csv", 2, ["srv1", "srv2"], falha),
+        _csv_alertas(tmp_path / "marco.csv", 3, ["srv1"], falha),
+    ]
+    files = [
+        FileStorage(stream=io.BytesIO(path.read_bytes()), filename=path.name)
+        for path in paths
+    ]
+    reports_folder = app.config["REPORTS_FOLDER"]
+    upload_folder = app.config["UPLOAD_FOLDER"]
+
+    with pytest.raises(ValueError):
+        services.process_multi_comparison(files[:2], upload_folder, reports_folder)
+    result = services.process_multi_comparison(files, upload_folder, reports_folder)
+
+    periodos = result["comparison"]["periodos"]
+    assert [p["arquivo"] for p in periodos] == [
+        "fevereiro.csv",
+        "marco.csv",
+        "abril.csv",
+    ]
+    assert [p["total_casos"] for p in periodos] == [2, 1, 2]
+    srv1 = next(c for c in result["comparison"]["casos"] if c["recurso"] == "srv1")
+    assert (srv1["presenca"], srv1["sequencia_atual"]) == (0b111, 3)
+    report_path = os.path.join(
+        reports_folder, result["run_folder"], result["report_filename"]
+    )
+    with open(report_path, encoding="utf-8") as f:
+        assert "Comparação de 3 Períodos" in f.read()
+    assert not os.listdir(upload_folder)
+
+
+def test_backfill_trend_history_with_dry_run_and_resume(
+    app, runner, persistir_relatorio
+):
+    """
+    GIVEN quatro relatórios com resumos persistidos, o último com um período
+    anterior ao dos demais, e uma tendência antiga,
+    WHEN o backfill é simulado, retomado após uma interrupção e executado de
+    novo em um pool de processos,
+    THEN a simulação não deve gravar nada, a retomada deve pular os pares já
+    concluídos e a execução completa deve regenerar as tendências de todos os
+    pares adjacentes, com os KPIs no banco e o relatório no bundle, exceto o
+    par cujo período recente não começa depois do anterior.
+    """
+    import zipfile
+
+    from src.constants import ACAO_FALHA_PERSISTENTE
+    from src.models import ReportBundle, TrendAnalysis, db
+
+    reports_folder = app.config["REPORTS_FOLDER"]
+    execucoes = [
+        (["srv1", "srv2"], "01/02/2025 a 07/02/2025"),
+        (["srv1"], "08/02/2025 a 14/02/2025"),
+        (["srv1", "srv3"], "15/02/2025 a 21/02/2025"),
+        # Carregado depois, mas com um período anterior: o upload não geraria a
+        # tendência, e o backfill também não.
+        (["srv4"], "01/01/2025 a 07/01/2025"),
+    ]
+    reports = [
+        persistir_relatorio(
+            f"run_{i}",
+            [("Squad A", recurso, ACAO_FALHA_PERSISTENTE, 2) for recurso in recursos],
+            date_range=date_range,
+            timestamp=datetime(2025, 3, 1, tzinfo=timezone.utc) + timedelta(days=i),
+        )
+        for i, (recursos, date_range) in enumerate(execucoes)
+    ]
+    old_trend_path = os.path.join(reports_folder, "run_1", "comparativo_periodos.html")
+    db.session.add(
+        TrendAnalysis(
+            previous_report_id=reports[0].id,
+            current_report_id=reports[1].id,
+            trend_report_path=old_trend_path,
+        )
+    )
+    db.session.add(
+        ReportBundle(
+            report_id=reports[1].id,
+            run_folder="run_1",
+            bundle=services._zip_directory(os.path.join(reports_folder, "run_1")),
+        )
+    )
+    db.session.commit()
+    pairs = [(reports[0].id, reports[1].id), (reports[1].id, reports[2].id)]
+    state_path = os.path.join(reports_folder, services.BACKFILL_STATE_FILENAME)
+
+    dry_run = runner.invoke(args=["backfill-tendencias", "--dry-run"])
+    assert dry_run.exit_code == 0
+    assert "2 tendência(s) a gerar, 1 pulada(s)" in dry_run.output
+    assert f"{reports[2].id} -> {reports[3].id}" in dry_run.output
+    assert not os.path.exists(old_trend_path)
+
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump({"concluidos": [list(pairs[0])]}, f)
+    resumed = runner.invoke(args=["backfill-tendencias", "--resume", "--workers", "1"])
+    assert resumed.exit_code == 0, resumed.output
+    assert "1 tendência(s) gerada(s), 2 pulada(s), 0 falha(s)" in resumed.output
+    assert not os.path.exists(old_trend_path)
+    assert not os.path.exists(state_path)
+    new_trend = TrendAnalysis.query.filter_by(current_report_id=reports[2].id).one()
+    assert new_trend.previous_report_id == reports[1].id
+    assert new_trend.kpis["new"] == 1
+    assert os.path.isfile(new_trend.trend_report_path)
+
+    full = runner.invoke(args=["backfill-tendencias", "--workers", "2"])
+    assert full.exit_code == 0, full.output
+    assert "2 tendência(s) gerada(s), 1 pulada(s), 0 falha(s)" in full.output
+    db.session.expire_all()
+    old_trend = TrendAnalysis.query.filter_by(current_report_id=reports[1].id).one()
+    assert old_trend.kpis["resolved"] == 1
+    assert os.path.isfile(old_trend_path)
+    assert not TrendAnalysis.query.filter_by(current_report_id=reports[3].id).all()
+    assert not [
+        name for name in os.listdir(os.path.dirname(old_trend_path)) if ".tmp" in name
+    ]
+    bundle = ReportBundle.query.filter_by(run_folder="run_1").one()
+    with zipfile.ZipFile(io.BytesIO(bundle.bundle)) as zipf:
+        assert "comparativo_periodos.html" in zipf.namelist()
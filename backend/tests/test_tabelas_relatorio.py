@@ -0,0 +1,169 @@
+"""
+Testes para a consulta paginada das tabelas (CSVs) e do resumo JSON de um relatório.
+"""
+
+import json
+import os
+
+import pytest
+
+from src import gerador_paginas, tabelas_relatorio
+
+CSV_ATUAR = (
+    "﻿assignment_group;short_description;alert_count;first_event\n"
+    "Squad A;CPU alta;3;02/01/2025 10:00:00\n"
+    "Squad B;Disco cheio;12;01/01/2025 09:00:00\n"
+    "Squad A;Rede lenta;1;10/01/2024 08:00:00\n"
+    "Squad C;cpu baixa;;05/01/2025 07:00:00\n"
+)
+
+
+@pytest.fixture
+def run_dir(tmp_path):
+    run = tmp_path / "run_1"
+    run.mkdir()
+    (run / "atuar.csv").write_text(CSV_ATUAR, encoding="utf-8")
+    return run
+
+
+def test_consultar_tabela_filtra_ordena_e_pagina(run_dir):
+    """
+    GIVEN um CSV de atuação,
+    WHEN a tabela é consultada com busca, ordenação e paginação,
+    THEN apenas as linhas filtradas da página pedida devem ser retornadas, com
+    ordenação numérica/por data e células vazias no fim.
+    """
+    tabela = tabelas_relatorio.carregar_tabela(str(run_dir), "atuar.csv")
+
+    por_alertas = tabelas_relatorio.consultar_tabela(
+        tabela, ordenar_por="alert_count", ordem="desc"
+    )
+    por_data = tabelas_relatorio.consultar_tabela(tabela, ordenar_por="first_event")
+    busca = tabelas_relatorio.consultar_tabela(
+        tabela, busca="CPU", tamanho_pagina=1, pagina=2
+    )
+    filtrada = tabelas_relatorio.consultar_tabela(
+        tabela, filtros={"assignment_group": "squad a"}
+    )
+
+    assert por_alertas["colunas"][0] == "assignment_group"
+    assert [linha[2] for linha in por_alertas["linhas"]] == ["12", "3", "1", ""]
+    assert [linha[1] for linha in por_data["linhas"]] == [
+        "Rede lenta",
+        "Disco cheio",
+        "CPU alta",
+        "cpu baixa",
+    ]
+    assert busca["total"] == 2 and busca["total_paginas"] == 2
+    assert busca["linhas"] == [["Squad C", "cpu baixa", "", "05/01/2025 07:00:00"]]
+    assert filtrada["total"] == 2 and filtrada["total_geral"] == 4
+    with pytest.raises(ValueError):
+        tabelas_relatorio.consultar_tabela(tabela, ordenar_por="inexistente")
+
+
+def test_carregar_tabela_grava_copia_colunar_e_valida_caminho(run_dir):
+    """
+    GIVEN um CSV de uma execução,
+    WHEN a tabela é carregada,
+    THEN uma cópia colunar deve ser gravada na execução; caminhos fora da
+    execução ou que não sejam CSV devem ser recusados.
+    """
+    tabelas_relatorio.carregar_tabela(str(run_dir), "atuar.csv")
+
+    copia = run_dir / tabelas_relatorio.CACHE_DIR_NAME / "atuar.npz"
+    assert copia.exists()
+    tabelas_relatorio._carregar_tabela_cacheada.cache_clear()
+    recarregada = tabelas_relatorio.carregar_tabela(str(run_dir), "atuar.csv")
+    assert recarregada.num_linhas == 4
+    for invalido in ("../outro/atuar.csv", "resumo_problemas.json", "_cache/x.csv"):
+        with pytest.raises(ValueError):
+            tabelas_relatorio.carregar_tabela(str(run_dir), invalido)
+    with pytest.raises(FileNotFoundError):
+        tabelas_relatorio.carregar_tabela(str(run_dir), "remediados.csv")
+
+
+def test_visualizador_csv_nao_embute_os_dados(run_dir):
+    """
+    GIVEN um CSV de atuação,
+    WHEN a página atuar.html é gerada,
+    THEN ela deve apontar para a tabela na API em vez de embutir as linhas.
+    """
+    gerador_paginas._gerar_pagina_atuar_geral(str(run_dir), "/")
+
+    html = (run_dir / gerador_paginas.FILENAME_ACTION_PLAN).read_text(encoding="utf-8")
+    assert 'const csvPathInReport = "atuar.csv";' in html
+    assert "Disco cheio" not in html
+
+
+def test_api_de_tabela_retorna_pagina(app, client):
+    """
+    GIVEN um relatório com o CSV de atuação,
+    WHEN a API de tabelas é chamada,
+    THEN deve retornar a página pedida; colunas inválidas retornam 400 e
+    tabelas inexistentes, 404.
+    """
+    run = os.path.join(app.config["REPORTS_FOLDER"], "run_api")
+    os.makedirs(run)
+    with open(os.path.join(run, "atuar.csv"), "w", encoding="utf-8") as f:
+        f.write(CSV_ATUAR)
+
+    response = client.get(
+        "/api/v1/reports/run_api/tabelas/atuar.csv"
+        "?tamanho_pagina=2&ordenar_por=alert_count&ordem=desc"
+    )
+    invalida = client.get("/api/v1/reports/run_api/tabelas/atuar.csv?ordenar_por=x")
+    inexistente = client.get("/api/v1/reports/run_api/tabelas/remediados.csv")
+
+    assert response.status_code == 200
+    dados = response.get_json()
+    assert dados["total"] == 4 and dados["total_paginas"] == 2
+    assert [linha[2] for linha in dados["linhas"]] == ["12", "3"]
+    assert invalida.status_code == 400
+    assert inexistente.status_code == 404
+
+
+def test_ler_registros_resumo_le_faixas_do_json(tmp_path):
+    """
+    GIVEN um resumo JSON com caracteres não ASCII,
+    WHEN faixas de registros são lidas,
+    THEN cada faixa deve conter exatamente os registros pedidos, e um índice
+    de posições deve ser gravado na execução.
+    """
+    registros = [{"problema": f"Falha ç{i}", "alert_count": i} for i in range(5)]
+    (tmp_path / "resumo_problemas.json").write_text(
+        json.dumps(registros, indent=4, ensure_ascii=False), encoding="utf-8"
+    )
+
+    faixa = json.loads(tabelas_relatorio.ler_registros_resumo(str(tmp_path), 3, 10))
+    primeira = json.loads(tabelas_relatorio.ler_registros_resumo(str(tmp_path), 0, 2))
+
+    assert faixa == {
+        "inicio": 3,
+        "quantidade": 2,
+        "total": 5,
+        "registros": registros[3:],
+    }
+    assert primeira["registros"] == registros[:2]
+    assert (
+        tmp_path / tabelas_relatorio.CACHE_DIR_NAME / "resumo_problemas.indice.npy"
+    ).exists()
+
+
+def test_visualizador_json_carrega_resumo_pela_api(app, client):
+    """
+    GIVEN um relatório com o resumo JSON,
+    WHEN o visualizador e a API de resumo são requisitados,
+    THEN o visualizador não deve embutir os Casos e a API deve retornar a faixa.
+    """
+    run = os.path.join(app.config["REPORTS_FOLDER"], "run_json")
+    os.makedirs(run)
+    with open(os.path.join(run, "resumo_problemas.json"), "w", encoding="utf-8") as f:
+        json.dump([{"problema": "CPU alta"}, {"problema": "Disco cheio"}], f)
+
+    viewer = client.get("/reports/run_json/visualizador_json.html")
+    faixa = client.get("/api/v1/reports/run_json/resumo?inicio=1&quantidade=5")
+
+    assert viewer.status_code == 200
+    assert "CPU alta" not in viewer.get_data(as_text=True)
+    assert faixa.get_json()["registros"] == [{"problema": "Disco cheio"}]
+    assert client.get("/api/v1/reports/inexistente/resumo").status_code == 404
@@ -6,6 +6,8 @@ import {
   UploadSuccessResponse,
   FeedbackData,
   FeedbackResponse,
+  ReportViewModel,
+  DictionaryColumn,
 } from "../types";
 
 export const API_BASE_URL = "";
@@ -130,4 +132,18 @@ export const submitFeedback = async (
 ): Promise<FeedbackResponse> => {
   const response = await apiClient.post("/api/v1/feedback", feedbackData);
   return response.data;
-};
\ No newline at end of file
+};
+export const getReportViewModel = async (
+  runFolder: string,
+): Promise<ReportViewModel> => {
+  const response = await apiClient.get(
+    `/api/v1/reports/${encodeURIComponent(runFolder)}/modelo`,
+  );
+  return response.data;
+};
+
+/** Decodifica uma coluna de texto codificada por dicionário no modelo de visualização. */
+export const decodeDictionaryColumn = (
+  coluna: DictionaryColumn,
+): (string | null)[] =>
+  coluna.codigos.map((codigo) => (codigo < 0 ? null : coluna.valores[codigo]));
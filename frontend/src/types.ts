@@ -66,3 +66,52 @@ export interface FeedbackResponse {
   message: string;
   issue_url: string;
 }
+
+/** Coluna de texto codificada por dicionário: `valores[codigos[i]]` (-1 = ausente). */
+export interface DictionaryColumn {
+  valores: string[];
+  codigos: number[];
+}
+
+/** Par [nome, total] das listas de destaque. */
+export type RankedItem = [string, number];
+
+/** Modelo de visualização de uma execução (`GET /api/v1/reports/<run>/modelo`). */
+export interface ReportViewModel {
+  versao: number;
+  gerado_em: string;
+  periodo: string;
+  kpis: KpiSummary & { alertas_sucesso: number; total_alertas: number };
+  destaques: {
+    squads: RankedItem[];
+    metricas: RankedItem[];
+    problemas_atuacao: RankedItem[];
+    problemas_remediados: RankedItem[];
+    problemas_geral: RankedItem[];
+    problemas_instabilidade: RankedItem[];
+  };
+  squads_prioritarias: {
+    squad: string;
+    score_acumulado: number;
+    casos: number;
+  }[];
+  squads: RankedItem[];
+  num_logs_invalidos: number;
+  casos: {
+    total: number;
+    colunas: {
+      assignment_group: DictionaryColumn;
+      short_description: DictionaryColumn;
+      metric_name: DictionaryColumn;
+      acao_sugerida: DictionaryColumn;
+      cmdb_ci?: (string | null)[];
+      node?: (string | null)[];
+      score_ponderado_final?: (number | null)[];
+      alert_count?: (number | null)[];
+      alert_numbers?: (string | null)[];
+      status_chronology?: string[][];
+      first_event?: (string | null)[];
+      last_event?: (string | null)[];
+    };
+  };
+}